@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+FactorBase Async API
+====================
+asyncio 版查詢介面，查詢不會阻塞 event loop。
+
+    AsyncCatalog        in-process: catalog 載入與查詢在執行緒池中執行
+    AsyncServerClient   連線至 query_factorbase.py --serve 啟動的本機服務（HTTP 或 Unix socket）
+
+兩者提供相同的方法（get_measure、get_paper、search ...）與相同的回傳值
+（皆經由 server.OPERATIONS 執行）；找不到時回傳 None 或空列表。
+
+request coalescing: 同時進行中的相同查詢（op 與參數皆相同）只執行一次，
+其餘呼叫等待同一個結果；批次方法（get_measures、get_papers）另會先去除重複 ID，
+AsyncServerClient 的批次方法以單一 /batch 請求完成。
+
+使用方式:
+    from async_api import AsyncCatalog, AsyncServerClient
+
+    catalog = AsyncCatalog()
+    measure = await catalog.get_measure("BM")
+    measures = await catalog.get_measures(["BM", "EP_TTM", "MOM_12M"])
+    results = await catalog.search("低波動", limit=5)
+
+    async with AsyncServerClient(port=8765) as client:
+        papers = await client.get_papers(["paper_001", "paper_002"])
+"""
+
+import asyncio
+import json
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+
+from server import DEFAULT_HOST, DEFAULT_PORT, MAX_BATCH, OPERATIONS, CatalogService, QueryError
+
+
+class AsyncQueryError(Exception):
+    """查詢失敗（語法錯誤、參數錯誤或伺服器錯誤）"""
+
+
+def _request_key(op: str, params: Dict[str, Any]) -> Tuple[str, str]:
+    return op, json.dumps(params, sort_keys=True, ensure_ascii=False)
+
+
+class _AsyncBase:
+    """共用的查詢方法與 request coalescing（子類別實作 _execute / _execute_batch）"""
+
+    def __init__(self):
+        self._inflight: Dict[Tuple[str, str], "asyncio.Future"] = {}
+        self.stats = {"calls": 0, "executed": 0, "coalesced": 0}
+
+    async def _execute(self, op: str, params: Dict[str, Any]) -> Any:
+        raise NotImplementedError
+
+    async def _execute_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """預設逐一執行（皆經過 coalescing）；回傳 {"result"} 或 {"error", "status"}"""
+        async def one(request):
+            params = {k: v for k, v in request.items() if k != "op"}
+            try:
+                return {"result": await self.call(request["op"], **params)}
+            except AsyncQueryError as e:
+                return {"error": str(e), "status": 400}
+        return list(await asyncio.gather(*(one(r) for r in requests)))
+
+    async def call(self, op: str, **params: Any) -> Any:
+        """
+        執行任一 op（名稱同 server.OPERATIONS）
+
+        找不到資料（404）時回傳 None；其他錯誤拋出 AsyncQueryError。
+        """
+        if op not in OPERATIONS:
+            raise AsyncQueryError(f"未知的 op: {op}（可用: {', '.join(OPERATIONS)}）")
+        self.stats["calls"] += 1
+        key = _request_key(op, params)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            # 查詢在獨立的 task 中執行: 任一呼叫者被取消時不影響其他等待同一結果的呼叫者
+            task = asyncio.ensure_future(self._execute(op, params))
+            self._inflight[key] = task
+            self.stats["executed"] += 1
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Tuple[str, str], task: "asyncio.Future") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 所有呼叫者皆已取消時避免 "exception was never retrieved" 警告
+        if not task.cancelled():
+            task.exception()
+
+    async def _many(self, op: str, ids: Iterable[str], **params: Any) -> Dict[str, Any]:
+        """批次查詢，回傳 id → 結果（找不到時為 None），重複的 ID 只查詢一次"""
+        unique = list(dict.fromkeys(ids))
+        responses = await self._execute_batch([dict(params, op=op, id=item) for item in unique])
+        results = {}
+        for item, response in zip(unique, responses):
+            if "error" in response and response["status"] != 404:
+                raise AsyncQueryError(response["error"])
+            results[item] = response.get("result")
+        return results
+
+    # ------------------------------------------------------------------
+    # 查詢方法（對應 query_factorbase.py 的選項）
+    # ------------------------------------------------------------------
+
+    async def get_measure(self, measure_id: str) -> Optional[Dict[str, Any]]:
+        return await self.call("measure", id=measure_id)
+
+    async def get_paper(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        return await self.call("paper", id=paper_id)
+
+    async def get_measures_by_factor(self, factor: str) -> List[Dict[str, Any]]:
+        return await self.call("factor", id=factor) or []
+
+    async def get_paper_measures(self, paper_id: str) -> List[Dict[str, Any]]:
+        return await self.call("paper_measures", id=paper_id)
+
+    async def get_measure_papers(self, measure_id: str, role: Optional[str] = None,
+                                 significance: Optional[str] = None) -> List[Dict[str, Any]]:
+        params = {k: v for k, v in (("role", role), ("significance", significance)) if v}
+        return await self.call("measure_papers", id=measure_id, **params)
+
+    async def search(self, query: str, limit: int = 10,
+                     types: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        params: Dict[str, Any] = {"q": query, "limit": limit}
+        if types:
+            params["type"] = list(types)
+        return await self.call("search", **params)
+
+    async def query(self, text: str) -> List[Dict[str, Any]]:
+        return await self.call("query", q=text)
+
+    async def get_measures(self, measure_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """批次取得 Measures（measure_id → 定義，找不到時為 None）"""
+        return await self._many("measure", measure_ids)
+
+    async def get_papers(self, paper_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """批次取得論文（paper_id → metadata，找不到時為 None）"""
+        return await self._many("paper", paper_ids)
+
+
+class AsyncCatalog(_AsyncBase):
+    """
+    in-process 的 async 查詢介面
+
+    catalog 載入（檔案 I/O 與 JSON 解析）與查詢都在 executor（預設執行緒池）中執行，
+    來源檔變動時與查詢服務相同地自動重新載入。
+    """
+
+    def __init__(self, executor: Optional[Executor] = None):
+        super().__init__()
+        self.executor = executor
+        self._service: Optional[CatalogService] = None
+        self._service_lock = asyncio.Lock()
+
+    async def _get_service(self) -> CatalogService:
+        async with self._service_lock:
+            if self._service is None:
+                loop = asyncio.get_running_loop()
+                self._service = await loop.run_in_executor(self.executor, CatalogService)
+            return self._service
+
+    def _run(self, service: CatalogService, op: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return {"result": service.execute(op, params)}
+        except QueryError as e:
+            return {"error": str(e), "status": e.status}
+
+    async def _execute(self, op: str, params: Dict[str, Any]) -> Any:
+        service = await self._get_service()
+        response = await asyncio.get_running_loop().run_in_executor(self.executor, self._run, service, op, params)
+        if "error" in response:
+            if response["status"] == 404:
+                return None
+            raise AsyncQueryError(response["error"])
+        return response["result"]
+
+    async def _execute_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """整批在同一個 executor 工作中執行（不逐筆切換執行緒）"""
+        service = await self._get_service()
+
+        def run_all():
+            return [self._run(service, r["op"], {k: v for k, v in r.items() if k != "op"}) for r in requests]
+        return await asyncio.get_running_loop().run_in_executor(self.executor, run_all)
+
+
+class AsyncServerClient(_AsyncBase):
+    """
+    查詢服務（server.py）的 async client
+
+    每個請求使用一條連線（Connection: close），不需要額外套件。
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 socket_path: Optional[Path] = None, timeout: float = 30.0):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    async def __aenter__(self) -> "AsyncServerClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+    async def _request(self, method: str, path: str, body: Any = None) -> Tuple[int, Any]:
+        if self.socket_path:
+            reader, writer = await asyncio.open_unix_connection(str(self.socket_path))
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            payload = b"" if body is None else json.dumps(body, ensure_ascii=False).encode("utf-8")
+            head = (
+                f"{method} {path} HTTP/1.1\r\nHost: factorbase\r\nConnection: close\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n"
+            )
+            writer.write(head.encode("ascii") + payload)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), self.timeout)
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+        header, _, content = response.partition(b"\r\n\r\n")
+        try:
+            status = int(header.split(b" ", 2)[1])
+            return status, json.loads(content)
+        except (IndexError, ValueError) as e:
+            raise AsyncQueryError(f"無法解析伺服器回應: {e}")
+
+    async def _execute(self, op: str, params: Dict[str, Any]) -> Any:
+        status, data = await self._request("POST", f"/{op}", params)
+        if status == 404:
+            return None
+        if status != 200:
+            raise AsyncQueryError(data.get("error", f"HTTP {status}"))
+        return data["result"]
+
+    async def _execute_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """以 /batch 請求完成（超過 MAX_BATCH 時分段）"""
+        chunks = [requests[i:i + MAX_BATCH] for i in range(0, len(requests), MAX_BATCH)]
+        responses = await asyncio.gather(*(self._request("POST", "/batch", {"requests": c}) for c in chunks))
+        results = []
+        for status, data in responses:
+            if status != 200:
+                raise AsyncQueryError(data.get("error", f"HTTP {status}"))
+            results.extend(
+                {"result": item.get("result")} if "error" not in item
+                else {"error": item["error"], "status": item.get("status", 400)}
+                for item in data["results"]
+            )
+        return results
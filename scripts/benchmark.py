@@ -0,0 +1,577 @@
+#!/usr/bin/env python3
+"""
+FactorBase Benchmark
+====================
+產生指定規模的合成知識庫（符合 docs/schemas/ 的 Schema），量測目錄載入、查詢、
+驗證與索引產生的耗時，結果寫成 JSON，供不同 commit 之間比較。
+
+合成知識庫的目錄結構與專案相同，並複製 scripts/ 與 docs/schemas/，
+各 CLI 以自身位置決定專案根目錄，因此不需修改即可在合成知識庫上執行。
+
+量測項目:
+    cli.*        以子行程執行 CLI（含直譯器啟動與 import），每項執行 --repeat 次
+    library.*    in-process 呼叫 FactorBase、FactorsQuery、validation 與 generate_index；
+                 查詢類項目另記錄每次呼叫的平均耗時（per_call）
+
+合成資料以 --seed 決定，相同參數產生的知識庫完全相同。
+validate_json.py 的結束碼同時用來確認合成資料符合 Schema。
+
+使用方式:
+    python benchmark.py                                       # 預設規模（1000 papers / 200 measures / 10000 links）
+    python benchmark.py --papers 10000 --measures 2000 --links 100000
+    python benchmark.py --json bench.json                     # 寫出結果
+    python benchmark.py --json new.json --compare base.json   # 與先前的結果比較
+    python benchmark.py --corpus /tmp/corpus                  # 保留合成知識庫（已存在時直接沿用）
+    python benchmark.py --only library                        # 只量測 in-process 項目
+"""
+
+import argparse
+import json
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable, Sequence
+
+import instrumentation
+from factorbase import PROJECT_ROOT, FactorBase
+
+
+RESULT_VERSION = 1
+
+# measure_schema 中 factor 的 enum（目錄名稱為小寫、空白改為底線，與 measures/ 相同）
+FACTORS = [
+    ("Value", "Style"),
+    ("Size", "Style"),
+    ("Momentum", "Style"),
+    ("Profitability", "Quality"),
+    ("Investment", "Quality"),
+    ("Quality", "Quality"),
+    ("Low Volatility", "Risk"),
+    ("Liquidity", "Risk"),
+    ("Sentiment", "Sentiment"),
+]
+
+MARKETS = ["US", "TW", "JP", "CN", "EU", "UK", "Global", "Asia", "Emerging", "Other"]
+ASSET_CLASSES = ["Equity", "Equity", "Equity", "Bond", "FX", "Commodity", "Multi-Asset"]
+CONCLUSION_SIGNS = ["positive", "negative", "mixed", "none"]
+REPLICABLE = ["yes", "no", "unknown"]
+FORMULA_TYPES = ["ratio", "difference", "percentile", "residual", "rolling", "composite",
+                 "return", "growth_rate", "log", "log_change", "product", "other"]
+WINDOWS = ["TTM", "MRQ", "1M", "6M", "12M", "36M", "60M"]
+NORMALIZATIONS = ["zscore_cross_sectional", "zscore_time_series", "rank", "percentile",
+                  "winsorize", "log_transform", "none"]
+ROLES = ["primary_sorting_variable", "secondary_sorting_variable", "control_variable",
+         "risk_factor", "dependent_variable", "instrument", "other"]
+SIGNIFICANCE = ["positive", "negative", "insignificant", "mixed", "not_tested"]
+
+SURNAMES = ["Fama", "French", "Carhart", "Novy-Marx", "Asness", "Moskowitz", "Pedersen", "Frazzini",
+            "Hou", "Xue", "Zhang", "Ang", "Hodrick", "Jegadeesh", "Titman", "Baker", "Wurgler",
+            "Amihud", "Stambaugh", "Yuan", "Lin", "Chen", "Wang", "Liu", "Huang", "Blitz", "van Vliet"]
+GIVEN_NAMES = ["Eugene F.", "Kenneth R.", "Mark M.", "Robert", "Clifford S.", "Tobias J.", "Lasse H.",
+               "Andrea", "Kewei", "Chen", "Lu", "Andrew", "Narasimhan", "Sheridan", "Malcolm", "Jeffrey"]
+JOURNALS = ["Journal of Finance", "Journal of Financial Economics", "Review of Financial Studies",
+            "Journal of Portfolio Management", "Financial Analysts Journal",
+            "Journal of Financial and Quantitative Analysis", "Review of Finance"]
+TOPICS = ["value", "momentum", "low volatility", "profitability", "investment", "liquidity",
+          "size", "sentiment", "quality", "reversal", "beta", "accruals"]
+CONCEPTS = ["book_value_equity", "market_value_equity", "net_income", "operating_cash_flow",
+            "total_assets", "sales", "gross_profit", "capital_expenditure", "stock_return",
+            "trading_volume", "shares_outstanding", "idiosyncratic_volatility"]
+
+
+# ----------------------------------------------------------------------
+# 合成知識庫
+# ----------------------------------------------------------------------
+
+def _dump(path: Path, data: Any) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    text = json.dumps(data, ensure_ascii=False, indent=2) + "\n"
+    path.write_text(text, encoding="utf-8")
+    return len(text.encode("utf-8"))
+
+
+def _factor_dir(factor: str) -> str:
+    return factor.lower().replace(" ", "_")
+
+
+def _paper(rng: random.Random, paper_id: str) -> Dict[str, Any]:
+    authors = "; ".join(
+        f"{rng.choice(SURNAMES)}, {rng.choice(GIVEN_NAMES)}" for _ in range(rng.randint(1, 4))
+    )
+    topic = rng.choice(TOPICS)
+    year = rng.randint(1970, 2025)
+    first_page = rng.randint(1, 900)
+    return {
+        "paper_id": paper_id,
+        "title": f"The {topic} effect in {rng.choice(MARKETS)} markets: evidence from {year}",
+        "authors": authors,
+        "year": year,
+        "journal": rng.choice(JOURNALS),
+        "volume": str(rng.randint(1, 120)),
+        "issue": str(rng.randint(1, 6)),
+        "pages": f"{first_page}-{first_page + rng.randint(10, 60)}",
+        "doi": f"10.{rng.randint(1000, 9999)}/synthetic.{paper_id}",
+        "arxiv_id": None,
+        "ssrn_id": str(rng.randint(100000, 4999999)) if rng.random() < 0.5 else None,
+        "bibtex": None,
+        "market": rng.choice(MARKETS),
+        "asset_class": rng.choice(ASSET_CLASSES),
+        "abstract": f"We study the {topic} premium using portfolio sorts and Fama-MacBeth regressions.",
+        "conclusion_sign": rng.choice(CONCLUSION_SIGNS),
+        "replicable": rng.choice(REPLICABLE),
+        "notes": "合成資料（benchmark.py）",
+    }
+
+
+def _measure(rng: random.Random, measure_id: str, factor: str, paper_ids: Sequence[str]) -> Dict[str, Any]:
+    formula_type = rng.choice(FORMULA_TYPES)
+    formula: Dict[str, Any] = {"type": formula_type, "window": rng.choice(WINDOWS)}
+    if formula_type in ("ratio", "difference", "growth_rate"):
+        formula["numerator"], formula["denominator"] = rng.sample(CONCEPTS, 2)
+    if formula_type == "composite":
+        formula["components"] = rng.sample(CONCEPTS, 3)
+    if rng.random() < 0.2:
+        formula["lag"] = "1M"
+    return {
+        "measure_id": measure_id,
+        "measure_name": measure_id,
+        "display_name": f"{factor} measure {measure_id.rsplit('_', 1)[-1]}",
+        "factor": factor,
+        "description": f"Synthetic {factor.lower()} measure built from {formula.get('numerator', 'stock_return')}.",
+        "formula": formula,
+        "normalization": rng.choice(NORMALIZATIONS),
+        "original_paper_id": rng.choice(paper_ids) if rng.random() < 0.7 else None,
+        "aliases": [f"{measure_id.replace('_', '-')}", f"{measure_id.lower()}"],
+        "notes": "合成資料（benchmark.py）",
+    }
+
+
+def generate_corpus(root: Path, n_papers: int, n_measures: int, n_links: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    在 root 下產生合成知識庫（目錄結構與專案相同），並複製 scripts/ 與 docs/schemas/
+
+    Returns:
+        規模與檔案大小統計
+    """
+    if n_papers < 1 or n_measures < 1:
+        raise ValueError("papers 與 measures 至少各需 1 筆")
+    n_links = min(n_links, n_papers * n_measures)
+    rng = random.Random(seed)
+    root = Path(root)
+    size = 0
+
+    width = max(3, len(str(n_papers)))
+    paper_ids = [f"paper_{i:0{width}d}" for i in range(1, n_papers + 1)]
+    for paper_id in paper_ids:
+        size += _dump(root / "papers" / "metadata" / f"{paper_id}.json", _paper(rng, paper_id))
+
+    factors = {
+        "factors": [
+            {
+                "factor_id": i,
+                "factor_name": name,
+                "style": style,
+                "description": {"en": f"Synthetic {name} factor.", "zh": f"合成的 {name} 因子。"},
+            }
+            for i, (name, style) in enumerate(FACTORS, 1)
+        ],
+        "metadata": {
+            "version": "1.0",
+            "last_updated": "2025-01-01",
+            "description": "Synthetic factors taxonomy generated by benchmark.py",
+        },
+    }
+    size += _dump(root / "factors" / "factors.json", factors)
+
+    groups: Dict[str, List[Dict[str, Any]]] = {name: [] for name, _ in FACTORS}
+    measure_ids = []
+    for i in range(1, n_measures + 1):
+        factor = FACTORS[(i - 1) % len(FACTORS)][0]
+        measure_id = f"{_factor_dir(factor).upper()}_{i:05d}"
+        measure = _measure(rng, measure_id, factor, paper_ids)
+        file = f"{_factor_dir(factor)}/{measure_id}.json"
+        size += _dump(root / "measures" / file, measure)
+        groups[factor].append({
+            "measure_id": measure_id,
+            "display_name": measure["display_name"],
+            "file": file,
+            "original_paper_id": measure["original_paper_id"],
+        })
+        measure_ids.append(measure_id)
+
+    index = {
+        "version": "2.1",
+        "last_updated": "2025-01-01",
+        "description": "Synthetic measure index generated by benchmark.py",
+        "total_measures": n_measures,
+        "factors": [
+            {"factor": factor, "count": len(entries), "measures": entries}
+            for factor, entries in groups.items() if entries
+        ],
+    }
+    size += _dump(root / "measures" / "index.json", index)
+
+    # 每篇論文平均分配連結數，(paper, measure) 不重複
+    links = []
+    per_paper, extra = divmod(n_links, n_papers)
+    for i, paper_id in enumerate(paper_ids):
+        count = per_paper + (1 if i < extra else 0)
+        for measure_id in rng.sample(measure_ids, count):
+            links.append({
+                "paper_id": paper_id,
+                "measure_id": measure_id,
+                "role": rng.choice(ROLES),
+                "significance": rng.choice(SIGNIFICANCE),
+                "usage_detail": "Sorted into quintile portfolios",
+            })
+    relations = {
+        "paper_measure_links": links,
+        "metadata": {"version": "1.0", "last_updated": "2025-01-01"},
+    }
+    size += _dump(root / "relations" / "paper_measures.json", relations)
+
+    (root / "docs").mkdir(parents=True, exist_ok=True)
+    shutil.copytree(PROJECT_ROOT / "docs" / "schemas", root / "docs" / "schemas", dirs_exist_ok=True)
+    scripts_dir = root / "scripts"
+    scripts_dir.mkdir(exist_ok=True)
+    for script in (PROJECT_ROOT / "scripts").glob("*.py"):
+        shutil.copy2(script, scripts_dir / script.name)
+
+    return {
+        "papers": n_papers,
+        "measures": n_measures,
+        "links": len(links),
+        "factors": len(FACTORS),
+        "seed": seed,
+        "bytes": size,
+    }
+
+
+def write_corpus_info(root: Path, info: Dict[str, Any]) -> None:
+    _dump(root / "benchmark_corpus.json", info)
+
+
+def read_corpus_info(root: Path) -> Optional[Dict[str, Any]]:
+    path = Path(root) / "benchmark_corpus.json"
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+# ----------------------------------------------------------------------
+# 量測
+# ----------------------------------------------------------------------
+
+def summarize(samples: List[float], calls: int = 1) -> Dict[str, Any]:
+    """將多次量測（秒）整理為 min / median / max；calls > 1 時另附每次呼叫的平均耗時"""
+    result: Dict[str, Any] = {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "max": max(samples),
+        "runs": len(samples),
+    }
+    if calls > 1:
+        result["calls"] = calls
+        result["per_call"] = result["median"] / calls
+    return result
+
+
+def time_call(fn: Callable[[], Any], repeat: int, calls: int = 1) -> Dict[str, Any]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, calls)
+
+
+def time_cli(root: Path, script: str, args: Sequence[str], repeat: int) -> Dict[str, Any]:
+    """以子行程執行合成知識庫中的 script；任一次結束碼非 0 時記錄 error"""
+    command = [sys.executable, str(root / "scripts" / script), *args]
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run(command, cwd=root / "scripts", stdout=subprocess.DEVNULL,
+                              stderr=subprocess.PIPE, text=True)
+        samples.append(time.perf_counter() - start)
+        if proc.returncode != 0:
+            result = summarize(samples)
+            result["error"] = f"exit {proc.returncode}: {proc.stderr.strip()[-500:]}"
+            return result
+    return summarize(samples)
+
+
+def sample_ids(rng: random.Random, ids: Sequence[str], count: int) -> List[str]:
+    return [rng.choice(ids) for _ in range(count)] if ids else []
+
+
+def run_cli_benchmarks(root: Path, fb: FactorBase, repeat: int, jobs: int) -> Dict[str, Dict[str, Any]]:
+    measure_id = next(iter(fb.measures))
+    paper_id = next(iter(fb.papers))
+    factor = next(iter(fb.factors.values()))["factor_name"]
+
+    timings = {}
+    timings["cli.generate_papers_index.full"] = time_cli(root, "generate_papers_index.py", ["--full"], repeat)
+    timings["cli.generate_papers_index.incremental"] = time_cli(root, "generate_papers_index.py", [], repeat)
+    timings["cli.validate_json"] = time_cli(root, "validate_json.py", [], repeat)
+    if jobs != 1:
+        timings["cli.validate_json.parallel"] = time_cli(root, "validate_json.py", ["--jobs", str(jobs)], repeat)
+    timings["cli.query_factorbase.measure"] = time_cli(root, "query_factorbase.py", ["--measure", measure_id], repeat)
+    timings["cli.query_factorbase.paper"] = time_cli(root, "query_factorbase.py", ["--paper", paper_id], repeat)
+    timings["cli.query_factorbase.measure_papers"] = time_cli(
+        root, "query_factorbase.py", ["--measure-papers", measure_id], repeat)
+    timings["cli.query_factorbase.factor"] = time_cli(root, "query_factorbase.py", ["--factor", factor], repeat)
+    timings["cli.query_factors.get"] = time_cli(root, "query_factors.py", ["get", factor], repeat)
+    return timings
+
+
+def run_library_benchmarks(root: Path, repeat: int, lookups: int, seed: int) -> Dict[str, Dict[str, Any]]:
+    from generate_papers_index import generate_index, load_all_papers
+    from lazy_catalog import LazyFactorBase
+    from query_factors import FactorsQuery
+    from validation import KINDS, ValidationContext, discover_files, load_schemas, validate_document
+
+    rng = random.Random(seed)
+    timings = {}
+
+    timings["library.load_catalog"] = time_call(lambda: FactorBase(root), repeat)
+    fb = FactorBase(root)
+
+    measure_ids = sample_ids(rng, list(fb.measures), lookups)
+    paper_ids = sample_ids(rng, list(fb.papers), lookups)
+    factor_names = [f["factor_name"] for f in fb.factors.values()]
+
+    def lookup_all(fn, ids):
+        return lambda: [fn(item) for item in ids]
+
+    timings["library.get_measure"] = time_call(lookup_all(fb.get_measure, measure_ids), repeat, lookups)
+    timings["library.get_paper"] = time_call(lookup_all(fb.get_paper, paper_ids), repeat, lookups)
+    timings["library.get_paper_measures"] = time_call(lookup_all(fb.get_paper_measures, paper_ids), repeat, lookups)
+    timings["library.get_measure_papers"] = time_call(lookup_all(fb.get_measure_papers, measure_ids), repeat, lookups)
+    factor_sample = sample_ids(rng, factor_names, lookups)
+    timings["library.get_measures_by_factor"] = time_call(
+        lookup_all(fb.get_measures_by_factor, factor_sample), repeat, lookups)
+
+    # lazy 目錄: 載入（header index 已建立）與冷快取的 get_paper
+    LazyFactorBase(root)
+    timings["library.lazy.load_catalog"] = time_call(lambda: LazyFactorBase(root), repeat)
+    lazy = LazyFactorBase(root)
+
+    def lazy_cold_lookups():
+        lazy.paper_cache.clear()
+        for item in paper_ids:
+            lazy.get_paper(item)
+    timings["library.lazy.get_paper"] = time_call(lazy_cold_lookups, repeat, lookups)
+
+    factors_file = str(root / "factors" / "factors.json")
+    timings["library.factors_query.load"] = time_call(lambda: FactorsQuery(factors_file), repeat)
+    query = FactorsQuery(factors_file)
+    timings["library.factors_query.get_by_name"] = time_call(
+        lookup_all(query.get_by_name, factor_sample), repeat, lookups)
+    styles = sample_ids(rng, sorted({f["style"] for f in query.list_all()}), lookups)
+    timings["library.factors_query.filter_by_style"] = time_call(
+        lookup_all(query.filter_by_style, styles), repeat, lookups)
+
+    metadata_dir = root / "papers" / "metadata"
+    timings["library.generate_papers_index"] = time_call(
+        lambda: generate_index(load_all_papers(metadata_dir)), repeat)
+
+    schemas = load_schemas()
+    files = {kind: discover_files(kind, root) for kind in KINDS}
+
+    def validate_all():
+        ctx = ValidationContext(schemas, root)
+        invalid = [
+            result for kind in KINDS for path in files[kind]
+            if not (result := validate_document(kind, path, ctx)).valid
+        ]
+        if invalid:
+            raise ValueError(f"合成資料驗證失敗: {invalid[0].filepath}: {invalid[0].errors[:3]}")
+    timings["library.validate"] = time_call(validate_all, repeat)
+    return timings
+
+
+def git_commit() -> Optional[str]:
+    try:
+        proc = subprocess.run(["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return proc.stdout.strip() or None
+
+
+def run_benchmark(corpus: Path, n_papers: int, n_measures: int, n_links: int, seed: int = 0,
+                  repeat: int = 3, lookups: int = 1000, jobs: int = 1,
+                  only: Optional[str] = None) -> Dict[str, Any]:
+    """
+    產生（或沿用）合成知識庫並執行量測
+
+    Args:
+        corpus: 合成知識庫目錄；已含相同參數的知識庫時直接沿用
+        only: "cli" 或 "library" 時只量測該類項目
+
+    Returns:
+        可直接寫成 JSON 的結果
+    """
+    from validation import HAS_JSONSCHEMA
+
+    corpus = Path(corpus)
+    params = {"papers": n_papers, "measures": n_measures, "links": n_links, "seed": seed}
+    info = read_corpus_info(corpus)
+    if not info or info.get("params") != params:
+        if corpus.exists() and any(corpus.iterdir()) and info is None:
+            raise ValueError(f"目錄已存在且不是合成知識庫: {corpus}")
+        if info is not None:
+            shutil.rmtree(corpus)
+        start = time.perf_counter()
+        info = generate_corpus(corpus, n_papers, n_measures, n_links, seed)
+        info["params"] = params
+        info["generate_seconds"] = time.perf_counter() - start
+        write_corpus_info(corpus, info)
+
+    timings: Dict[str, Dict[str, Any]] = {}
+    if only != "cli":
+        timings.update(run_library_benchmarks(corpus, repeat, lookups, seed))
+    if only != "library":
+        timings.update(run_cli_benchmarks(corpus, FactorBase(corpus), repeat, jobs))
+
+    return {
+        "version": RESULT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "jsonschema": HAS_JSONSCHEMA,
+        "repeat": repeat,
+        "corpus": {key: info[key] for key in ("papers", "measures", "links", "factors", "seed", "bytes")},
+        "timings": timings,
+    }
+
+
+# ----------------------------------------------------------------------
+# 輸出
+# ----------------------------------------------------------------------
+
+def _format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds * 1e6:.1f}µs"
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    corpus = results["corpus"]
+    print(f"📏 合成知識庫: {corpus['papers']} papers / {corpus['measures']} measures / "
+          f"{corpus['links']} links（{corpus['bytes'] / 1e6:.1f} MB）")
+    print("=" * 50)
+    for name, timing in results["timings"].items():
+        line = f"  {name:<42} {_format_seconds(timing['median']):>9}"
+        if "per_call" in timing:
+            line += f"  ({_format_seconds(timing['per_call'])}/call)"
+        if "error" in timing:
+            line += f"  ❌ {timing['error']}"
+        print(line)
+
+
+def compare_results(base: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    比較兩次結果的 min（受干擾最少），印出比值
+
+    Returns:
+        變慢超過 threshold（例如 0.2 = 20%）的項目
+    """
+    if base.get("corpus") != current.get("corpus"):
+        print("⚠️ 兩次結果的合成知識庫規模不同，比較僅供參考")
+    print(f"\n📊 與 {(base.get('git_commit') or '?')[:10]} 比較（min，新 / 舊）")
+    print("=" * 50)
+    regressions = []
+    for name, timing in current["timings"].items():
+        old = base.get("timings", {}).get(name)
+        if not old or not old.get("min"):
+            continue
+        ratio = timing["min"] / old["min"]
+        mark = ""
+        if ratio > 1 + threshold:
+            mark = "  ⚠️ 變慢"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            mark = "  ✅ 變快"
+        print(f"  {name:<42} {_format_seconds(old['min']):>9} → {_format_seconds(timing['min']):>9}"
+              f"  x{ratio:.2f}{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="FactorBase 效能量測",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+範例:
+  python benchmark.py --papers 10000 --measures 2000 --links 100000 --json bench.json
+  python benchmark.py --json new.json --compare bench.json
+  python benchmark.py --corpus /tmp/corpus --only cli
+        """
+    )
+
+    parser.add_argument("--papers", type=int, default=1000, help="論文數（預設 1000）")
+    parser.add_argument("--measures", type=int, default=200, help="Measure 數（預設 200）")
+    parser.add_argument("--links", type=int, default=10000, help="paper-measure 連結數（預設 10000）")
+    parser.add_argument("--seed", type=int, default=0, help="亂數種子（預設 0）")
+    parser.add_argument("--corpus", type=Path, help="合成知識庫目錄（預設使用暫存目錄，結束後刪除）")
+    parser.add_argument("--repeat", "-r", type=int, default=3, help="每個項目的量測次數（預設 3）")
+    parser.add_argument("--lookups", type=int, default=1000, help="in-process 查詢項目每輪的呼叫次數（預設 1000）")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="另以 validate_json.py --jobs N 量測平行驗證（預設 1 = 不量測）")
+    parser.add_argument("--only", choices=["cli", "library"], help="只量測指定類別")
+    parser.add_argument("--json", type=Path, help="將結果寫入 JSON 檔")
+    parser.add_argument("--compare", type=Path, help="與先前 --json 寫出的結果比較")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="--compare 時視為變慢的比例（預設 0.2 = 20%%）")
+
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+    if args.repeat < 1:
+        parser.error("--repeat 必須至少為 1")
+
+    base = None
+    if args.compare:
+        try:
+            base = json.loads(args.compare.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"❌ 無法讀取比較基準 {args.compare}: {e}")
+            return 1
+
+    with tempfile.TemporaryDirectory(prefix="factorbase_bench_") as tmp:
+        corpus = args.corpus or Path(tmp) / "corpus"
+        try:
+            results = run_benchmark(corpus, args.papers, args.measures, args.links, args.seed,
+                                    args.repeat, args.lookups, args.jobs, args.only)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+
+    print_results(results)
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(results, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"\n✅ 結果已寫入: {args.json}")
+
+    failed = [name for name, timing in results["timings"].items() if "error" in timing]
+    if base is not None:
+        regressions = compare_results(base, results, args.threshold)
+        if regressions:
+            print(f"\n⚠️ {len(regressions)} 個項目變慢超過 {args.threshold:.0%}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
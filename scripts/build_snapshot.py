@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+FactorBase Snapshot Builder
+===========================
+將整個知識庫編譯為單一 snapshot 檔，供冷啟動快速載入。
+
+使用方式:
+    python build_snapshot.py                  # 增量更新 .factorbase/snapshot.pkl
+    python build_snapshot.py --full           # 完整重新編譯
+    python build_snapshot.py --output x.pkl   # 指定輸出位置
+    python build_snapshot.py --check          # 只檢查 snapshot 是否過期
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import instrumentation
+from factorbase import PROJECT_ROOT
+from snapshot import DEFAULT_SNAPSHOT_PATH, refresh_snapshot, read_header, is_stale
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="FactorBase snapshot 編譯工具",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument("--output", "-o", type=Path, default=DEFAULT_SNAPSHOT_PATH,
+                        help=f"輸出位置（預設: {DEFAULT_SNAPSHOT_PATH.relative_to(PROJECT_ROOT)}）")
+    parser.add_argument("--full", action="store_true", help="忽略 manifest，完整重新編譯")
+    parser.add_argument("--check", action="store_true", help="只檢查 snapshot 是否過期（過期時 exit code 1）")
+
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    if args.check:
+        header = read_header(args.output)
+        if header is None:
+            print(f"❌ snapshot 不存在或版本不符: {args.output}")
+            return 1
+        if is_stale(header):
+            print(f"⚠️ snapshot 已過期: {args.output}")
+            return 1
+        print(f"✅ snapshot 為最新狀態 (sha256: {header['content_hash'][:12]})")
+        return 0
+
+    changes = refresh_snapshot(output=args.output, force=args.full)
+    header = read_header(args.output)
+    if changes:
+        print(f"✅ snapshot 已更新 ({changes.summary()}): {args.output}")
+    else:
+        print(f"✅ snapshot 無需更新: {args.output}")
+    print(f"   來源檔案: {len(header['sources'])}")
+    print(f"   sha256: {header['content_hash']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+FactorBase Catalog Query
+========================
+FactorBase 目錄的宣告式篩選 / 投影查詢。
+
+語法:
+    <collection> [where <條件> [and <條件> ...]]
+                 [select <欄位>, ...] [order by <欄位> [asc|desc]] [limit <n>]
+
+    collection   papers | measures | links | factors
+    條件         <欄位> = != < <= > >= <值>
+                 <欄位> ~ <值>              （包含，不分大小寫）
+                 <欄位> in (<值>, ...)
+                 <欄位> is [not] null
+    欄位         可用點號存取巢狀欄位（formula.type）
+    值           數字、單字或以引號包住的字串；字串比較不分大小寫
+
+執行時 planner 先以 secondary index 處理可索引的 = / in / is null 條件並取交集，
+其餘條件只在候選資料上逐筆過濾；沒有可索引條件時才全表掃描。
+
+使用方式:
+    from catalog_query import query
+
+    query("measures where factor=Value and formula.type=ratio "
+          "and original_paper_id is not null select measure_id,display_name")
+    query("links where role=primary_sorting_variable and significance=positive select paper_id,measure_id")
+"""
+
+import math
+import re
+import threading
+from typing import Optional, List, Dict, Any, Mapping, Tuple, Set
+
+import instrumentation
+from factorbase import FactorBase, get_catalog
+
+
+# 各 collection 建立 secondary index 的欄位
+INDEXED_FIELDS = {
+    "papers": ["market", "asset_class", "year", "conclusion_sign"],
+    "measures": ["factor", "formula.type", "normalization", "original_paper_id"],
+    "links": ["paper_id", "measure_id", "role", "significance"],
+    "factors": ["style"],
+}
+
+KEYWORDS = {"where", "and", "select", "order", "by", "asc", "desc", "limit", "is", "not", "null", "in"}
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<string>'[^']*'|"[^"]*")
+      | (?P<op>!=|<=|>=|=|<|>|~)
+      | (?P<punct>[(),*])
+      | (?P<word>[^\s=!<>~(),'"*]+)
+    )""", re.VERBOSE)
+
+
+class QuerySyntaxError(ValueError):
+    """查詢語法錯誤"""
+
+
+class Condition:
+    """單一條件: field op value"""
+
+    def __init__(self, field: str, op: str, value: Any = None):
+        self.field = field
+        self.op = op
+        self.value = value
+
+    def __repr__(self) -> str:
+        if self.op in ("is null", "is not null"):
+            return f"{self.field} {self.op}"
+        return f"{self.field} {self.op} {self.value!r}"
+
+    def test(self, record: Dict[str, Any]) -> bool:
+        actual = get_field(record, self.field)
+        if self.op == "is null":
+            return actual is None
+        if self.op == "is not null":
+            return actual is not None
+        if actual is None:
+            return False
+        if isinstance(actual, list):
+            # 列表欄位（aliases）: 任一元素符合即可
+            return any(self._compare(item) for item in actual)
+        return self._compare(actual)
+
+    def _compare(self, actual: Any) -> bool:
+        if self.op == "in":
+            return _key(actual) in {_key(v) for v in self.value}
+        if self.op == "~":
+            return str(self.value).lower() in str(actual).lower()
+
+        left, right = _key(actual), _key(self.value)
+        try:
+            if self.op == "=":
+                return left == right
+            if self.op == "!=":
+                return left != right
+            if self.op == "<":
+                return left < right
+            if self.op == "<=":
+                return left <= right
+            if self.op == ">":
+                return left > right
+            if self.op == ">=":
+                return left >= right
+        except TypeError:
+            return False
+        return False
+
+
+class Query:
+    """解析後的查詢"""
+
+    def __init__(self, collection: str, conditions: List[Condition],
+                 fields: Optional[List[str]] = None, order_by: Optional[str] = None,
+                 descending: bool = False, limit: Optional[int] = None):
+        self.collection = collection
+        self.conditions = conditions
+        self.fields = fields
+        self.order_by = order_by
+        self.descending = descending
+        self.limit = limit
+
+
+def get_field(record: Dict[str, Any], path: str) -> Any:
+    """以點號路徑取得巢狀欄位值（formula.type）"""
+    value: Any = record
+    for part in path.split("."):
+        if not isinstance(value, Mapping):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _key(value: Any) -> Any:
+    """比較與索引用的鍵值（字串不分大小寫）"""
+    return value.lower() if isinstance(value, str) else value
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    """order by 的排序鍵: 依型別分組（數值 < 字串 < 其他），混合型別的欄位亦可排序"""
+    if isinstance(value, (int, float)):
+        return 0, value
+    if isinstance(value, str):
+        return 1, value.lower()
+    return 2, str(value)
+
+
+def _literal(token: Tuple[str, str]) -> Any:
+    kind, text = token
+    if kind == "string":
+        return text[1:-1]
+    for cast in (int, float):
+        try:
+            number = cast(text)
+        except ValueError:
+            continue
+        # nan / inf 不會與任何值相等，保留為字串
+        return number if math.isfinite(number) else text
+    if text.lower() in ("true", "false"):
+        return text.lower() == "true"
+    return text
+
+
+def tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise QuerySyntaxError(f"無法解析的字元: {text[pos:]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "word" and value.lower() in KEYWORDS:
+            kind, value = "keyword", value.lower()
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+
+def parse(text: str) -> Query:
+    """將查詢字串解析為 Query"""
+    tokens = tokenize(text)
+    pos = 0
+
+    def peek() -> Optional[Tuple[str, str]]:
+        return tokens[pos] if pos < len(tokens) else None
+
+    def take(kind: Optional[str] = None, value: Optional[str] = None) -> Tuple[str, str]:
+        nonlocal pos
+        token = peek()
+        if token is None:
+            raise QuerySyntaxError("查詢不完整")
+        if (kind and token[0] != kind) or (value and token[1] != value):
+            expected = value or kind
+            raise QuerySyntaxError(f"預期 {expected}，但得到 {token[1]!r}")
+        pos += 1
+        return token
+
+    def in_value() -> Any:
+        """in 列表中的值（單字、數字或字串）"""
+        token = peek()
+        if token is None or token[0] not in ("word", "string"):
+            raise QuerySyntaxError("in 之後需要至少一個值（以逗號分隔，不可為空或以逗號結尾）")
+        return _literal(take())
+
+    def at(value: str) -> bool:
+        token = peek()
+        return token is not None and token[0] == "keyword" and token[1] == value
+
+    collection = take("word")[1].lower()
+    if collection not in INDEXED_FIELDS:
+        raise QuerySyntaxError(f"未知的 collection: {collection}（可用: {', '.join(INDEXED_FIELDS)}）")
+
+    conditions = []
+    if at("where"):
+        take()
+        while True:
+            field = take("word")[1]
+            if at("is"):
+                take()
+                negate = at("not")
+                if negate:
+                    take()
+                take("keyword", "null")
+                conditions.append(Condition(field, "is not null" if negate else "is null"))
+            elif at("in"):
+                take()
+                take("punct", "(")
+                values = [in_value()]
+                while peek() == ("punct", ","):
+                    take()
+                    values.append(in_value())
+                take("punct", ")")
+                conditions.append(Condition(field, "in", values))
+            else:
+                op = take("op")[1]
+                token = peek()
+                if token is None or token[0] not in ("word", "string"):
+                    raise QuerySyntaxError(f"{field} {op} 之後缺少值")
+                conditions.append(Condition(field, op, _literal(take())))
+            if not at("and"):
+                break
+            take()
+
+    fields = None
+    if at("select"):
+        take()
+        if peek() == ("punct", "*"):
+            take()
+        else:
+            fields = [take("word")[1]]
+            while peek() == ("punct", ","):
+                take()
+                fields.append(take("word")[1])
+
+    order_by, descending = None, False
+    if at("order"):
+        take()
+        take("keyword", "by")
+        order_by = take("word")[1]
+        if at("asc") or at("desc"):
+            descending = take()[1] == "desc"
+
+    limit = None
+    if at("limit"):
+        take()
+        value = _literal(take())
+        if not isinstance(value, int) or value < 0:
+            raise QuerySyntaxError(f"limit 必須為非負整數: {value!r}")
+        limit = value
+
+    if peek() is not None:
+        raise QuerySyntaxError(f"多餘的內容: {peek()[1]!r}")
+    return Query(collection, conditions, fields, order_by, descending, limit)
+
+
+class QueryEngine:
+    """
+    以 secondary index 執行查詢
+
+    records     collection → 資料列表
+    indexes     collection → {欄位: {鍵值: 資料列編號集合}}
+    """
+
+    @instrumentation.timed("index.query_engine")
+    def __init__(self, fb: FactorBase):
+        self.records: Dict[str, List[Dict[str, Any]]] = {
+            "papers": list(fb.papers.values()),
+            "measures": list(fb.measures.values()),
+            "links": list(fb.links),
+            "factors": list(fb.factors.values()),
+        }
+        self.indexes: Dict[str, Dict[str, Dict[Any, Set[int]]]] = {}
+        for collection, fields in INDEXED_FIELDS.items():
+            indexes = self.indexes[collection] = {}
+            for field in fields:
+                index = indexes[field] = {}
+                for row, record in enumerate(self.records[collection]):
+                    index.setdefault(_key(get_field(record, field)), set()).add(row)
+
+    def plan(self, query: Query) -> Tuple[List[Condition], List[Condition]]:
+        """將條件分為可索引（= / in / is null）與需逐筆過濾兩類"""
+        indexes = self.indexes[query.collection]
+        indexed, residual = [], []
+        for condition in query.conditions:
+            if condition.field in indexes and condition.op in ("=", "in", "is null"):
+                indexed.append(condition)
+            else:
+                residual.append(condition)
+        return indexed, residual
+
+    def explain(self, query: Query) -> Dict[str, Any]:
+        """回傳查詢計畫"""
+        indexed, residual = self.plan(query)
+        return {
+            "collection": query.collection,
+            "index_lookups": [repr(c) for c in indexed],
+            "filters": [repr(c) for c in residual],
+            "scan": not indexed,
+        }
+
+    def _lookup(self, collection: str, condition: Condition) -> Set[int]:
+        index = self.indexes[collection][condition.field]
+        if condition.op == "in":
+            values = condition.value
+        elif condition.op == "is null":
+            values = [None]
+        else:
+            values = [condition.value]
+        rows: Set[int] = set()
+        for value in values:
+            rows |= index.get(_key(value), set())
+        return rows
+
+    def execute(self, query: Query) -> List[Dict[str, Any]]:
+        """執行查詢，回傳投影後的資料"""
+        records = self.records[query.collection]
+        indexed, residual = self.plan(query)
+
+        if indexed:
+            candidate_sets = sorted((self._lookup(query.collection, c) for c in indexed), key=len)
+            rows = set.intersection(*candidate_sets)
+            candidates = [records[row] for row in sorted(rows)]
+        else:
+            candidates = records
+
+        # 候選資料維持目錄原始順序
+        results = [r for r in candidates if all(c.test(r) for c in residual)]
+
+        if query.order_by:
+            # 缺少排序欄位的資料排在最後
+            present = [r for r in results if get_field(r, query.order_by) is not None]
+            missing = [r for r in results if get_field(r, query.order_by) is None]
+            present.sort(key=lambda r: _sort_key(get_field(r, query.order_by)), reverse=query.descending)
+            results = present + missing
+        if query.limit is not None:
+            results = results[:query.limit]
+        if query.fields:
+            results = [{f: get_field(r, f) for f in query.fields} for r in results]
+        return results
+
+
+_engine: Optional[QueryEngine] = None
+_engine_catalog: Optional[FactorBase] = None
+_engine_lock = threading.Lock()
+
+
+def get_query_engine() -> QueryEngine:
+    """取得 process 共用的查詢引擎（目錄重新載入時一併重建索引）"""
+    global _engine, _engine_catalog
+    with _engine_lock:
+        fb = get_catalog()
+        if _engine is None or _engine_catalog is not fb:
+            _engine = QueryEngine(fb)
+            _engine_catalog = fb
+        return _engine
+
+
+def query(text: str) -> List[Dict[str, Any]]:
+    """解析並執行查詢字串"""
+    return get_query_engine().execute(parse(text))
+
+
+def explain(text: str) -> Dict[str, Any]:
+    """解析查詢字串並回傳查詢計畫"""
+    return get_query_engine().explain(parse(text))
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+FactorBase Columnar Export
+==========================
+將知識庫匯出為具型別的欄式資料表（Parquet / Arrow IPC），
+分析端可直接與大型因子報酬 panel join，不必再解析巢狀 JSON。
+
+資料表:
+    papers      每篇論文一列
+    factors     每個因子一列（description.en / .zh 攤平為 description_en / description_zh）
+    measures    每個 Measure 一列（formula.* 攤平為 formula_type、formula_window ...）
+    links       paper_measure_links，每筆關聯一列
+
+market、factor、role、significance 等 enum 欄位以 dictionary encoding 儲存。
+Arrow IPC 檔（.arrow）未壓縮，load_arrow() 以 memory map 讀取，欄位資料不需複製；
+Parquet 檔體積較小，適合交給其他工具（pandas、DuckDB、Spark）使用。
+
+catalog_tables() 只產生 {欄位名稱: 值列表}，不需要 pyarrow；
+寫檔與讀取需要 pyarrow（pip install pyarrow）。
+
+使用方式:
+    from columnar import export_catalog, load_arrow
+
+    export_catalog()                              # → .factorbase/columnar/*.arrow, *.parquet
+    tables = load_arrow()                         # {"papers": pyarrow.Table, ...}
+    measures = tables["measures"].to_pandas()
+"""
+
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+from factorbase import PROJECT_ROOT, FactorBase, get_catalog
+
+
+# 預設輸出位置（已列入 .gitignore）
+DEFAULT_COLUMNAR_DIR = PROJECT_ROOT / ".factorbase" / "columnar"
+
+FORMATS = ("arrow", "parquet")
+
+# 欄位型別: string、int32、category（dictionary encoded）、list（list<string>）
+PAPER_COLUMNS: List[Tuple[str, str]] = [
+    ("paper_id", "string"),
+    ("title", "string"),
+    ("authors", "string"),
+    ("year", "int32"),
+    ("journal", "string"),
+    ("volume", "string"),
+    ("issue", "string"),
+    ("pages", "string"),
+    ("doi", "string"),
+    ("arxiv_id", "string"),
+    ("ssrn_id", "string"),
+    ("bibtex", "string"),
+    ("market", "category"),
+    ("asset_class", "category"),
+    ("abstract", "string"),
+    ("conclusion_sign", "category"),
+    ("replicable", "category"),
+    ("notes", "string"),
+]
+
+FACTOR_COLUMNS: List[Tuple[str, str]] = [
+    ("factor_id", "int32"),
+    ("factor_name", "string"),
+    ("style", "category"),
+    ("description_en", "string"),
+    ("description_zh", "string"),
+]
+
+MEASURE_COLUMNS: List[Tuple[str, str]] = [
+    ("measure_id", "string"),
+    ("measure_name", "string"),
+    ("display_name", "string"),
+    ("factor", "category"),
+    ("description", "string"),
+    ("normalization", "category"),
+    ("original_paper_id", "string"),
+    ("aliases", "list"),
+    ("notes", "string"),
+]
+
+LINK_COLUMNS: List[Tuple[str, str]] = [
+    ("paper_id", "string"),
+    ("measure_id", "string"),
+    ("role", "category"),
+    ("significance", "category"),
+    ("usage_detail", "string"),
+    ("notes", "string"),
+]
+
+# formula 欄位依 measure_schema 的順序排列，資料中其他欄位（calculation、metric ...）接在後面
+FORMULA_FIELDS = ("type", "numerator", "denominator", "window", "lag", "components", "notes")
+CATEGORICAL_FORMULA_FIELDS = {"type", "window", "lag", "metric"}
+
+
+def _require_pyarrow() -> None:
+    if not HAS_PYARROW:
+        raise ImportError("columnar 需要 pyarrow（pip install pyarrow）")
+
+
+def formula_columns(measures: Iterable[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """攤平後的 formula 欄位: formula.type → formula_type"""
+    measures = list(measures)
+    seen = {key for m in measures for key in (m.get("formula") or {})}
+    keys = [key for key in FORMULA_FIELDS if key in seen] + sorted(seen - set(FORMULA_FIELDS))
+
+    columns = []
+    for key in keys:
+        is_list = any(isinstance((m.get("formula") or {}).get(key), list) for m in measures)
+        kind = "list" if is_list else "category" if key in CATEGORICAL_FORMULA_FIELDS else "string"
+        columns.append((f"formula_{key}", kind))
+    return columns
+
+
+def _rows_to_columns(rows: Iterable[Dict[str, Any]], columns: List[Tuple[str, str]]) -> Dict[str, List[Any]]:
+    data: Dict[str, List[Any]] = {name: [] for name, _ in columns}
+    for row in rows:
+        for name, _ in columns:
+            data[name].append(row.get(name))
+    return data
+
+
+def _measure_row(measure: Dict[str, Any]) -> Dict[str, Any]:
+    row = dict(measure)
+    for key, value in (measure.get("formula") or {}).items():
+        row[f"formula_{key}"] = value
+    return row
+
+
+def _factor_row(factor: Dict[str, Any]) -> Dict[str, Any]:
+    row = dict(factor)
+    description = factor.get("description") or {}
+    row["description_en"] = description.get("en")
+    row["description_zh"] = description.get("zh")
+    return row
+
+
+def catalog_schema(fb: FactorBase) -> Dict[str, List[Tuple[str, str]]]:
+    """各資料表的 (欄位名稱, 型別) 列表"""
+    return {
+        "papers": PAPER_COLUMNS,
+        "factors": FACTOR_COLUMNS,
+        "measures": MEASURE_COLUMNS + formula_columns(fb.measures.values()),
+        "links": LINK_COLUMNS,
+    }
+
+
+def catalog_tables(fb: Optional[FactorBase] = None) -> Dict[str, Dict[str, List[Any]]]:
+    """
+    將知識庫轉換為欄式資料（不需要 pyarrow）
+
+    Returns:
+        資料表名稱 → {欄位名稱: 值列表}
+    """
+    fb = fb or get_catalog()
+    schema = catalog_schema(fb)
+    return {
+        "papers": _rows_to_columns(fb.papers.values(), schema["papers"]),
+        "factors": _rows_to_columns((_factor_row(f) for f in fb.factors.values()), schema["factors"]),
+        "measures": _rows_to_columns((_measure_row(m) for m in fb.measures.values()), schema["measures"]),
+        "links": _rows_to_columns(fb.links, schema["links"]),
+    }
+
+
+def _arrow_type(kind: str):
+    if kind == "int32":
+        return pa.int32()
+    if kind == "category":
+        return pa.dictionary(pa.int16(), pa.string())
+    if kind == "list":
+        return pa.list_(pa.string())
+    return pa.string()
+
+
+def to_arrow(fb: Optional[FactorBase] = None) -> Dict[str, "pa.Table"]:
+    """將知識庫轉換為 pyarrow.Table（enum 欄位為 dictionary encoded）"""
+    _require_pyarrow()
+    fb = fb or get_catalog()
+    schema = catalog_schema(fb)
+    tables = {}
+    for name, data in catalog_tables(fb).items():
+        fields = [pa.field(column, _arrow_type(kind)) for column, kind in schema[name]]
+        arrays = [pa.array(data[field.name], type=field.type) for field in fields]
+        tables[name] = pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+    return tables
+
+
+def _write_atomic(path: Path, write) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    write(tmp)
+    tmp.replace(path)
+
+
+def export_catalog(output_dir: Optional[Path] = None, formats: Iterable[str] = FORMATS,
+                   fb: Optional[FactorBase] = None) -> List[Path]:
+    """
+    匯出所有資料表
+
+    Args:
+        output_dir: 輸出目錄（預設 .factorbase/columnar）
+        formats: "arrow"（IPC，可 memory map）與 / 或 "parquet"
+
+    Returns:
+        寫入的檔案路徑
+    """
+    _require_pyarrow()
+    formats = list(formats)
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown:
+        raise ValueError(f"不支援的格式: {', '.join(unknown)}（可用: {', '.join(FORMATS)}）")
+
+    output_dir = Path(output_dir) if output_dir else DEFAULT_COLUMNAR_DIR
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    written = []
+    for name, table in to_arrow(fb).items():
+        if "arrow" in formats:
+            path = output_dir / f"{name}.arrow"
+
+            def write_ipc(tmp, table=table):
+                with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            _write_atomic(path, write_ipc)
+            written.append(path)
+        if "parquet" in formats:
+            path = output_dir / f"{name}.parquet"
+            _write_atomic(path, lambda tmp, table=table: pq.write_table(table, str(tmp), use_dictionary=True))
+            written.append(path)
+    return written
+
+
+def load_arrow(input_dir: Optional[Path] = None, names: Optional[Iterable[str]] = None) -> Dict[str, "pa.Table"]:
+    """
+    以 memory map 讀取 Arrow IPC 資料表（zero-copy，欄位資料直接指向檔案頁面）
+
+    Args:
+        names: 要讀取的資料表（預設全部）
+    """
+    _require_pyarrow()
+    input_dir = Path(input_dir) if input_dir else DEFAULT_COLUMNAR_DIR
+    tables = {}
+    for name in names or ("papers", "factors", "measures", "links"):
+        source = pa.memory_map(str(input_dir / f"{name}.arrow"), "r")
+        tables[name] = pa.ipc.open_file(source).read_all()
+    return tables
+
+
+def load_parquet(input_dir: Optional[Path] = None, names: Optional[Iterable[str]] = None) -> Dict[str, "pa.Table"]:
+    """讀取 Parquet 資料表（enum 欄位維持 dictionary encoding）"""
+    _require_pyarrow()
+    input_dir = Path(input_dir) if input_dir else DEFAULT_COLUMNAR_DIR
+    return {
+        name: pq.read_table(str(input_dir / f"{name}.parquet"), memory_map=True)
+        for name in names or ("papers", "factors", "measures", "links")
+    }
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+FactorBase Columnar Exporter
+============================
+將知識庫匯出為 Arrow IPC / Parquet 資料表，供分析端直接 join。
+
+使用方式:
+    python export_catalog.py                          # 匯出至 .factorbase/columnar/
+    python export_catalog.py --format parquet         # 只輸出 Parquet
+    python export_catalog.py --output /data/factorbase
+    python export_catalog.py --schema                 # 只列出欄位與型別（不需要 pyarrow）
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import instrumentation
+from factorbase import PROJECT_ROOT, get_catalog
+from columnar import DEFAULT_COLUMNAR_DIR, FORMATS, HAS_PYARROW, catalog_schema, catalog_tables, export_catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="FactorBase 欄式資料匯出工具",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument("--output", "-o", type=Path, default=DEFAULT_COLUMNAR_DIR,
+                        help=f"輸出目錄（預設: {DEFAULT_COLUMNAR_DIR.relative_to(PROJECT_ROOT)}）")
+    parser.add_argument("--format", "-f", action="append", choices=FORMATS, dest="formats",
+                        help="輸出格式，可重複指定（預設: arrow 與 parquet）")
+    parser.add_argument("--schema", action="store_true", help="只列出各資料表的欄位與型別")
+
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    fb = get_catalog()
+
+    if args.schema:
+        tables = catalog_tables(fb)
+        for name, columns in catalog_schema(fb).items():
+            rows = len(next(iter(tables[name].values()), []))
+            print(f"\n📋 {name} ({rows} 列)")
+            print("=" * 50)
+            for column, kind in columns:
+                print(f"  {column:<24} {kind}")
+        return 0
+
+    if not HAS_PYARROW:
+        print("❌ 匯出需要 pyarrow（pip install pyarrow）")
+        return 1
+
+    written = export_catalog(args.output, args.formats or FORMATS, fb)
+    print(f"✅ 已匯出 {len(written)} 個檔案: {args.output}")
+    for path in written:
+        print(f"   {path.name:<20} {path.stat().st_size:>10,} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
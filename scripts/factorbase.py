@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+FactorBase Catalog
+==================
+FactorBase 概念層的共用記憶體目錄（catalog）。
+
+每個 process 只需載入一次 papers、factors、measures 與
+relations/paper_measures.json，之後所有查詢皆透過 O(1) 字典完成，
+避免每次呼叫都重新開檔、解析 measures/index.json。
+
+使用方式:
+    from factorbase import get_catalog
+
+    fb = get_catalog()
+    fb.get_measure("BM")
+    fb.get_measure("B/M")            # alias 亦可
+    fb.get_measure("book to market") # 忽略大小寫與標點
+    fb.suggest_measures("MOM_21M")   # 「您是不是要找」建議
+    fb.get_measures_by_factor("Value")
+    fb.get_many(["BM", "EP_TTM", "MOM_12M"])   # 批次查詢
+    for paper in fb.iter_papers(): ...         # 串流列表（亦有 iter_measures / iter_factors）
+    fb.get_paper_measures("paper_001")
+    fb.get_measure_papers("BM")      # 反向查詢: 哪些論文使用 BM
+    fb.graph.co_used_measures("MOM_12M")
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Mapping, Tuple
+
+import instrumentation
+from graph import RelationGraph
+from records import Factor, Measure, Paper, PaperMeasureLink
+from resolver import MeasureResolver
+
+# 專案根目錄
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def load_json(filepath: Path) -> Optional[Dict[str, Any]]:
+    """載入 JSON 檔案"""
+    try:
+        with instrumentation.timer("io.read"), open(filepath, 'r', encoding='utf-8') as f:
+            text = f.read()
+        instrumentation.count("io.files")
+        instrumentation.count("io.bytes", len(text))
+        with instrumentation.timer("json.decode"):
+            return json.loads(text)
+    except FileNotFoundError:
+        print(f"❌ 檔案不存在: {filepath}")
+        return None
+    except json.JSONDecodeError as e:
+        print(f"❌ JSON 解析錯誤: {filepath} - {e}")
+        return None
+
+
+@instrumentation.timed("catalog.read")
+def read_sources(root: Path = PROJECT_ROOT) -> Dict[str, Any]:
+    """
+    從 JSON 檔案樹讀取全部原始文件
+
+    回傳的 dict 即為 FactorBase 的輸入，也是 snapshot 的內容:
+        papers          paper_*.json 內容（依檔名排序）
+        factors         factors/factors.json
+        measure_index   measures/index.json
+        measures        index 中的 file 路徑 → Measure JSON
+        relations       relations/paper_measures.json
+    """
+    root = Path(root)
+    papers_dir = root / "papers" / "metadata"
+    factors_path = root / "factors" / "factors.json"
+    relations_path = root / "relations" / "paper_measures.json"
+
+    with instrumentation.timer("fs.glob"):
+        paper_files = sorted(papers_dir.glob("paper_*.json"))
+
+    papers = []
+    for paper_file in paper_files:
+        paper = load_json(paper_file)
+        if paper:
+            papers.append(paper)
+
+    measure_index = load_json(root / "measures" / "index.json") or {}
+    measures = {}
+    for factor_group in measure_index.get("factors", []):
+        for entry in factor_group.get("measures", []):
+            measure = load_json(root / "measures" / entry.get("file"))
+            if measure:
+                measures[entry.get("file")] = measure
+
+    return {
+        "papers": papers,
+        "factors": load_json(factors_path) if factors_path.exists() else None,
+        "measure_index": measure_index,
+        "measures": measures,
+        "relations": load_json(relations_path) if relations_path.exists() else None,
+    }
+
+
+class FactorBase:
+    """
+    FactorBase 概念層目錄
+
+    載入後提供以下 O(1) 索引:
+        measures        measure_id → Measure 完整定義
+        papers          paper_id → Paper metadata
+        factors         因子名稱（小寫）→ factors.json 中的因子定義
+        resolver        measure_id / alias / display_name 解析與模糊比對索引（見 resolver.py）
+        graph           paper / measure / factor 關係圖（見 graph.py）
+
+    資料皆為 records.py 的精簡紀錄（Paper、Measure、Factor、PaperMeasureLink），
+    與原本的 dict 相同可用 []、get() 存取。
+
+    paper_headers / measure_headers 為列表與名稱解析使用的標頭；
+    本類別中即為 papers / measures 本身，LazyFactorBase（見 lazy_catalog.py）
+    只保留標頭，完整文件於存取時才載入。
+    """
+
+    def __init__(self, root: Path = PROJECT_ROOT, sources: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            root: 專案根目錄
+            sources: read_sources() 格式的原始文件；None 時從 JSON 檔案樹讀取
+        """
+        self.root = Path(root)
+
+        self.papers: Mapping[str, Paper] = {}
+        self.factors: Dict[str, Factor] = {}
+        self.measures: Mapping[str, Measure] = {}
+        self.paper_headers: Mapping[str, Paper] = self.papers
+        self.measure_headers: Mapping[str, Measure] = self.measures
+        self.resolver = MeasureResolver({})
+        self.links: List[PaperMeasureLink] = []
+
+        # measures/index.json 中的因子分組（保留原始順序）
+        self.factor_groups: List[Dict[str, Any]] = []
+        self.measure_entries: Dict[str, Dict[str, Any]] = {}
+
+        self._factor_measures: Dict[str, List[str]] = {}
+        self.graph = RelationGraph([], {}, {})
+
+        self.load(sources)
+
+    # ------------------------------------------------------------------
+    # 載入
+    # ------------------------------------------------------------------
+
+    def load(self, sources: Optional[Dict[str, Any]] = None) -> None:
+        """載入全部資料並建立索引"""
+        if sources is None:
+            sources = read_sources(self.root)
+        with instrumentation.timer("catalog.load"):
+            self._load_papers(sources["papers"])
+            self._load_factors(sources["factors"])
+            self._load_measures(sources["measure_index"], sources["measures"])
+            self._load_relations(sources["relations"])
+
+    def _load_papers(self, papers: List[Dict[str, Any]]) -> None:
+        self.papers = {}
+        for paper in papers:
+            if paper.get("paper_id"):
+                self.papers[paper["paper_id"]] = Paper.from_dict(paper)
+        self.paper_headers = self.papers
+
+    def _load_factors(self, data: Optional[Dict[str, Any]]) -> None:
+        self.factors = {}
+        for factor in (data or {}).get("factors", []):
+            self.factors[factor["factor_name"].lower()] = Factor.from_dict(factor)
+
+    def _load_measures(self, index: Dict[str, Any], measure_files: Dict[str, Dict[str, Any]]) -> None:
+        self.factor_groups = index.get("factors", [])
+        self.measures = {}
+        self.measure_entries = {}
+        self._factor_measures = {}
+
+        for factor_group in self.factor_groups:
+            factor_key = factor_group.get("factor", "").lower()
+            measure_ids = self._factor_measures.setdefault(factor_key, [])
+            for entry in factor_group.get("measures", []):
+                measure_id = entry.get("measure_id")
+                measure = measure_files.get(entry.get("file"))
+                if not measure:
+                    continue
+                self.measure_entries[measure_id] = entry
+                self.measures[measure_id] = Measure.from_dict(measure)
+                measure_ids.append(measure_id)
+
+        self.measure_headers = self.measures
+        self._build_resolver()
+
+    def _build_resolver(self) -> None:
+        self.resolver = MeasureResolver(self.measure_headers)
+
+    def _load_relations(self, relations: Optional[Dict[str, Any]]) -> None:
+        self.links = [PaperMeasureLink.from_dict(link)
+                      for link in (relations or {}).get("paper_measure_links", [])]
+        measure_factor = {
+            entry.get("measure_id"): factor_group.get("factor")
+            for factor_group in self.factor_groups
+            for entry in factor_group.get("measures", [])
+        }
+        self.graph = RelationGraph(self.links, self._factor_measures, measure_factor,
+                                   resolve=self.resolve_measure_id)
+
+    # ------------------------------------------------------------------
+    # 查詢
+    # ------------------------------------------------------------------
+
+    def resolve_measure_id(self, name: str) -> Optional[str]:
+        """將 measure_id、alias、display_name 或其正規化形式轉換為 measure_id"""
+        return self.resolver.resolve(name)
+
+    def suggest_measures(self, name: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """無法解析的名稱的相似 Measure 建議（依相似度排序）"""
+        return self.resolver.suggest(name, limit)
+
+    def get_measure(self, measure_id: str) -> Optional[Dict[str, Any]]:
+        """根據 measure_id（或 alias、display_name）查詢 Measure 定義"""
+        resolved = self.resolver.resolve(measure_id)
+        return self.measures.get(resolved) if resolved else None
+
+    def get_paper(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        """根據 paper_id 查詢論文資訊"""
+        return self.papers.get(paper_id)
+
+    def get_factor(self, factor: str) -> Optional[Dict[str, Any]]:
+        """根據因子名稱查詢 factors.json 中的定義（不分大小寫）"""
+        return self.factors.get(factor.lower())
+
+    def get_measures_by_factor(self, factor: str) -> List[Dict[str, Any]]:
+        """根據因子類別取得所有 Measures（不分大小寫）"""
+        measure_ids = self._factor_measures.get(factor.lower(), [])
+        return [self.measures[m] for m in measure_ids]
+
+    def iter_many(self, ids: Iterable[str], kind: str = "measure") -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """
+        批次查詢的串流版本，依輸入順序逐筆產生 (id, 查詢結果)
+
+        重複的 id 只產生一次；找不到時結果為 None。
+        """
+        lookup = self._LOOKUPS.get(kind)
+        if lookup is None:
+            raise ValueError(f"不支援的查詢類型: {kind}（可用: {', '.join(self._LOOKUPS)}）")
+        seen = set()
+        for item in ids:
+            if item not in seen:
+                seen.add(item)
+                yield item, lookup(self, item)
+
+    def get_many(self, ids: Iterable[str], kind: str = "measure") -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        批次查詢（同一個已載入的目錄）
+
+        Args:
+            ids: measure_id / paper_id / 因子名稱
+            kind: measure、paper 或 factor
+
+        Returns:
+            id → 查詢結果（依輸入順序；找不到時為 None）
+        """
+        return dict(self.iter_many(ids, kind))
+
+    def get_paper_measures(self, paper_id: str) -> List[Dict[str, Any]]:
+        """取得特定論文使用的所有 Paper-Measure 連結"""
+        return self.graph.measures_used_by_paper(paper_id)
+
+    def get_measure_papers(self, measure_id: str) -> List[Dict[str, Any]]:
+        """取得使用特定 Measure 的所有 Paper-Measure 連結（measure_id 可為 alias）"""
+        return self.graph.papers_using_measure(measure_id)
+
+    _LOOKUPS = {
+        "measure": get_measure,
+        "paper": get_paper,
+        "factor": get_factor,
+    }
+
+    # 列表的串流版本（iter_*）逐筆產生摘要，不建立完整列表；list_* 為其列表形式
+
+    def iter_papers(self) -> Iterator[Dict[str, Any]]:
+        """逐筆產生所有論文（摘要）"""
+        for paper in self.paper_headers.values():
+            yield {
+                "paper_id": paper.get("paper_id"),
+                "title": paper.get("title"),
+                "authors": paper.get("authors"),
+                "year": paper.get("year"),
+                "journal": paper.get("journal")
+            }
+
+    def iter_measures(self) -> Iterator[Dict[str, Any]]:
+        """逐筆產生所有 Measures（摘要，依 measures/index.json 順序）"""
+        for factor_group in self.factor_groups:
+            factor_name = factor_group.get("factor")
+            for measure in factor_group.get("measures", []):
+                yield {
+                    "measure_id": measure.get("measure_id"),
+                    "display_name": measure.get("display_name"),
+                    "factor": factor_name,
+                    "original_paper_id": measure.get("original_paper_id")
+                }
+
+    def iter_factors(self) -> Iterator[Dict[str, Any]]:
+        """逐筆產生所有因子類別"""
+        for factor_group in self.factor_groups:
+            yield {
+                "factor": factor_group.get("factor"),
+                "count": factor_group.get("count"),
+                "measures": [m.get("measure_id") for m in factor_group.get("measures", [])]
+            }
+
+    def list_papers(self) -> List[Dict[str, Any]]:
+        """列出所有論文（摘要）"""
+        return list(self.iter_papers())
+
+    def list_measures(self) -> List[Dict[str, Any]]:
+        """列出所有 Measures（摘要）"""
+        return list(self.iter_measures())
+
+    def list_factors(self) -> List[Dict[str, Any]]:
+        """列出所有因子類別"""
+        return list(self.iter_factors())
+
+
+_catalog: Optional[FactorBase] = None
+_catalog_backend: Optional[str] = None
+_catalog_lock = threading.Lock()
+
+BACKENDS = ("json", "sqlite", "lazy")
+
+
+def get_catalog(reload: bool = False, use_snapshot: bool = True,
+                backend: Optional[str] = None) -> FactorBase:
+    """
+    取得 process 共用的 FactorBase 目錄
+
+    第一次呼叫時載入，之後皆回傳同一個實例；reload=True 時強制重新載入。
+    若存在 snapshot（見 snapshot.py）則優先讀取；snapshot 過期時先增量更新，
+    無法更新（例如唯讀環境）或從未建置 snapshot 時退回 JSON 檔案樹。
+
+    backend="sqlite" 時改由 SQLite 資料庫載入（見 sqlite_store.py）；
+    backend="lazy" 時只常駐標頭，完整文件於存取時載入（見 lazy_catalog.py）；
+    未指定時沿用目前已載入的後端（預設 json）。
+    """
+    global _catalog, _catalog_backend
+    if backend is not None and backend not in BACKENDS:
+        raise ValueError(f"不支援的後端: {backend}（可用: {', '.join(BACKENDS)}）")
+    with _catalog_lock:
+        if _catalog is None or reload or (backend is not None and backend != _catalog_backend):
+            backend = backend or _catalog_backend or "json"
+            sources = None
+            if backend == "lazy":
+                from lazy_catalog import LazyFactorBase
+                _catalog = LazyFactorBase()
+                _catalog_backend = backend
+                return _catalog
+            if backend == "sqlite":
+                from sqlite_store import load_sources
+                sources = load_sources()
+            elif use_snapshot:
+                from snapshot import DEFAULT_SNAPSHOT_PATH, load_snapshot, refresh_snapshot
+                sources = load_snapshot()
+                if sources is None and DEFAULT_SNAPSHOT_PATH.exists():
+                    try:
+                        refresh_snapshot()
+                        sources = load_snapshot()
+                    except (OSError, ValueError):
+                        sources = None
+            _catalog = FactorBase(sources=sources)
+            _catalog_backend = backend
+        return _catalog
+
+
+def get_catalog_backend() -> Optional[str]:
+    """目前共用目錄的資料來源（尚未載入時為 None）"""
+    return _catalog_backend
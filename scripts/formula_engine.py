@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+FactorBase Formula Engine
+=========================
+將 Measure 的 formula 定義編譯為 NumPy 向量化 kernel，
+在 (dates × assets) panel 上一次計算所有 Measures。
+
+本模組只是概念層 formula 的參考實作: 輸入 panel 以 formula 中的
+概念變數命名（book_value_equity、price、shares_outstanding ...），
+資料表對應與實際取數仍屬 MeasureRetriever 的職責。
+
+支援的 formula.type:
+    ratio / growth_rate   numerator / denominator（分母為 0 時為 NaN）
+    return                price[t - lag] / price[t - window] - 1
+    log                   ln(x)，x <= 0 時為 NaN
+    log_change            ln(x[t]) - ln(x[t - window])
+    product               各變數相乘
+    rolling               standard_deviation / regression_beta（滾動視窗，見 rolling.py）
+
+window 為 TTM、MRQ、current 等描述「輸入變數如何定義」的標籤時不影響計算；
+nM、nY、nW 等期間長度依 panel 頻率（periods_per_year，預設月資料）換算為期數。
+52_week_high_price 等視窗衍生變數由原始序列（price）的滾動最大值計算，
+current_price 視為 price 本身。panel 未直接提供 market_cap / market_value_equity 時，
+以 price × shares_outstanding 計算（EQUIVALENT_INPUTS，measure_dag 亦使用同一規則）。
+
+使用方式:
+    from formula_engine import compile_measure, evaluate_all
+
+    compiled = compile_measure(fb.get_measure("BM"))
+    compiled.inputs                            # ("book_value_equity", "market_value_equity")
+    compiled(panel)                            # → ndarray (dates × assets)
+
+    results = evaluate_all(fb.measures.values(), panel)
+    results = evaluate_all(fb.measures.values(), panel, normalize=True)   # 套用 normalization 欄位
+"""
+
+import re
+from typing import Optional, List, Dict, Any, Callable, Iterable, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+from rolling import DEFAULT_PERIODS_PER_YEAR, parse_window, rolling_std, rolling_beta, rolling_max
+
+
+# regression_beta 的市場報酬變數名稱
+MARKET_RETURNS = "market_returns"
+
+_VARIABLE_RE = re.compile(r"([a-z][a-z0-9_]*?)_t(?:_minus_\d+)?\b")
+_CALL_RE = re.compile(r"(?:ln|log)\(\s*([a-z][a-z0-9_]*)\s*\)")
+_PRODUCT_RE = re.compile(r"[a-z][a-z0-9_]*")
+
+# panel 未提供時可由其他概念變數組成的輸入（皆為市值: 股價 × 流通股數）
+EQUIVALENT_INPUTS = {
+    "market_cap": ("price", "shares_outstanding"),
+    "market_value_equity": ("price", "shares_outstanding"),
+}
+
+# 視窗衍生變數: 52_week_high_price → price 的 52 週滾動最大值
+_HIGH_RE = re.compile(r"^(\d+)_(day|week|month|quarter|year)_high_([a-z][a-z0-9_]*)$")
+_UNIT_CODES = {"day": "D", "week": "W", "month": "M", "quarter": "Q", "year": "Y"}
+
+
+class FormulaError(ValueError):
+    """formula 無法編譯（類型不支援或欄位不足）"""
+
+
+def _require_numpy() -> None:
+    if not HAS_NUMPY:
+        raise ImportError("formula_engine 需要 numpy（pip install numpy）")
+
+
+def window_periods(formula: Dict[str, Any], periods_per_year: int) -> int:
+    """formula.window 的期數；非期間標籤時拋出 FormulaError"""
+    periods = parse_window(formula.get("window"), periods_per_year)
+    if not periods:
+        raise FormulaError(f"formula.window 必須為期間長度（如 12M），得到 {formula.get('window')!r}")
+    return periods
+
+
+def _base_variable(calculation: Optional[str], default: str) -> str:
+    """由 calculation 取出時間序列變數名稱（price_t_minus_1 → price）"""
+    match = _VARIABLE_RE.search(calculation or "")
+    return match.group(1) if match else default
+
+
+def derived_input(name: str, periods_per_year: int) -> Tuple[str, Optional[int]]:
+    """
+    將視窗衍生變數對應到原始序列與滾動最大值視窗
+
+    52_week_high_price → (price, 12)（月資料）
+    current_price      → (price, None)
+    """
+    match = _HIGH_RE.match(name)
+    if match:
+        return match.group(3), parse_window(f"{match.group(1)}{_UNIT_CODES[match.group(2)]}", periods_per_year)
+    if name.startswith("current_"):
+        return name[len("current_"):], None
+    return name, None
+
+
+def resolve_input(name: str, available: Iterable[str]) -> Optional[Tuple[str, ...]]:
+    """
+    name 在 panel 中的取得方式
+
+    Returns:
+        (name,)（panel 直接提供）、EQUIVALENT_INPUTS 中需相乘的變數，無法取得時為 None
+    """
+    if name in available:
+        return (name,)
+    parts = EQUIVALENT_INPUTS.get(name)
+    if parts and all(part in available for part in parts):
+        return parts
+    return None
+
+
+def input_array(panel: Dict[str, Any], name: str) -> "np.ndarray":
+    """由 panel 取得輸入變數（必要時依 EQUIVALENT_INPUTS 組成）"""
+    parts = resolve_input(name, panel)
+    if parts is None:
+        raise KeyError(name)
+    out = np.asarray(panel[parts[0]], dtype=np.float64)
+    for part in parts[1:]:
+        out = out * np.asarray(panel[part], dtype=np.float64)
+    return out
+
+
+# ----------------------------------------------------------------------
+# 向量化基本運算
+# ----------------------------------------------------------------------
+
+def shift(x: "np.ndarray", periods: int) -> "np.ndarray":
+    """沿時間軸（axis 0）位移，前段補 NaN"""
+    if periods == 0:
+        return x
+    out = np.full_like(x, np.nan, dtype=np.float64)
+    if periods < x.shape[0]:
+        out[periods:] = x[:-periods]
+    return out
+
+
+def safe_divide(numerator: "np.ndarray", denominator: "np.ndarray") -> "np.ndarray":
+    """逐元素相除，分母為 0 或 NaN 時結果為 NaN"""
+    numerator, denominator = np.broadcast_arrays(
+        np.asarray(numerator, dtype=np.float64), np.asarray(denominator, dtype=np.float64)
+    )
+    out = np.full(numerator.shape, np.nan)
+    np.divide(numerator, denominator, out=out, where=(denominator != 0) & ~np.isnan(denominator))
+    return out
+
+
+def safe_log(x: "np.ndarray") -> "np.ndarray":
+    """自然對數，x <= 0 或 NaN 時結果為 NaN"""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    np.log(x, out=out, where=x > 0)
+    return out
+
+
+# ----------------------------------------------------------------------
+# 編譯
+# ----------------------------------------------------------------------
+
+class CompiledMeasure:
+    """
+    編譯後的 Measure
+
+    inputs  需要的 panel 變數名稱
+    kernel  kernel(*arrays) → ndarray (dates × assets)
+    """
+
+    def __init__(self, measure_id: str, formula: Dict[str, Any], inputs: Tuple[str, ...],
+                 kernel: Callable[..., "np.ndarray"]):
+        self.measure_id = measure_id
+        self.formula = formula
+        self.inputs = inputs
+        self.kernel = kernel
+
+    def __repr__(self) -> str:
+        return f"CompiledMeasure({self.measure_id!r}, inputs={self.inputs})"
+
+    def missing_inputs(self, panel: Dict[str, Any]) -> List[str]:
+        return [name for name in self.inputs if resolve_input(name, panel) is None]
+
+    def __call__(self, panel: Dict[str, Any]) -> "np.ndarray":
+        missing = self.missing_inputs(panel)
+        if missing:
+            raise KeyError(f"{self.measure_id} 缺少輸入變數: {', '.join(missing)}")
+        arrays = [input_array(panel, name) for name in self.inputs]
+        return self.kernel(*arrays)
+
+
+def _compile_ratio(formula, periods_per_year):
+    for field in ("numerator", "denominator"):
+        if not formula.get(field):
+            raise FormulaError(f"formula.{field} 為必要欄位")
+    return (formula["numerator"], formula["denominator"]), safe_divide
+
+
+def _compile_return(formula, periods_per_year):
+    window = window_periods(formula, periods_per_year)
+    lag = parse_window(formula.get("lag", "0"), periods_per_year) or 0
+    if lag >= window:
+        raise FormulaError(f"formula.lag ({formula.get('lag')}) 必須小於 window ({formula.get('window')})")
+    price = _base_variable(formula.get("calculation"), "price")
+    return (price,), lambda p: safe_divide(shift(p, lag), shift(p, window)) - 1
+
+
+def _compile_log(formula, periods_per_year):
+    match = _CALL_RE.search(formula.get("calculation") or "")
+    if not match:
+        raise FormulaError("log formula 的 calculation 必須為 ln(<變數>)")
+    return (match.group(1),), safe_log
+
+
+def _compile_log_change(formula, periods_per_year):
+    window = window_periods(formula, periods_per_year)
+    variable = _base_variable(formula.get("calculation"), "value")
+
+    def kernel(x):
+        logged = safe_log(x)
+        return logged - shift(logged, window)
+    return (variable,), kernel
+
+
+def _compile_product(formula, periods_per_year):
+    variables = tuple(_PRODUCT_RE.findall(formula.get("calculation") or ""))
+    if len(variables) < 2:
+        raise FormulaError("product formula 的 calculation 必須為 <變數> * <變數>")
+
+    def kernel(*arrays):
+        out = arrays[0]
+        for array in arrays[1:]:
+            out = out * array
+        return out
+    return variables, kernel
+
+
+def _compile_rolling(formula, periods_per_year):
+    window = window_periods(formula, periods_per_year)
+    metric, base = formula.get("metric"), formula.get("base")
+    if not base:
+        raise FormulaError("rolling formula 需要 formula.base")
+    if metric == "standard_deviation":
+        return (base,), lambda x: rolling_std(x, window)
+    if metric == "regression_beta":
+        # monthly_returns_vs_market → (monthly_returns, market_returns)
+        returns = base[:-len("_vs_market")] if base.endswith("_vs_market") else base
+        return (returns, MARKET_RETURNS), lambda y, x: rolling_beta(y, x, window)
+    raise FormulaError(f"不支援的 rolling metric: {metric!r}")
+
+
+# formula.type → compiler(formula, periods_per_year) -> (inputs, kernel)
+COMPILERS: Dict[str, Callable] = {
+    "ratio": _compile_ratio,
+    "growth_rate": _compile_ratio,
+    "return": _compile_return,
+    "log": _compile_log,
+    "log_change": _compile_log_change,
+    "product": _compile_product,
+    "rolling": _compile_rolling,
+}
+
+
+def compile_measure(measure: Dict[str, Any],
+                    periods_per_year: int = DEFAULT_PERIODS_PER_YEAR) -> CompiledMeasure:
+    """將 Measure 定義編譯為向量化 kernel"""
+    _require_numpy()
+    formula = measure.get("formula") or {}
+    compiler = COMPILERS.get(formula.get("type"))
+    if compiler is None:
+        raise FormulaError(f"{measure.get('measure_id')}: 不支援的 formula.type {formula.get('type')!r}")
+    try:
+        inputs, kernel = compiler(formula, periods_per_year)
+    except FormulaError as e:
+        raise FormulaError(f"{measure.get('measure_id')}: {e}") from None
+
+    derived = [derived_input(name, periods_per_year) for name in inputs]
+    if any(source != name or window for name, (source, window) in zip(inputs, derived)):
+        base_kernel = kernel
+        inputs = tuple(dict.fromkeys(source for source, _ in derived))
+
+        def kernel(*arrays):
+            by_name = dict(zip(inputs, arrays))
+            return base_kernel(*(
+                rolling_max(by_name[source], window) if window else by_name[source]
+                for source, window in derived
+            ))
+    return CompiledMeasure(measure.get("measure_id"), formula, tuple(inputs), kernel)
+
+
+def compile_all(measures: Iterable[Dict[str, Any]],
+                periods_per_year: int = DEFAULT_PERIODS_PER_YEAR) -> Tuple[Dict[str, CompiledMeasure], Dict[str, str]]:
+    """
+    編譯多個 Measures
+
+    Returns:
+        (measure_id → CompiledMeasure, measure_id → 編譯錯誤訊息)
+    """
+    compiled, errors = {}, {}
+    for measure in measures:
+        try:
+            compiled[measure.get("measure_id")] = compile_measure(measure, periods_per_year)
+        except FormulaError as e:
+            errors[measure.get("measure_id")] = str(e)
+    return compiled, errors
+
+
+def evaluate_all(measures: Iterable[Dict[str, Any]], panel: Dict[str, Any],
+                 periods_per_year: int = DEFAULT_PERIODS_PER_YEAR,
+                 skip_missing: bool = True, normalize: bool = False) -> Dict[str, "np.ndarray"]:
+    """
+    在同一個 panel 上計算多個 Measures
+
+    Args:
+        measures: Measure 定義
+        panel: 概念變數名稱 → ndarray (dates × assets)；market_returns 可為 (dates,)
+        skip_missing: True 時略過缺少輸入變數或無法編譯的 Measure，否則拋出例外
+        normalize: True 時依各 Measure 的 normalization 欄位標準化（見 normalization.py）
+    """
+    normalizer = None
+    if normalize:
+        from normalization import Normalizer
+        normalizer = Normalizer()
+
+    results = {}
+    for measure in measures:
+        try:
+            compiled = compile_measure(measure, periods_per_year)
+        except FormulaError:
+            if skip_missing:
+                continue
+            raise
+        if skip_missing and compiled.missing_inputs(panel):
+            continue
+        values = compiled(panel)
+        if normalizer is not None:
+            values = normalizer.apply(measure, values, out=values)
+        results[compiled.measure_id] = values
+    return results
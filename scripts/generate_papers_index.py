@@ -4,28 +4,53 @@ Generate papers index from metadata files.
 
 This script reads all paper metadata files and generates an index
 that can be used for quick lookups and queries.
+
+By default the index is updated incrementally: only paper files whose
+content changed since the last run (according to the source manifest,
+see manifest.py) are re-read. Use --full to rebuild from scratch.
 """
 
+import argparse
 import json
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+import instrumentation
+from manifest import Changes, refresh_artifact
+
+
+PROJECT_ROOT = Path(__file__).parent.parent
+METADATA_DIR = PROJECT_ROOT / 'papers' / 'metadata'
+INDEX_FILE = PROJECT_ROOT / 'papers' / 'papers_index.json'
 
 
 def load_all_papers(metadata_dir: Path) -> List[Dict[str, Any]]:
     """Load all paper metadata files."""
+    with instrumentation.timer("fs.glob"):
+        paper_files = sorted(metadata_dir.glob('paper_*.json'))
     papers = []
-    for filepath in sorted(metadata_dir.glob('paper_*.json')):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            papers.append(json.load(f))
+    for filepath in paper_files:
+        with instrumentation.timer("io.read"), open(filepath, 'r', encoding='utf-8') as f:
+            text = f.read()
+        with instrumentation.timer("json.decode"):
+            papers.append(json.loads(text))
     return papers
 
 
-def generate_index(papers: List[Dict[str, Any]]) -> Dict[str, Any]:
+@instrumentation.timed("index.papers_index")
+def generate_index(papers: List[Dict[str, Any]],
+                   local_pdfs: Optional[Dict[str, Optional[str]]] = None) -> Dict[str, Any]:
     """
     Generate an index of papers by various attributes.
     
+    Args:
+        papers: Paper metadata dictionaries
+        local_pdfs: paper_id -> local PDF file name, carried over from the
+            existing index (this field is maintained by hand)
+    
     Returns a dict with the following structure:
     {
+        "papers": [{paper_id, title, authors, year, local_pdf}, ...],
         "by_id": {...},
         "by_market": {...},
         "by_asset_class": {...},
@@ -33,7 +58,9 @@ def generate_index(papers: List[Dict[str, Any]]) -> Dict[str, Any]:
         "by_author": {...}
     }
     """
+    local_pdfs = local_pdfs or {}
     index = {
+        "papers": [],
         "by_id": {},
         "by_market": {},
         "by_asset_class": {},
@@ -44,6 +71,15 @@ def generate_index(papers: List[Dict[str, Any]]) -> Dict[str, Any]:
     for paper in papers:
         paper_id = paper['paper_id']
         
+        # Summary list
+        index["papers"].append({
+            "paper_id": paper_id,
+            "title": paper['title'],
+            "authors": paper['authors'],
+            "year": paper['year'],
+            "local_pdf": local_pdfs.get(paper_id)
+        })
+        
         # Index by ID
         index["by_id"][paper_id] = paper
         
@@ -76,30 +112,93 @@ def generate_index(papers: List[Dict[str, Any]]) -> Dict[str, Any]:
     return index
 
 
+def update_index(index: Dict[str, Any],
+                 changed: List[Dict[str, Any]],
+                 removed_ids: List[str]) -> Dict[str, Any]:
+    """
+    Apply changed and removed papers to an existing index.
+
+    Unchanged papers are taken from the existing "by_id" section, so no
+    metadata files other than the changed ones need to be read.
+    """
+    by_id = dict(index.get("by_id", {}))
+    for paper_id in removed_ids:
+        by_id.pop(paper_id, None)
+    for paper in changed:
+        by_id[paper['paper_id']] = paper
+
+    local_pdfs = {p['paper_id']: p.get('local_pdf') for p in index.get("papers", [])}
+    return generate_index([by_id[k] for k in sorted(by_id)], local_pdfs)
+
+
+def load_index(index_file: Path) -> Dict[str, Any]:
+    """Load an existing index, or an empty one if missing or invalid."""
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def refresh_papers_index(root: Path = PROJECT_ROOT, force: bool = False) -> Changes:
+    """
+    Incrementally update papers/papers_index.json.
+
+    Returns:
+        The set of changed paper files that was processed
+    """
+    root = Path(root)
+    metadata_dir = root / 'papers' / 'metadata'
+    index_file = root / 'papers' / 'papers_index.json'
+
+    def update(changes: Changes, current: Dict[str, Any]) -> None:
+        existing = load_index(index_file)
+        if changes.full:
+            # Rebuild from scratch, keeping only the hand-maintained local_pdf
+            existing = {"papers": existing.get("papers", [])}
+        elif not changes:
+            # Only mtimes changed; the index content is still valid
+            return
+
+        changed = []
+        for rel in changes.changed:
+            with open(root / rel, 'r', encoding='utf-8') as f:
+                changed.append(json.load(f))
+        removed_ids = [Path(rel).stem for rel in changes.removed]
+
+        index = update_index(existing, changed, removed_ids)
+        with open(index_file, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
+
+    files = sorted(metadata_dir.glob('paper_*.json'))
+    return refresh_artifact("papers_index", files, update, index_file, root=root, force=force)
+
+
 def main():
     """Generate and save papers index."""
-    script_dir = Path(__file__).parent
-    metadata_dir = script_dir.parent / 'papers' / 'metadata'
-    output_file = metadata_dir.parent / 'papers_index.json'
+    parser = argparse.ArgumentParser(description="Generate papers/papers_index.json")
+    parser.add_argument("--full", action="store_true",
+                        help="Rebuild the whole index instead of only changed papers")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
     
-    if not metadata_dir.exists():
-        print(f"Error: Metadata directory not found at {metadata_dir}")
+    if not METADATA_DIR.exists():
+        print(f"Error: Metadata directory not found at {METADATA_DIR}")
         return 1
     
-    # Load all papers
-    papers = load_all_papers(metadata_dir)
-    print(f"Loaded {len(papers)} papers")
-    
-    # Generate index
-    index = generate_index(papers)
-    
-    # Save index
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(index, f, indent=2, ensure_ascii=False)
+    # Update index
+    changes = refresh_papers_index(force=args.full)
+    index = load_index(INDEX_FILE)
     
-    print(f"Index saved to {output_file}")
+    if changes:
+        print(f"Processed changed papers ({changes.summary()})")
+        print(f"Index saved to {INDEX_FILE}")
+    else:
+        print(f"Index is up to date: {INDEX_FILE}")
     print()
     print("Index statistics:")
+    print(f"  Papers: {len(index['by_id'])}")
     print(f"  Markets: {len(index['by_market'])}")
     print(f"  Asset classes: {len(index['by_asset_class'])}")
     print(f"  Years: {len(index['by_year'])}")
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+FactorBase Relation Graph
+=========================
+papers、measures、factors 與 paper-measure 連結的關係圖。
+
+載入時一次建立正向與反向鄰接表，多跳查詢只需沿鄰接表走訪，
+不必重複掃描 paper_measure_links:
+
+    paper   ──uses──▶  measure  ──belongs to──▶  factor
+    paper   ◀──────── measure   ◀──────────────  factor
+
+使用方式:
+    from factorbase import get_catalog
+
+    graph = get_catalog().graph
+    graph.papers_using_measure("BM")
+    graph.papers_using_factor("Value", role="primary_sorting_variable", significance="positive")
+    graph.co_used_measures("MOM_12M")
+"""
+
+from typing import Optional, List, Dict, Any, Callable
+
+import instrumentation
+
+
+class RelationGraph:
+    """
+    Paper / Measure / Factor 關係圖
+
+    paper_links     paper_id → 連結列表（正向）
+    measure_links   measure_id → 連結列表（反向）
+    factor_measures 因子名稱（小寫）→ measure_id 列表
+    measure_factor  measure_id → 因子名稱
+    """
+
+    @instrumentation.timed("index.graph")
+    def __init__(self, links: List[Dict[str, Any]],
+                 factor_measures: Dict[str, List[str]],
+                 measure_factor: Dict[str, str],
+                 resolve: Optional[Callable[[str], Optional[str]]] = None):
+        """
+        Args:
+            links: paper_measure_links
+            factor_measures: 因子名稱（小寫）→ measure_id 列表
+            measure_factor: measure_id → 因子名稱
+            resolve: measure 名稱解析函式（alias → measure_id），預設為原樣比對
+        """
+        self.factor_measures = factor_measures
+        self.measure_factor = measure_factor
+        self._resolve = resolve or (lambda name: name)
+
+        self.paper_links: Dict[str, List[Dict[str, Any]]] = {}
+        self.measure_links: Dict[str, List[Dict[str, Any]]] = {}
+        for link in links:
+            self.paper_links.setdefault(link.get("paper_id"), []).append(link)
+            self.measure_links.setdefault(link.get("measure_id"), []).append(link)
+
+    @staticmethod
+    def _matches(link: Dict[str, Any], role: Optional[str], significance: Optional[str]) -> bool:
+        return ((role is None or link.get("role") == role)
+                and (significance is None or link.get("significance") == significance))
+
+    def _measure_links(self, measure_id: str) -> List[Dict[str, Any]]:
+        return self.measure_links.get(self._resolve(measure_id) or measure_id, [])
+
+    # ------------------------------------------------------------------
+    # 單跳查詢
+    # ------------------------------------------------------------------
+
+    def measures_used_by_paper(self, paper_id: str, role: Optional[str] = None,
+                               significance: Optional[str] = None) -> List[Dict[str, Any]]:
+        """論文使用的連結（可依 role / significance 篩選）"""
+        return [link for link in self.paper_links.get(paper_id, [])
+                if self._matches(link, role, significance)]
+
+    def papers_using_measure(self, measure_id: str, role: Optional[str] = None,
+                             significance: Optional[str] = None) -> List[Dict[str, Any]]:
+        """使用指定 Measure 的連結（反向查詢，measure_id 可為 alias）"""
+        return [link for link in self._measure_links(measure_id)
+                if self._matches(link, role, significance)]
+
+    # ------------------------------------------------------------------
+    # 多跳查詢
+    # ------------------------------------------------------------------
+
+    def papers_using_factor(self, factor: str, role: Optional[str] = None,
+                            significance: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        使用指定因子任一 Measure 的論文
+
+        factor → measures → papers，例如「以 Value measure 作為主要排序變數且顯著為正的論文」。
+
+        Returns:
+            [{"paper_id", "links": [...]}, ...]，依 paper_id 排序
+        """
+        papers: Dict[str, List[Dict[str, Any]]] = {}
+        for measure_id in self.factor_measures.get(factor.lower(), []):
+            for link in self.measure_links.get(measure_id, []):
+                if self._matches(link, role, significance):
+                    papers.setdefault(link.get("paper_id"), []).append(link)
+        return [{"paper_id": paper_id, "links": papers[paper_id]} for paper_id in sorted(papers)]
+
+    def factors_studied_by_paper(self, paper_id: str) -> List[str]:
+        """論文使用的 Measures 所屬的因子（依首次出現順序）"""
+        factors: Dict[str, None] = {}
+        for link in self.paper_links.get(paper_id, []):
+            factor = self.measure_factor.get(link.get("measure_id"))
+            if factor:
+                factors[factor] = None
+        return list(factors)
+
+    def co_used_measures(self, measure_id: str) -> List[Dict[str, Any]]:
+        """
+        與指定 Measure 出現在同一篇論文的其他 Measures
+
+        measure → papers → measures
+
+        Returns:
+            [{"measure_id", "count", "papers": [...]}, ...]，依共同出現次數排序
+        """
+        resolved = self._resolve(measure_id) or measure_id
+        # measure_id → {paper_id: None}（dict 去重並保留首次出現順序）
+        papers: Dict[str, Dict[str, None]] = {}
+        for link in self.measure_links.get(resolved, []):
+            paper_id = link.get("paper_id")
+            for other in self.paper_links.get(paper_id, []):
+                other_id = other.get("measure_id")
+                if other_id != resolved:
+                    papers.setdefault(other_id, {})[paper_id] = None
+        return sorted(
+            ({"measure_id": m, "count": len(p), "papers": list(p)} for m, p in papers.items()),
+            key=lambda r: (-r["count"], r["measure_id"])
+        )
+
+    def related_papers(self, paper_id: str) -> List[Dict[str, Any]]:
+        """
+        與指定論文使用相同 Measures 的其他論文
+
+        paper → measures → papers
+
+        Returns:
+            [{"paper_id", "count", "shared_measures": [...]}, ...]，依共用 Measure 數排序
+        """
+        # paper_id → {measure_id: None}（dict 去重並保留首次出現順序）
+        shared: Dict[str, Dict[str, None]] = {}
+        for link in self.paper_links.get(paper_id, []):
+            measure_id = link.get("measure_id")
+            for other in self.measure_links.get(measure_id, []):
+                other_id = other.get("paper_id")
+                if other_id != paper_id:
+                    shared.setdefault(other_id, {})[measure_id] = None
+        return sorted(
+            ({"paper_id": p, "count": len(m), "shared_measures": list(m)} for p, m in shared.items()),
+            key=lambda r: (-r["count"], r["paper_id"])
+        )
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+FactorBase Incremental Evaluator
+================================
+新增一期（或數期）資料時只計算新的日期，不必重算整段歷史。
+
+以 measure_dag 的運算圖為基礎，每個節點改為串流版本:
+    無狀態運算（divide、log、mul ...）  只處理新的一列
+    shift(k)                              保留最近 k 列
+    rolling_std / rolling_beta            保留視窗內的輸入列（見 rolling.py）
+    rolling_max                           同上，由單調 deque 計算
+
+checkpoint 只保存各有狀態節點「視窗內的輸入列」，依時間順序存為
+壓縮的 .npz（numpy 二進位格式）並附 JSON header；載入時以這些列重建
+running sums 與 deque，成本與視窗長度成正比，與歷史長度無關。
+header 記錄運算圖簽章，Measure 定義或 panel 變數改變時拒絕沿用舊 checkpoint。
+輸出為原始值；橫斷面標準化逐日獨立，可直接對 append() 回傳的新日期套用
+normalization.py（zscore_time_series 需要全樣本，不適用增量計算）。
+
+使用方式:
+    from incremental import IncrementalEvaluator
+
+    evaluator = IncrementalEvaluator(fb.measures.values(), panel.keys(), n_assets)
+    evaluator.append(history)                         # 第一次: 整段歷史
+    evaluator.save(".factorbase/measures_state.npz")
+
+    # 每晚
+    evaluator = IncrementalEvaluator.load(".factorbase/measures_state.npz", fb.measures.values())
+    new_rows = evaluator.append(new_month, dates=["2025-12"])
+    evaluator.save(".factorbase/measures_state.npz")
+"""
+
+import hashlib
+import io
+import json
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+from formula_engine import DEFAULT_PERIODS_PER_YEAR
+from measure_dag import OPS, build_plan
+from rolling import RollingCovariance, RollingMax, RollingMoments
+
+
+STATE_FORMAT_VERSION = 1
+
+# 有狀態的節點運算 → 需保留的輸入列數（由參數決定）
+STATEFUL_OPS = {"shift", "rolling_std", "rolling_beta", "rolling_max"}
+
+
+class _RowHistory:
+    """保留最近 length 列輸入（依時間順序輸出供 checkpoint 使用）"""
+
+    def __init__(self, length: int, n_inputs: int, n_assets: int):
+        self.length = length
+        self.data = np.full((length, n_inputs, n_assets), np.nan)
+        self.count = 0
+
+    def push(self, rows: "np.ndarray") -> Optional["np.ndarray"]:
+        """放入新的一列，已滿時回傳 length 期前的那一列"""
+        position = self.count % self.length
+        evicted = self.data[position].copy() if self.count >= self.length else None
+        self.data[position] = rows
+        self.count += 1
+        return evicted
+
+    def ordered(self) -> "np.ndarray":
+        kept = min(self.count, self.length)
+        start = self.count % self.length if self.count >= self.length else 0
+        return np.roll(self.data, -start, axis=0)[:kept]
+
+
+class _StreamingNode:
+    """有狀態節點的串流實作"""
+
+    def __init__(self, op: str, params, n_inputs: int, n_assets: int):
+        self.op = op
+        self.window = params[0]
+        self.history = _RowHistory(self.window, n_inputs, n_assets)
+        if op == "rolling_std":
+            self.engine = RollingMoments(self.window, n_assets)
+        elif op == "rolling_beta":
+            self.engine = RollingCovariance(self.window, n_assets)
+        elif op == "rolling_max":
+            self.engine = RollingMax(self.window, n_assets)
+        else:
+            self.engine = None
+
+    def update(self, *rows: "np.ndarray") -> "np.ndarray":
+        stacked = np.stack(rows)
+        evicted = self.history.push(stacked)
+        if self.op == "shift":
+            return evicted[0] if evicted is not None else np.full(stacked.shape[1], np.nan)
+        if self.op == "rolling_std":
+            return self.engine.update(rows[0])
+        if self.op == "rolling_beta":
+            # rolling_beta(y, x): y 為個股報酬、x 為市場報酬
+            return self.engine.update(rows[1], rows[0])
+        return self.engine.update(rows[0])
+
+    def restore(self, rows: "np.ndarray") -> None:
+        """由 checkpoint 的輸入列重建狀態"""
+        for stacked in rows:
+            self.update(*stacked)
+
+
+class IncrementalEvaluator:
+    """
+    append-only 的 Measure 串流計算器
+
+    periods     已處理的期數
+    last_date   最後一期的日期標籤（由 append(dates=...) 提供）
+    """
+
+    def __init__(self, measures: Iterable[Dict[str, Any]], available: Iterable[str], n_assets: int,
+                 periods_per_year: int = DEFAULT_PERIODS_PER_YEAR):
+        if not HAS_NUMPY:
+            raise ImportError("incremental 需要 numpy（pip install numpy）")
+        self.available = sorted(available)
+        self.n_assets = n_assets
+        self.periods_per_year = periods_per_year
+        self.plan = build_plan(measures, self.available, periods_per_year)
+        self.periods = 0
+        self.last_date: Optional[str] = None
+
+        self._needed = self.plan._reachable(self.plan.outputs.values())
+        self._streams: Dict[int, _StreamingNode] = {}
+        for node_id in self._needed:
+            op, children, params = self.plan.nodes[node_id]
+            if op in STATEFUL_OPS:
+                self._streams[node_id] = _StreamingNode(op, params, len(children), n_assets)
+
+    @property
+    def skipped(self) -> Dict[str, str]:
+        return self.plan.skipped
+
+    def signature(self) -> str:
+        """運算圖簽章（節點、輸入變數、資產數與頻率皆相同時才可沿用 checkpoint）"""
+        payload = json.dumps({
+            "nodes": [self.plan.nodes[n] for n in self._needed],
+            "outputs": self.plan.outputs,
+            "available": self.available,
+            "n_assets": self.n_assets,
+            "periods_per_year": self.periods_per_year,
+        }, sort_keys=True, default=list)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # ------------------------------------------------------------------
+    # 計算
+    # ------------------------------------------------------------------
+
+    def update(self, row: Dict[str, Any]) -> Dict[str, "np.ndarray"]:
+        """
+        加入一期資料
+
+        Args:
+            row: 變數名稱 → 長度為 n_assets 的陣列（market_returns 可為純量）
+
+        Returns:
+            measure_id → 該期的 Measure 值（長度 n_assets）
+        """
+        values: Dict[int, "np.ndarray"] = {}
+        for node_id in self._needed:
+            op, children, params = self.plan.nodes[node_id]
+            if op == "input":
+                values[node_id] = np.broadcast_to(
+                    np.asarray(row[params[0]], dtype=np.float64), (self.n_assets,)
+                )
+            elif node_id in self._streams:
+                values[node_id] = self._streams[node_id].update(*(values[c] for c in children))
+            else:
+                values[node_id] = OPS[op](*(values[c] for c in children), *params)
+        self.periods += 1
+        return {m: np.array(values[n]) for m, n in self.plan.outputs.items()}
+
+    def append(self, panel: Dict[str, Any], dates: Optional[List[Any]] = None) -> Dict[str, "np.ndarray"]:
+        """
+        加入多期資料
+
+        Args:
+            panel: 變數名稱 → (新日期數 × n_assets)；market_returns 可為 (新日期數,)
+            dates: 新日期的標籤（選用，最後一個會記錄為 last_date）
+
+        Returns:
+            measure_id → (新日期數 × n_assets)
+        """
+        lengths = {len(np.asarray(panel[name])) for name in self.available}
+        if len(lengths) != 1:
+            raise ValueError(f"panel 各變數的日期數不一致: {sorted(lengths)}")
+        n_dates = lengths.pop()
+
+        results = {m: np.empty((n_dates, self.n_assets)) for m in self.plan.outputs}
+        for t in range(n_dates):
+            row = self.update({name: np.asarray(panel[name])[t] for name in self.available})
+            for measure_id, values in row.items():
+                results[measure_id][t] = values
+        if dates:
+            self.last_date = str(list(dates)[-1])
+        return results
+
+    # ------------------------------------------------------------------
+    # checkpoint
+    # ------------------------------------------------------------------
+
+    def save(self, path: Path) -> None:
+        """將最小狀態寫入壓縮的 .npz（原子寫入）"""
+        path = Path(path)
+        header = {
+            "format_version": STATE_FORMAT_VERSION,
+            "signature": self.signature(),
+            "available": self.available,
+            "n_assets": self.n_assets,
+            "periods_per_year": self.periods_per_year,
+            "periods": self.periods,
+            "last_date": self.last_date,
+        }
+        arrays = {f"node_{n}": s.history.ordered() for n, s in self._streams.items()}
+        arrays["header"] = np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8)
+
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_bytes(buffer.getvalue())
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, measures: Iterable[Dict[str, Any]]) -> "IncrementalEvaluator":
+        """
+        由 checkpoint 恢復
+
+        Raises:
+            ValueError: 版本不符，或 Measure 定義 / 輸入變數已改變（需重新計算歷史）
+        """
+        if not HAS_NUMPY:
+            raise ImportError("incremental 需要 numpy（pip install numpy）")
+        with np.load(Path(path)) as data:
+            header = json.loads(bytes(data["header"]).decode("utf-8"))
+            if header.get("format_version") != STATE_FORMAT_VERSION:
+                raise ValueError(f"checkpoint 版本不符: {header.get('format_version')}")
+
+            evaluator = cls(measures, header["available"], header["n_assets"], header["periods_per_year"])
+            if evaluator.signature() != header["signature"]:
+                raise ValueError("Measure 定義或輸入變數已改變，無法沿用 checkpoint")
+
+            for node_id, stream in evaluator._streams.items():
+                stream.restore(data[f"node_{node_id}"])
+        evaluator.periods = header["periods"]
+        evaluator.last_date = header["last_date"]
+        return evaluator
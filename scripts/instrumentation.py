@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+FactorBase Instrumentation
+==========================
+熱路徑的計時器與計數器，找出時間花在檔案 I/O、JSON 解析、Schema 驗證、
+跨檔參照檢查或索引建立的哪一段。
+
+預設停用；停用時 timer() 回傳共用的空 context manager，對熱路徑幾乎沒有額外成本。
+計時為含巢狀的累計時間（例如 catalog.load 包含其中的 json.decode），
+只記錄目前 process（validate_json.py --jobs 的 worker 不列入）。
+
+階段名稱:
+    io.read / json.decode       load_json 的讀檔與解析
+    fs.glob                     目錄列舉
+    schema.compile / schema.validate
+    check.<check 名稱>          validation.py 的各項 check（含跨檔參照）
+    validate.<kind>             validate_document 整體
+    catalog.read / catalog.load 讀取來源檔 / 建立 FactorBase 索引
+    index.<名稱>                resolver、graph、search、query_engine、papers_index 等索引建立
+    snapshot.load / manifest.scan
+    lazy.headers                lazy 目錄的 header index 更新（見 lazy_catalog.py）
+    lru.<名稱>.hits / .misses   lazy 目錄文件快取的命中計數
+
+所有 scripts/ 下的 CLI 皆支援:
+    --timings           結束時於 stderr 印出各階段耗時
+    --profile [PATH]    同上，並以 cProfile 記錄，pstats 寫入 PATH（預設 .factorbase/profile.pstats）
+
+使用方式:
+    import instrumentation
+
+    instrumentation.enable()
+    fb = FactorBase()
+    with instrumentation.timer("my.phase"):
+        ...
+    instrumentation.count("my.items", 10)
+    instrumentation.report()          # {"wall": ..., "timers": {...}, "counters": {...}}
+    instrumentation.print_report()
+
+    with instrumentation.profiling("out.pstats"):
+        fb = FactorBase()
+"""
+
+import argparse
+import atexit
+import cProfile
+import functools
+import io
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable, Iterator, TextIO
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# --profile 未指定路徑時的 pstats 輸出位置（已列入 .gitignore）
+DEFAULT_PROFILE_PATH = PROJECT_ROOT / ".factorbase" / "profile.pstats"
+
+# --profile 時印出的函式數
+PROFILE_TOP = 25
+
+_enabled = False
+_started: Optional[float] = None
+_lock = threading.Lock()
+# 階段名稱 → [呼叫次數, 累計秒數]
+_timers: Dict[str, List[float]] = {}
+_counters: Dict[str, int] = {}
+
+
+def enable() -> None:
+    """開始記錄（wall time 自第一次 enable 起算）"""
+    global _enabled, _started
+    _enabled = True
+    if _started is None:
+        _started = time.perf_counter()
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    """清除已記錄的數值（不改變啟用狀態）"""
+    global _started
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+        _started = time.perf_counter() if _enabled else None
+
+
+def add_time(name: str, seconds: float, calls: int = 1) -> None:
+    """直接加入一筆計時（自行量測時使用）"""
+    with _lock:
+        entry = _timers.get(name)
+        if entry is None:
+            _timers[name] = [calls, seconds]
+        else:
+            entry[0] += calls
+            entry[1] += seconds
+
+
+def count(name: str, n: int = 1) -> None:
+    """累加計數器"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        add_time(self.name, time.perf_counter() - self.start)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str):
+    """計時一段程式: with timer("json.decode"): ..."""
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """函式計時 decorator（是否記錄於每次呼叫時判斷）"""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Timer(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ----------------------------------------------------------------------
+# 報表
+# ----------------------------------------------------------------------
+
+def report() -> Dict[str, Any]:
+    """
+    目前的計時與計數
+
+    Returns:
+        {"wall": 秒數, "timers": {名稱: {"calls", "total", "mean"}}, "counters": {名稱: 數值}}
+        timers 依累計時間由大到小排列
+    """
+    with _lock:
+        timers = {name: list(entry) for name, entry in _timers.items()}
+        counters = dict(_counters)
+    wall = time.perf_counter() - _started if _started is not None else 0.0
+    return {
+        "wall": wall,
+        "timers": {
+            name: {"calls": int(calls), "total": total, "mean": total / calls if calls else 0.0}
+            for name, (calls, total) in sorted(timers.items(), key=lambda item: -item[1][1])
+        },
+        "counters": dict(sorted(counters.items())),
+    }
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds * 1e6:.1f}µs"
+
+
+def format_report(data: Optional[Dict[str, Any]] = None) -> str:
+    data = data or report()
+    wall = data["wall"]
+    lines = [f"⏱️ Timings（wall {_format_seconds(wall)}，各階段為含巢狀的累計時間）", "=" * 50]
+    if not data["timers"]:
+        lines.append("  （沒有記錄到任何階段）")
+    else:
+        lines.append(f"  {'phase':<40} {'calls':>8} {'total':>9} {'mean':>9} {'%wall':>6}")
+        for name, timer_data in data["timers"].items():
+            share = f"{timer_data['total'] / wall:.0%}" if wall else "-"
+            lines.append(
+                f"  {name:<40} {timer_data['calls']:>8} {_format_seconds(timer_data['total']):>9}"
+                f" {_format_seconds(timer_data['mean']):>9} {share:>6}"
+            )
+    if data["counters"]:
+        lines.append("")
+        for name, value in data["counters"].items():
+            lines.append(f"  {name:<40} {value:>12,}")
+    return "\n".join(lines)
+
+
+def print_report(stream: Optional[TextIO] = None) -> None:
+    """印出報表（預設 stderr，不影響 stdout 的 JSON / NDJSON 輸出）"""
+    stream = stream or sys.stderr
+    print(format_report(), file=stream)
+
+
+# ----------------------------------------------------------------------
+# cProfile
+# ----------------------------------------------------------------------
+
+def _dump_profile(profiler: cProfile.Profile, path: Optional[Path], top: int, stream: TextIO) -> None:
+    if path is not None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(path))
+    buffer = io.StringIO()
+    pstats.Stats(profiler, stream=buffer).sort_stats("cumulative").print_stats(top)
+    print(f"🔬 cProfile（依累計時間前 {top} 名）", file=stream)
+    print(buffer.getvalue().strip(), file=stream)
+    if path is not None:
+        print(f"\n✅ pstats 已寫入: {path}（python -m pstats {path}）", file=stream)
+
+
+@contextmanager
+def profiling(path: Optional[Path] = None, top: int = PROFILE_TOP,
+              stream: Optional[TextIO] = None) -> Iterator[cProfile.Profile]:
+    """以 cProfile 記錄區塊內的執行；結束時印出前 top 名並寫入 pstats（path 非 None 時）"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        _dump_profile(profiler, path, top, stream or sys.stderr)
+
+
+# ----------------------------------------------------------------------
+# CLI 選項
+# ----------------------------------------------------------------------
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """加入 --timings 與 --profile 選項"""
+    parser.add_argument("--timings", action="store_true", help="結束時於 stderr 印出各階段耗時")
+    parser.add_argument("--profile", nargs="?", const=str(DEFAULT_PROFILE_PATH), metavar="PATH",
+                        help="同 --timings，並以 cProfile 記錄（pstats 預設寫入 .factorbase/profile.pstats）")
+
+
+def _finish(profiler: Optional[cProfile.Profile], path: Optional[Path]) -> None:
+    if profiler is not None:
+        profiler.disable()
+        _dump_profile(profiler, path, PROFILE_TOP, sys.stderr)
+        print(file=sys.stderr)
+    print_report(sys.stderr)
+
+
+def start(timings: bool = False, profile: Optional[str] = None) -> None:
+    """啟用計時（與 cProfile），process 結束時印出報表"""
+    if not (timings or profile):
+        return
+    enable()
+    profiler = None
+    if profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    atexit.register(_finish, profiler, Path(profile) if profile else None)
+
+
+def setup(args: argparse.Namespace) -> None:
+    """依 add_arguments() 加入的選項啟用計時"""
+    start(getattr(args, "timings", False), getattr(args, "profile", None))
+
+
+def setup_from_argv(argv: List[str]) -> None:
+    """
+    未使用 argparse 的 script: 從 argv 取出 --timings / --profile[=PATH] 並啟用計時
+
+    argv 會被原地修改（通常為 sys.argv）。
+    """
+    timings, profile = False, None
+    remaining = argv[:1]
+    for arg in argv[1:]:
+        if arg == "--timings":
+            timings = True
+        elif arg == "--profile":
+            profile = str(DEFAULT_PROFILE_PATH)
+        elif arg.startswith("--profile="):
+            profile = arg.split("=", 1)[1] or str(DEFAULT_PROFILE_PATH)
+        else:
+            remaining.append(arg)
+    argv[:] = remaining
+    start(timings, profile)
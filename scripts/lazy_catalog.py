@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+FactorBase Lazy Catalog
+=======================
+只常駐輕量標頭的 FactorBase 目錄，完整的 Paper / Measure 文件於第一次存取時才載入，
+並保存於有上限的 LRU 快取；論文數增加時記憶體用量維持固定。
+
+常駐資料:
+    paper 標頭      paper_id、title、authors、year、journal、market、asset_class ...
+                    （不含 bibtex、abstract、notes 等長欄位）
+    measure 標頭    measure_id、measure_name、display_name、factor、aliases、original_paper_id
+    measures/index.json、factors.json、paper_measure_links
+
+標頭由 header index（.factorbase/headers.json）提供，依 manifest 增量更新，
+只重新解析新增或修改的來源檔；無法寫入時（例如唯讀環境）於記憶體中建立。
+
+papers / measures 為 Mapping（見 LazyDocuments），get_paper()、get_measure() 等查詢
+與 FactorBase 完全相同；遍歷 values() 時逐筆載入，快取仍維持上限。
+LazyFactorBase 不追蹤來源檔變動：檔案變動後需重新建立（get_catalog(reload=True)），
+常駐查詢服務會自動處理。
+
+使用方式:
+    from lazy_catalog import LazyFactorBase
+
+    fb = LazyFactorBase(cache_size=256)
+    fb.list_papers()                 # 只讀標頭，不載入任何論文檔
+    fb.get_paper("paper_001")        # 第一次存取時載入完整文件
+    fb.cache_stats()                 # {"papers": {"hits", "misses", "evictions", ...}, "measures": {...}}
+
+    python query_factorbase.py --backend lazy --list-papers --ndjson
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable, Iterator, Mapping, Type
+
+import instrumentation
+from factorbase import PROJECT_ROOT, FactorBase, load_json
+from manifest import Changes, Manifest, refresh_artifact
+from records import Measure, Paper, Record
+from snapshot import source_files
+
+
+HEADERS_VERSION = 1
+
+# 預設 header index 位置（已列入 .gitignore）
+DEFAULT_HEADERS_PATH = PROJECT_ROOT / ".factorbase" / "headers.json"
+
+# 每種文件（papers / measures）快取的完整文件數上限
+DEFAULT_CACHE_SIZE = 1024
+
+PAPER_HEADER_FIELDS = ("paper_id", "title", "authors", "year", "journal",
+                       "market", "asset_class", "conclusion_sign", "replicable")
+MEASURE_HEADER_FIELDS = ("measure_id", "measure_name", "display_name", "factor",
+                         "aliases", "original_paper_id")
+
+
+# ----------------------------------------------------------------------
+# LRU 快取
+# ----------------------------------------------------------------------
+
+class LRUCache:
+    """
+    有上限的 LRU 快取（thread-safe），記錄 hits / misses / evictions
+
+    maxsize 為文件數上限；0 表示不快取（每次存取皆重新載入）。
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE, name: str = "cache"):
+        if maxsize < 0:
+            raise ValueError(f"maxsize 不可為負數: {maxsize}")
+        self.maxsize = maxsize
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def get(self, key: str, load: Callable[[], Any]) -> Any:
+        """取得 key 的值；未命中時呼叫 load() 載入並放入快取（load 的例外直接拋出）"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                instrumentation.count(f"lru.{self.name}.hits")
+                return self._data[key]
+            self.misses += 1
+        instrumentation.count(f"lru.{self.name}.misses")
+
+        value = load()
+        if self.maxsize:
+            with self._lock:
+                self._data[key] = value
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class LazyDocuments(Mapping):
+    """
+    id → 完整文件的 Mapping，文件於存取時自 JSON 檔載入並經由 LRU 快取
+
+    len()、in 與遍歷 key 只使用 id → 檔案的對應，不讀取任何文件。
+    """
+
+    def __init__(self, root: Path, files: Dict[str, str], cache: LRUCache,
+                 record: Optional[Type[Record]] = None):
+        """
+        Args:
+            files: id → 來源檔相對路徑（相對於 root）
+            record: 文件的紀錄型別（見 records.py）；None 時保留 dict
+        """
+        self.root = Path(root)
+        self.files = files
+        self.cache = cache
+        self.record = record
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        rel = self.files[key]
+        return self.cache.get(key, lambda: self._load(key, rel))
+
+    def _load(self, key: str, rel: str) -> Dict[str, Any]:
+        document = load_json(self.root / rel)
+        if document is None:
+            raise KeyError(key)
+        return self.record.from_dict(document) if self.record else document
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.files)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.files
+
+
+# ----------------------------------------------------------------------
+# Header index
+# ----------------------------------------------------------------------
+
+def header_sources(root: Path = PROJECT_ROOT) -> List[Path]:
+    """header index 的來源檔: 所有論文檔與 measures/index.json 參照的 Measure 檔"""
+    root = Path(root)
+    measure_index = root / "measures" / "index.json"
+    return [
+        path for path in source_files(root)
+        if path.parent == root / "papers" / "metadata"
+        or (path.is_relative_to(root / "measures") and path != measure_index)
+    ]
+
+
+def make_header(rel: str, document: Dict[str, Any]) -> Dict[str, Any]:
+    """由完整文件取出標頭欄位（依來源檔位置判斷文件類型）"""
+    fields = PAPER_HEADER_FIELDS if rel.startswith("papers/") else MEASURE_HEADER_FIELDS
+    return {field: document[field] for field in fields if field in document}
+
+
+def _read_headers(path: Path) -> Optional[Dict[str, Dict[str, Any]]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != HEADERS_VERSION:
+        return None
+    return data.get("headers")
+
+
+def build_headers(root: Path = PROJECT_ROOT) -> Dict[str, Dict[str, Any]]:
+    """於記憶體中建立全部標頭（來源檔相對路徑 → 標頭），逐檔解析後即丟棄完整文件"""
+    root = Path(root)
+    headers = {}
+    for path in header_sources(root):
+        document = load_json(path)
+        if document:
+            rel = path.relative_to(root).as_posix()
+            headers[rel] = make_header(rel, document)
+    return headers
+
+
+def refresh_headers(root: Path = PROJECT_ROOT, output: Optional[Path] = None,
+                    force: bool = False) -> Changes:
+    """
+    增量更新 header index
+
+    只重新解析 manifest 判定為新增或修改的來源檔，其餘沿用既有的標頭。
+    專案以外的 root（例如 benchmark 的合成知識庫）使用該 root 下的 manifest。
+    """
+    root = Path(root)
+    default_output = root / ".factorbase" / "headers.json"
+    output = Path(output) if output else default_output
+
+    def update(changes: Changes, current: Dict[str, Dict[str, Any]]) -> None:
+        headers = None if changes.full else _read_headers(output)
+        if headers is None:
+            headers, reparse = {}, list(current)
+        else:
+            reparse = changes.changed
+            for rel in changes.removed:
+                headers.pop(rel, None)
+
+        for rel in reparse:
+            document = load_json(root / rel)
+            if document:
+                headers[rel] = make_header(rel, document)
+            else:
+                headers.pop(rel, None)
+
+        payload = {"version": HEADERS_VERSION, "headers": {rel: headers[rel] for rel in current if rel in headers}}
+        output.parent.mkdir(parents=True, exist_ok=True)
+        tmp = output.with_suffix(output.suffix + ".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        tmp.replace(output)
+
+    # 非預設位置的 header index 各自記錄於 manifest，避免互相影響增量判斷
+    name = "headers" if output == default_output else f"headers:{output.resolve()}"
+    manifest = Manifest(root / ".factorbase" / "manifest.json")
+    return refresh_artifact(name, header_sources(root), update, output, root=root, force=force,
+                            manifest=manifest)
+
+
+@instrumentation.timed("lazy.headers")
+def load_headers(root: Path = PROJECT_ROOT, path: Optional[Path] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    取得最新的標頭（來源檔相對路徑 → 標頭）
+
+    先增量更新 header index；無法寫入時於記憶體中建立。
+    """
+    root = Path(root)
+    path = Path(path) if path else root / ".factorbase" / "headers.json"
+    try:
+        refresh_headers(root, path)
+    except OSError:
+        return build_headers(root)
+    headers = _read_headers(path)
+    return headers if headers is not None else build_headers(root)
+
+
+# ----------------------------------------------------------------------
+# Lazy catalog
+# ----------------------------------------------------------------------
+
+class LazyFactorBase(FactorBase):
+    """
+    只常駐標頭的 FactorBase 目錄
+
+    papers / measures 為 LazyDocuments（完整文件於存取時載入並經 LRU 快取），
+    paper_headers / measure_headers 為常駐的標頭；其餘索引與 FactorBase 相同。
+    """
+
+    def __init__(self, root: Path = PROJECT_ROOT, cache_size: int = DEFAULT_CACHE_SIZE,
+                 headers_path: Optional[Path] = None):
+        """
+        Args:
+            root: 專案根目錄
+            cache_size: papers 與 measures 各自快取的完整文件數上限
+            headers_path: header index 位置（預設 <root>/.factorbase/headers.json）
+        """
+        self.cache_size = cache_size
+        self.headers_path = headers_path
+        self.paper_cache = LRUCache(cache_size, "papers")
+        self.measure_cache = LRUCache(cache_size, "measures")
+        super().__init__(root)
+
+    def load(self, sources: Optional[Dict[str, Any]] = None) -> None:
+        """載入標頭並建立索引（sources 不適用於 lazy 目錄，需為 None）"""
+        if sources is not None:
+            raise ValueError("LazyFactorBase 由 JSON 檔案樹載入，不接受 sources")
+        headers = load_headers(self.root, self.headers_path)
+        factors_path = self.root / "factors" / "factors.json"
+        relations_path = self.root / "relations" / "paper_measures.json"
+        measure_index = load_json(self.root / "measures" / "index.json") or {}
+        factors = load_json(factors_path) if factors_path.exists() else None
+        relations = load_json(relations_path) if relations_path.exists() else None
+
+        with instrumentation.timer("catalog.load"):
+            self.paper_cache.clear()
+            self.measure_cache.clear()
+            self._load_paper_headers(headers)
+            self._load_factors(factors)
+            self._load_measure_headers(measure_index, headers)
+            self._load_relations(relations)
+
+    def _load_paper_headers(self, headers: Dict[str, Dict[str, Any]]) -> None:
+        paper_headers, files = {}, {}
+        for rel, header in headers.items():
+            paper_id = header.get("paper_id")
+            if rel.startswith("papers/") and paper_id:
+                paper_headers[paper_id] = Paper.from_dict(header)
+                files[paper_id] = rel
+        self.paper_headers = paper_headers
+        self.papers = LazyDocuments(self.root, files, self.paper_cache, Paper)
+
+    def _load_measure_headers(self, index: Dict[str, Any], headers: Dict[str, Dict[str, Any]]) -> None:
+        self.factor_groups = index.get("factors", [])
+        self.measure_entries = {}
+        self._factor_measures = {}
+        measure_headers, files = {}, {}
+
+        for factor_group in self.factor_groups:
+            factor_key = factor_group.get("factor", "").lower()
+            measure_ids = self._factor_measures.setdefault(factor_key, [])
+            for entry in factor_group.get("measures", []):
+                measure_id = entry.get("measure_id")
+                rel = f"measures/{entry.get('file')}"
+                if rel not in headers:
+                    continue
+                self.measure_entries[measure_id] = entry
+                measure_headers[measure_id] = Measure.from_dict(headers[rel])
+                files[measure_id] = rel
+                measure_ids.append(measure_id)
+
+        self.measure_headers = measure_headers
+        self.measures = LazyDocuments(self.root, files, self.measure_cache, Measure)
+        self._build_resolver()
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """papers 與 measures 快取的命中統計"""
+        return {"papers": self.paper_cache.stats(), "measures": self.measure_cache.stats()}
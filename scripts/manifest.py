@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+FactorBase Source Manifest
+==========================
+記錄來源檔的 mtime、大小與 sha256，供衍生產物（papers index、snapshot、
+搜尋索引等）判斷哪些輸入有變動，只重新處理變動的檔案。
+
+manifest 依 artifact 分開保存（.factorbase/manifest.json）:
+    {
+        "version": 1,
+        "artifacts": {
+            "snapshot": {"papers/metadata/paper_001.json": {"mtime_ns": ..., "size": ..., "sha256": ...}},
+            ...
+        }
+    }
+
+mtime 與大小未變的檔案直接沿用先前的 sha256，不重新讀檔；
+mtime 變動但內容相同（例如 touch）的檔案不視為變動。
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Callable, Optional, Iterable, List, Dict, Any
+
+import instrumentation
+from factorbase import PROJECT_ROOT
+
+
+MANIFEST_VERSION = 1
+
+# 預設 manifest 位置（已列入 .gitignore）
+DEFAULT_MANIFEST_PATH = PROJECT_ROOT / ".factorbase" / "manifest.json"
+
+
+def file_sha256(filepath: Path) -> str:
+    """計算檔案內容的 sha256"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def combined_hash(entries: Dict[str, Dict[str, Any]]) -> str:
+    """將多個來源檔的 sha256 合併為單一內容雜湊（與檔案順序無關）"""
+    digest = hashlib.sha256()
+    for rel in sorted(entries):
+        digest.update(f"{rel}\0{entries[rel]['sha256']}\0".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class Changes:
+    """來源檔變動集合"""
+    def __init__(self, added: List[str] = None, modified: List[str] = None,
+                 removed: List[str] = None, full: bool = False):
+        self.added = added or []
+        self.modified = modified or []
+        self.removed = removed or []
+        # full=True 表示沒有可用的前次狀態，需完整重建
+        self.full = full
+
+    @property
+    def changed(self) -> List[str]:
+        """新增或修改的檔案"""
+        return self.added + self.modified
+
+    def __bool__(self) -> bool:
+        return self.full or bool(self.added or self.modified or self.removed)
+
+    def summary(self) -> str:
+        if self.full:
+            return "完整重建"
+        return f"+{len(self.added)} ~{len(self.modified)} -{len(self.removed)}"
+
+
+class Manifest:
+    """來源檔 manifest（依 artifact 分開記錄）"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else DEFAULT_MANIFEST_PATH
+        self.artifacts: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.artifacts = data.get("artifacts", {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    @instrumentation.timed("manifest.scan")
+    def scan(self, root: Path, files: Iterable[Path]) -> Dict[str, Dict[str, Any]]:
+        """
+        取得來源檔目前的狀態
+
+        mtime 與大小皆未變的檔案沿用任一 artifact 已記錄的 sha256。
+        """
+        root = Path(root)
+        known: Dict[str, Dict[str, Any]] = {}
+        for entries in self.artifacts.values():
+            known.update(entries)
+
+        current = {}
+        for filepath in files:
+            rel = Path(filepath).relative_to(root).as_posix()
+            st = filepath.stat()
+            previous = known.get(rel)
+            if previous and previous["mtime_ns"] == st.st_mtime_ns and previous["size"] == st.st_size:
+                sha = previous["sha256"]
+            else:
+                sha = file_sha256(filepath)
+            current[rel] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": sha}
+        return current
+
+    def diff(self, artifact: str, current: Dict[str, Dict[str, Any]]) -> Changes:
+        """比較 artifact 前次建置時的輸入與目前狀態"""
+        if artifact not in self.artifacts:
+            return Changes(added=list(current), full=True)
+
+        previous = self.artifacts[artifact]
+        added = [rel for rel in current if rel not in previous]
+        modified = [
+            rel for rel in current
+            if rel in previous and previous[rel]["sha256"] != current[rel]["sha256"]
+        ]
+        removed = [rel for rel in previous if rel not in current]
+        return Changes(added, modified, removed)
+
+    def record(self, artifact: str, current: Dict[str, Dict[str, Any]]) -> None:
+        """記錄 artifact 建置完成時的輸入狀態"""
+        self.artifacts[artifact] = current
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"version": MANIFEST_VERSION, "artifacts": self.artifacts}, f)
+        tmp.replace(self.path)
+
+
+def refresh_artifact(name: str,
+                     files: Iterable[Path],
+                     update: Callable[[Changes, Dict[str, Dict[str, Any]]], None],
+                     output: Path,
+                     root: Path = PROJECT_ROOT,
+                     force: bool = False,
+                     manifest: Optional[Manifest] = None) -> Changes:
+    """
+    依 manifest 增量更新衍生產物
+
+    Args:
+        name: artifact 名稱（manifest 中的 key）
+        files: artifact 的所有來源檔
+        update: update(changes, current)，只需處理 changes 中的檔案；
+                changes.full 為 True 時需完整重建，changes 為空時只需更新 metadata
+        output: 產物檔案，不存在時強制完整重建
+        force: 強制完整重建
+
+    Returns:
+        本次處理的變動集合（無變動時為 falsy）
+    """
+    manifest = manifest or Manifest()
+    current = manifest.scan(root, files)
+    changes = manifest.diff(name, current)
+    if force or not Path(output).exists():
+        changes = Changes(added=list(current), full=True)
+
+    # 內容未變但 mtime 變動（例如 touch）時仍呼叫 update（changes 為空），
+    # 讓以 mtime 判斷過期的產物（如 snapshot header）同步更新
+    if changes or manifest.artifacts.get(name) != current:
+        update(changes, current)
+        manifest.record(name, current)
+        manifest.save()
+    return changes
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+FactorBase Measure DAG
+======================
+將所有 Measure 的 formula 展開為共用節點的運算圖（DAG），
+同一批次中相同的輸入與中間結果只計算一次。
+
+例如:
+    MOM_12M / MOM_6M / MOM_1M     共用 price 與 price[t - 1]
+    HIGH_52W                      共用 price
+    ME / LN_ME / BM / PB / EP ... 共用 price × shares_outstanding
+                                  （panel 未直接提供 market_cap / market_value_equity 時）
+    NSI                           ln(shares) 與其落後值共用同一個 log 節點
+
+節點以 (運算, 子節點, 參數) 去重；可交換運算（乘法）的子節點會先排序。
+計算時依建立順序（即拓撲順序）執行，中間結果在最後一個使用者算完後立即釋放。
+
+使用方式:
+    from measure_dag import build_plan, evaluate_shared
+
+    plan = build_plan(fb.measures.values(), available=panel.keys())
+    plan.stats()                  # {"nodes": ..., "naive_nodes": ..., ...}
+    results = plan.evaluate(panel)
+
+    results = evaluate_shared(fb.measures.values(), panel, normalize=True)
+"""
+
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+from formula_engine import (
+    COMPILERS, DEFAULT_PERIODS_PER_YEAR, FormulaError, derived_input, parse_window,
+    resolve_input, safe_divide, safe_log, shift, window_periods,
+)
+from rolling import rolling_std, rolling_beta, rolling_max
+
+
+# 運算名稱 → 實作(*子節點值, *參數)
+OPS = {
+    "divide": safe_divide,
+    "log": safe_log,
+    "shift": shift,
+    "minus_one": lambda x: x - 1,
+    "sub": lambda a, b: a - b,
+    "mul": lambda a, b: a * b,
+    "rolling_std": rolling_std,
+    "rolling_beta": rolling_beta,
+    "rolling_max": rolling_max,
+}
+
+COMMUTATIVE_OPS = {"mul"}
+
+
+class MissingInputError(KeyError):
+    """panel 缺少計算所需的輸入變數"""
+
+
+class MeasurePlan:
+    """
+    Measure 運算圖
+
+    nodes       節點列表，每個節點為 (運算, 子節點編號, 參數)；編號即拓撲順序
+    outputs     measure_id → 節點編號
+    skipped     measure_id → 無法納入的原因（formula 不支援或缺少輸入）
+    """
+
+    def __init__(self, available: Iterable[str], periods_per_year: int = DEFAULT_PERIODS_PER_YEAR):
+        self.available = set(available)
+        self.periods_per_year = periods_per_year
+        self.nodes: List[Tuple[str, Tuple[int, ...], Tuple[Any, ...]]] = []
+        self.outputs: Dict[str, int] = {}
+        self.skipped: Dict[str, str] = {}
+        self._ids: Dict[Tuple[str, Tuple[int, ...], Tuple[Any, ...]], int] = {}
+
+    # ------------------------------------------------------------------
+    # 建圖
+    # ------------------------------------------------------------------
+
+    def node(self, op: str, children: Tuple[int, ...] = (), params: Tuple[Any, ...] = ()) -> int:
+        """取得（或建立）節點，相同的運算只會建立一次"""
+        if op in COMMUTATIVE_OPS:
+            children = tuple(sorted(children))
+        key = (op, tuple(children), tuple(params))
+        node_id = self._ids.get(key)
+        if node_id is None:
+            node_id = self._ids[key] = len(self.nodes)
+            self.nodes.append(key)
+        return node_id
+
+    def _source(self, name: str) -> int:
+        # 與 formula_engine 相同的輸入解析（含 EQUIVALENT_INPUTS）
+        parts = resolve_input(name, self.available)
+        if parts is None:
+            raise MissingInputError(name)
+        node_id = self.node("input", params=(parts[0],))
+        for part in parts[1:]:
+            node_id = self.node("mul", (node_id, self.node("input", params=(part,))))
+        return node_id
+
+    def _input(self, name: str) -> int:
+        source, window = derived_input(name, self.periods_per_year)
+        node_id = self._source(source)
+        if window:
+            node_id = self.node("rolling_max", (node_id,), (window,))
+        return node_id
+
+    def _shift(self, node_id: int, periods: int) -> int:
+        return self.node("shift", (node_id,), (periods,)) if periods else node_id
+
+    def _lower(self, measure: Dict[str, Any]) -> int:
+        """將單一 Measure 的 formula 展開為節點，回傳輸出節點編號"""
+        formula = measure.get("formula") or {}
+        formula_type = formula.get("type")
+        compiler = COMPILERS.get(formula_type)
+        if compiler is None:
+            raise FormulaError(f"不支援的 formula.type {formula_type!r}")
+        # 沿用 formula_engine 的解析結果（輸入變數名稱與欄位檢查）
+        names, _ = compiler(formula, self.periods_per_year)
+        inputs = [self._input(name) for name in names]
+
+        if formula_type in ("ratio", "growth_rate"):
+            return self.node("divide", (inputs[0], inputs[1]))
+        if formula_type == "return":
+            window = window_periods(formula, self.periods_per_year)
+            lag = parse_window(formula.get("lag", "0"), self.periods_per_year) or 0
+            ratio = self.node("divide", (self._shift(inputs[0], lag), self._shift(inputs[0], window)))
+            return self.node("minus_one", (ratio,))
+        if formula_type == "log":
+            return self.node("log", (inputs[0],))
+        if formula_type == "log_change":
+            logged = self.node("log", (inputs[0],))
+            window = window_periods(formula, self.periods_per_year)
+            return self.node("sub", (logged, self._shift(logged, window)))
+        if formula_type == "product":
+            node_id = inputs[0]
+            for other in inputs[1:]:
+                node_id = self.node("mul", (node_id, other))
+            return node_id
+        if formula_type == "rolling":
+            window = window_periods(formula, self.periods_per_year)
+            if formula.get("metric") == "regression_beta":
+                return self.node("rolling_beta", (inputs[0], inputs[1]), (window,))
+            return self.node("rolling_std", (inputs[0],), (window,))
+        raise FormulaError(f"不支援的 formula.type {formula_type!r}")
+
+    def add_measure(self, measure: Dict[str, Any]) -> Optional[int]:
+        """加入 Measure；無法計算時記錄於 skipped 並回傳 None"""
+        measure_id = measure.get("measure_id")
+        # 失敗時捨棄本次新增的節點，避免殘留無人使用的節點
+        checkpoint = len(self.nodes)
+        try:
+            node_id = self._lower(measure)
+        except FormulaError as e:
+            reason = str(e)
+        except MissingInputError as e:
+            reason = f"缺少輸入變數: {e.args[0]}"
+        else:
+            self.outputs[measure_id] = node_id
+            return node_id
+        for key in self.nodes[checkpoint:]:
+            del self._ids[key]
+        del self.nodes[checkpoint:]
+        self.skipped[measure_id] = reason
+        return None
+
+    # ------------------------------------------------------------------
+    # 統計與計算
+    # ------------------------------------------------------------------
+
+    def _reachable(self, outputs: Iterable[int]) -> List[int]:
+        seen = set()
+        stack = list(outputs)
+        while stack:
+            node_id = stack.pop()
+            if node_id not in seen:
+                seen.add(node_id)
+                stack.extend(self.nodes[node_id][1])
+        return sorted(seen)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        共用程度統計
+
+        nodes        DAG 中的運算節點數（不含輸入）
+        naive_nodes  各 Measure 獨立計算時的運算節點總數
+        inputs       需要的 panel 變數數
+        """
+        tree_size: Dict[int, int] = {}
+        for node_id, (op, children, _) in enumerate(self.nodes):
+            tree_size[node_id] = (op != "input") + sum(tree_size[c] for c in children)
+        reachable = self._reachable(self.outputs.values())
+        return {
+            "measures": len(self.outputs),
+            "inputs": sum(1 for n in reachable if self.nodes[n][0] == "input"),
+            "nodes": sum(1 for n in reachable if self.nodes[n][0] != "input"),
+            "naive_nodes": sum(tree_size[n] for n in self.outputs.values()),
+        }
+
+    def evaluate(self, panel: Dict[str, Any],
+                 measure_ids: Optional[Iterable[str]] = None) -> Dict[str, "np.ndarray"]:
+        """
+        計算指定（預設為全部）Measures，每個節點只計算一次
+
+        回傳的陣列皆為獨立副本，可安全地原地修改（例如原地標準化）。
+        """
+        if not HAS_NUMPY:
+            raise ImportError("measure_dag 需要 numpy（pip install numpy）")
+        wanted = {m: self.outputs[m] for m in (measure_ids or self.outputs)}
+        needed = self._reachable(wanted.values())
+        output_ids = set(wanted.values())
+
+        refs: Dict[int, int] = {}
+        for node_id in needed:
+            for child in self.nodes[node_id][1]:
+                refs[child] = refs.get(child, 0) + 1
+
+        values: Dict[int, "np.ndarray"] = {}
+        for node_id in needed:
+            op, children, params = self.nodes[node_id]
+            if op == "input":
+                values[node_id] = np.asarray(panel[params[0]], dtype=np.float64)
+            else:
+                values[node_id] = OPS[op](*(values[c] for c in children), *params)
+            for child in children:
+                refs[child] -= 1
+                if refs[child] == 0 and child not in output_ids:
+                    del values[child]
+
+        results, returned = {}, set()
+        for measure_id, node_id in wanted.items():
+            value = values[node_id]
+            # 輸入節點或多個 Measure 共用同一節點時複製，避免彼此（或與 panel）共用記憶體
+            if node_id in returned or self.nodes[node_id][0] == "input":
+                value = value.copy()
+            returned.add(node_id)
+            results[measure_id] = value
+        return results
+
+
+def build_plan(measures: Iterable[Dict[str, Any]], available: Iterable[str],
+               periods_per_year: int = DEFAULT_PERIODS_PER_YEAR) -> MeasurePlan:
+    """
+    由 Measure 定義建立共用節點的運算圖
+
+    Args:
+        measures: Measure 定義
+        available: panel 中可用的變數名稱
+    """
+    plan = MeasurePlan(available, periods_per_year)
+    for measure in measures:
+        plan.add_measure(measure)
+    return plan
+
+
+def evaluate_shared(measures: Iterable[Dict[str, Any]], panel: Dict[str, Any],
+                    periods_per_year: int = DEFAULT_PERIODS_PER_YEAR,
+                    normalize: bool = False) -> Dict[str, "np.ndarray"]:
+    """
+    以共用運算圖計算多個 Measures（無法計算者略過，原因見 build_plan().skipped）
+
+    結果與 formula_engine.evaluate_all() 相同，但共用的輸入與中間結果只計算一次。
+    """
+    measures = list(measures)
+    plan = build_plan(measures, panel.keys(), periods_per_year)
+    results = plan.evaluate(panel)
+    if normalize:
+        from normalization import Normalizer
+        normalizer = Normalizer()
+        for measure in measures:
+            values = results.get(measure.get("measure_id"))
+            if values is not None:
+                normalizer.apply(measure, values, out=values)
+    return results
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+FactorBase Normalization
+========================
+依 Measure 的 normalization 欄位，對整個 (dates × assets) panel
+一次完成逐日橫斷面標準化，不需要逐日迴圈。
+
+支援的 normalization:
+    zscore_cross_sectional   每日 (x - mean) / std（樣本標準差）
+    rank                     每日百分位排名，縮放至 [0, 1]（同值取平均排名）
+    percentile               同 rank，縮放至 [0, 100]
+    winsorize                每日以分位數截尾（預設 1% / 99%）
+    zscore_time_series       每個資產沿時間軸 (x - mean) / std（全樣本）
+    log_transform            ln(x)，x <= 0 時為 NaN
+    none                     不轉換
+
+NaN 不參與計算並維持 NaN；有效樣本數少於 min_count 的日期整列輸出 NaN。
+所有函式皆接受 out 參數寫入預先配置的陣列；Normalizer 另外重用內部暫存，
+大型 universe 反覆計算時不會持續配置記憶體。
+
+使用方式:
+    from normalization import normalize, normalize_measure, Normalizer
+
+    z = normalize(values, "zscore_cross_sectional")
+    z = normalize_measure(fb.get_measure("BM"), values)
+
+    normalizer = Normalizer(min_count=5)
+    for measure_id, values in results.items():
+        normalizer.apply(fb.get_measure(measure_id), values, out=values)   # in-place
+"""
+
+from typing import Optional, Dict, Any, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+# 橫斷面最少有效樣本數，低於此數的日期輸出 NaN
+DEFAULT_MIN_COUNT = 3
+
+# winsorize 預設上下截尾比例
+DEFAULT_LIMITS = (0.01, 0.99)
+
+METHODS = (
+    "zscore_cross_sectional", "zscore_time_series", "rank", "percentile",
+    "winsorize", "log_transform", "none",
+)
+
+
+class NormalizationError(ValueError):
+    """不支援的 normalization 或輸入形狀錯誤"""
+
+
+def _require_numpy() -> None:
+    if not HAS_NUMPY:
+        raise ImportError("normalization 需要 numpy（pip install numpy）")
+
+
+def _prepare(values, out: Optional["np.ndarray"]) -> Tuple["np.ndarray", "np.ndarray"]:
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim != 2:
+        raise NormalizationError(f"values 必須為 (dates × assets) 二維陣列，得到 shape {values.shape}")
+    if out is None:
+        out = np.empty_like(values)
+    elif out.shape != values.shape or out.dtype != np.float64:
+        raise NormalizationError(f"out 必須為 float64 且 shape 為 {values.shape}")
+    return values, out
+
+
+def zscore_cross_sectional(values, out=None, min_count: int = DEFAULT_MIN_COUNT,
+                           mask: Optional["np.ndarray"] = None) -> "np.ndarray":
+    """
+    每日橫斷面 z-score
+
+    除了逐日的統計量（長度為 dates 的向量）外，所有運算都在 out 中原地完成；
+    缺值遮罩只計算一次，mask 可傳入預先配置的 bool 暫存陣列。out 可與 values 為同一陣列。
+    """
+    values, out = _prepare(values, out)
+    missing = np.isnan(values, out=mask)
+    count = values.shape[1] - np.count_nonzero(missing, axis=1)
+    if out is not values:
+        np.copyto(out, values)
+    np.copyto(out, 0.0, where=missing)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = out.sum(axis=1) / count
+        np.subtract(out, mean[:, None], out=out)
+        np.copyto(out, 0.0, where=missing)
+        std = np.sqrt(np.einsum("ij,ij->i", out, out) / (count - 1))
+        # 橫斷面全部相同時 z-score 為 0
+        std[std == 0] = 1.0
+        np.divide(out, std[:, None], out=out)
+
+    np.copyto(out, np.nan, where=missing)
+    out[count < max(min_count, 2)] = np.nan
+    return out
+
+
+def rank_cross_sectional(values, out=None, min_count: int = DEFAULT_MIN_COUNT,
+                         scale: float = 1.0) -> "np.ndarray":
+    """
+    每日橫斷面百分位排名: (平均排名 - 1) / (有效樣本數 - 1) × scale
+
+    同值取平均排名；以排序後的區段起訖位置向量化計算，不逐日迴圈。
+    """
+    values, out = _prepare(values, out)
+    n_dates, n_assets = values.shape
+    missing = np.isnan(values)
+    count = n_assets - np.count_nonzero(missing, axis=1)
+
+    order = np.argsort(values, axis=1, kind="stable")      # NaN 排在最後
+    ordered = np.take_along_axis(values, order, axis=1)
+    positions = np.broadcast_to(np.arange(n_assets), (n_dates, n_assets))
+
+    # 同值區段的起點與終點（NaN 彼此不相等，各自成一段）
+    starts = np.ones((n_dates, n_assets), dtype=bool)
+    starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    ends = np.ones((n_dates, n_assets), dtype=bool)
+    ends[:, :-1] = starts[:, 1:]
+    first = np.maximum.accumulate(np.where(starts, positions, 0), axis=1)
+    last = np.minimum.accumulate(np.where(ends, positions, n_assets)[:, ::-1], axis=1)[:, ::-1]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ranks = (first + last) / 2.0 / (count - 1)[:, None] * scale
+    np.put_along_axis(out, order, ranks, axis=1)
+
+    np.copyto(out, np.nan, where=missing)
+    out[count < max(min_count, 2)] = np.nan
+    return out
+
+
+def winsorize_cross_sectional(values, out=None, min_count: int = DEFAULT_MIN_COUNT,
+                              limits: Tuple[float, float] = DEFAULT_LIMITS) -> "np.ndarray":
+    """每日以 limits 分位數截尾（NaN 維持 NaN）"""
+    values, out = _prepare(values, out)
+    count = values.shape[1] - np.count_nonzero(np.isnan(values), axis=1)
+    small = count < max(min_count, 1)
+    lower, upper = np.full(len(values), np.nan), np.full(len(values), np.nan)
+    if (~small).any():
+        lower[~small], upper[~small] = np.nanquantile(values[~small], limits, axis=1)
+    np.clip(values, lower[:, None], upper[:, None], out=out)
+    out[small] = np.nan
+    return out
+
+
+def zscore_time_series(values, out=None, min_count: int = DEFAULT_MIN_COUNT,
+                       mask: Optional["np.ndarray"] = None) -> "np.ndarray":
+    """
+    每個資產沿時間軸的全樣本 z-score（即轉置後的橫斷面 z-score）
+
+    mask 為 (assets × dates) 的 bool 暫存陣列。
+    """
+    values, out = _prepare(values, out)
+    zscore_cross_sectional(values.T, out.T, min_count, mask=mask)
+    return out
+
+
+def log_transform(values, out=None, mask: Optional["np.ndarray"] = None) -> "np.ndarray":
+    """ln(x)，x <= 0 或 NaN 時為 NaN（mask 可傳入預先配置的 bool 暫存陣列）"""
+    values, out = _prepare(values, out)
+    positive = np.greater(values, 0, out=mask)
+    np.log(values, out=out, where=positive)
+    np.copyto(out, np.nan, where=np.logical_not(positive, out=positive))
+    return out
+
+
+def normalize(values, method: str, out=None, min_count: int = DEFAULT_MIN_COUNT,
+              limits: Tuple[float, float] = DEFAULT_LIMITS) -> "np.ndarray":
+    """依 normalization 名稱標準化整個 panel"""
+    _require_numpy()
+    if method == "zscore_cross_sectional":
+        return zscore_cross_sectional(values, out, min_count)
+    if method == "rank":
+        return rank_cross_sectional(values, out, min_count)
+    if method == "percentile":
+        return rank_cross_sectional(values, out, min_count, scale=100.0)
+    if method == "winsorize":
+        return winsorize_cross_sectional(values, out, min_count, limits)
+    if method == "zscore_time_series":
+        return zscore_time_series(values, out, min_count)
+    if method == "log_transform":
+        return log_transform(values, out)
+    if method == "none":
+        values, out = _prepare(values, out)
+        if out is not values:
+            np.copyto(out, values)
+        return out
+    raise NormalizationError(f"不支援的 normalization: {method!r}（可用: {', '.join(METHODS)}）")
+
+
+def normalize_measure(measure: Dict[str, Any], values, out=None,
+                      min_count: int = DEFAULT_MIN_COUNT) -> "np.ndarray":
+    """依 Measure 定義中的 normalization 欄位標準化（未指定時視為 none）"""
+    return normalize(values, measure.get("normalization") or "none", out, min_count)
+
+
+class Normalizer:
+    """
+    重用暫存陣列的標準化器
+
+    同一 shape 反覆呼叫時，zscore / log_transform 的 bool 遮罩暫存只配置一次；
+    搭配 out=values 可完全原地計算。
+    """
+
+    def __init__(self, min_count: int = DEFAULT_MIN_COUNT,
+                 limits: Tuple[float, float] = DEFAULT_LIMITS):
+        _require_numpy()
+        self.min_count = min_count
+        self.limits = limits
+        self._masks: Dict[Tuple[int, ...], "np.ndarray"] = {}
+
+    def _mask(self, shape: Tuple[int, ...]) -> "np.ndarray":
+        mask = self._masks.get(shape)
+        if mask is None:
+            mask = self._masks[shape] = np.empty(shape, dtype=bool)
+        return mask
+
+    def normalize(self, values, method: str, out=None) -> "np.ndarray":
+        if method in ("zscore_cross_sectional", "zscore_time_series", "log_transform"):
+            values = np.asarray(values, dtype=np.float64)
+            if method == "zscore_cross_sectional":
+                return zscore_cross_sectional(values, out, self.min_count, mask=self._mask(values.shape))
+            if method == "zscore_time_series":
+                return zscore_time_series(values, out, self.min_count, mask=self._mask(values.shape[::-1]))
+            return log_transform(values, out, mask=self._mask(values.shape))
+        return normalize(values, method, out, self.min_count, self.limits)
+
+    def apply(self, measure: Dict[str, Any], values, out=None) -> "np.ndarray":
+        """依 Measure 的 normalization 欄位標準化"""
+        return self.normalize(values, measure.get("normalization") or "none", out)
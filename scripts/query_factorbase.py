@@ -12,65 +12,56 @@ FactorBase Query Tool
     python query_factorbase.py --list-measures
     python query_factorbase.py --list-factors
     python query_factorbase.py --paper-measures paper_001
+    python query_factorbase.py --measure-papers BM
+    python query_factorbase.py --factor-papers Value --role primary_sorting_variable
+    python query_factorbase.py --co-used MOM_12M
+    python query_factorbase.py --search "low volatility"
+    python query_factorbase.py --query "measures where factor=Value select measure_id"
+    python query_factorbase.py --backend sqlite --measure BM
+    python query_factorbase.py --backend lazy --list-papers --ndjson
+    python query_factorbase.py --sql "SELECT market, COUNT(*) AS n FROM papers GROUP BY market"
+    python query_factorbase.py --serve --port 8765
+    python query_factorbase.py --measures BM,EP_TTM,MOM_12M
+    python query_factorbase.py --from-file ids.txt --kind paper
+    cat requests.ndjson | python query_factorbase.py --batch
+    python query_factorbase.py --list-papers --ndjson | jq -r .title
 """
 
 import argparse
 import json
 import os
-from pathlib import Path
-from typing import Optional, List, Dict, Any
+import sys
+from typing import Optional, List, Dict, Any, Iterable, Iterator, TextIO
 
-
-# 專案根目錄
-PROJECT_ROOT = Path(__file__).parent.parent
-
-
-def load_json(filepath: Path) -> Optional[Dict[str, Any]]:
-    """載入 JSON 檔案"""
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print(f"❌ 檔案不存在: {filepath}")
-        return None
-    except json.JSONDecodeError as e:
-        print(f"❌ JSON 解析錯誤: {filepath} - {e}")
-        return None
+import instrumentation
+from factorbase import BACKENDS, get_catalog, get_catalog_backend
+import search as fulltext
+from catalog_query import QuerySyntaxError, query as run_query, explain as explain_query
+from records import json_default
 
 
 def get_measure(measure_id: str) -> Optional[Dict[str, Any]]:
     """
     根據 measure_id 查詢 Measure 定義
     """
-    index_path = PROJECT_ROOT / "measures" / "index.json"
-    index = load_json(index_path)
-    if not index:
-        return None
-    
-    # 在 index 中搜尋 measure
-    for factor_group in index.get("factors", []):
-        for measure in factor_group.get("measures", []):
-            if measure.get("measure_id") == measure_id:
-                # 找到後載入完整 JSON
-                measure_file = PROJECT_ROOT / "measures" / measure.get("file")
-                return load_json(measure_file)
-    
-    print(f"❌ 找不到 Measure: {measure_id}")
-    return None
+    fb = get_catalog()
+    measure = fb.get_measure(measure_id)
+    if not measure:
+        print(f"❌ 找不到 Measure: {measure_id}")
+        suggestions = fb.suggest_measures(measure_id)
+        if suggestions:
+            names = ", ".join(s["measure_id"] for s in suggestions)
+            print(f"   您是不是要找: {names}")
+    return measure
 
 
 def get_paper(paper_id: str) -> Optional[Dict[str, Any]]:
     """
     根據 paper_id 查詢論文資訊
     """
-    # paper_id 格式為 paper_001，檔案為 paper_001.json
-    paper_path = PROJECT_ROOT / "papers" / "metadata" / f"{paper_id}.json"
-    paper = load_json(paper_path)
-    
+    paper = get_catalog().get_paper(paper_id)
     if not paper:
         print(f"❌ 找不到論文: {paper_id}")
-        return None
-    
     return paper
 
 
@@ -78,23 +69,9 @@ def get_measures_by_factor(factor: str) -> List[Dict[str, Any]]:
     """
     根據因子類別取得所有 Measures
     """
-    index_path = PROJECT_ROOT / "measures" / "index.json"
-    index = load_json(index_path)
-    if not index:
-        return []
-    
-    results = []
-    for factor_group in index.get("factors", []):
-        if factor_group.get("factor", "").lower() == factor.lower():
-            for measure in factor_group.get("measures", []):
-                measure_file = PROJECT_ROOT / "measures" / measure.get("file")
-                measure_data = load_json(measure_file)
-                if measure_data:
-                    results.append(measure_data)
-    
+    results = get_catalog().get_measures_by_factor(factor)
     if not results:
         print(f"❌ 找不到因子類別: {factor}")
-    
     return results
 
 
@@ -102,86 +79,160 @@ def get_paper_measures(paper_id: str) -> List[Dict[str, Any]]:
     """
     取得特定論文使用的所有 Measures
     """
-    relations_path = PROJECT_ROOT / "relations" / "paper_measures.json"
-    relations = load_json(relations_path)
-    if not relations:
-        return []
-    
-    results = []
-    for link in relations.get("paper_measure_links", []):
-        if link.get("paper_id") == paper_id:
-            results.append(link)
-    
-    return results
+    return get_catalog().get_paper_measures(paper_id)
+
+
+def get_measure_papers(measure_id: str, role: Optional[str] = None,
+                       significance: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    取得使用特定 Measure 的所有 Paper-Measure 連結（反向查詢）
+    """
+    return get_catalog().graph.papers_using_measure(measure_id, role, significance)
+
+
+def get_factor_papers(factor: str, role: Optional[str] = None,
+                      significance: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    取得使用特定因子任一 Measure 的論文（可依 role / significance 篩選）
+    """
+    return get_catalog().graph.papers_using_factor(factor, role, significance)
+
+
+def get_co_used_measures(measure_id: str) -> List[Dict[str, Any]]:
+    """
+    取得與特定 Measure 出現在同一篇論文的其他 Measures
+    """
+    return get_catalog().graph.co_used_measures(measure_id)
 
 
 def list_papers() -> List[Dict[str, Any]]:
     """
     列出所有論文
     """
-    papers_dir = PROJECT_ROOT / "papers" / "metadata"
-    results = []
-    
-    for paper_file in sorted(papers_dir.glob("paper_*.json")):
-        paper = load_json(paper_file)
-        if paper:
-            results.append({
-                "paper_id": paper.get("paper_id"),
-                "title": paper.get("title"),
-                "authors": paper.get("authors"),
-                "year": paper.get("year"),
-                "journal": paper.get("journal")
-            })
-    
-    return results
+    return get_catalog().list_papers()
 
 
 def list_measures() -> List[Dict[str, str]]:
     """
     列出所有 Measures（摘要）
     """
-    index_path = PROJECT_ROOT / "measures" / "index.json"
-    index = load_json(index_path)
-    if not index:
-        return []
-    
-    results = []
-    for factor_group in index.get("factors", []):
-        factor_name = factor_group.get("factor")
-        for measure in factor_group.get("measures", []):
-            results.append({
-                "measure_id": measure.get("measure_id"),
-                "display_name": measure.get("display_name"),
-                "factor": factor_name,
-                "original_paper_id": measure.get("original_paper_id")
-            })
-    
-    return results
+    return get_catalog().list_measures()
 
 
 def list_factors() -> List[Dict[str, Any]]:
     """
     列出所有因子類別
     """
-    index_path = PROJECT_ROOT / "measures" / "index.json"
-    index = load_json(index_path)
-    if not index:
-        return []
-    
-    results = []
-    for factor_group in index.get("factors", []):
-        results.append({
-            "factor": factor_group.get("factor"),
-            "count": factor_group.get("count"),
-            "measures": [m.get("measure_id") for m in factor_group.get("measures", [])]
-        })
-    
-    return results
+    return get_catalog().list_factors()
+
+
+def iter_listing(name: str) -> Iterator[Dict[str, Any]]:
+    """
+    列表的串流版本（papers、measures 或 factors），供 --ndjson 逐筆輸出
+    """
+    fb = get_catalog()
+    listings = {"papers": fb.iter_papers, "measures": fb.iter_measures, "factors": fb.iter_factors}
+    return listings[name]()
+
+
+def search(query: str, limit: int = 10, types: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    全文檢索論文、Measures 與因子（BM25 排序）
+    """
+    if get_catalog_backend() == "sqlite":
+        from sqlite_store import get_store
+        return get_store().search(query, limit, types)
+    return fulltext.search(query, limit, types)
+
+
+def run_sql(query: str) -> List[Dict[str, Any]]:
+    """
+    在 SQLite 後端執行唯讀 SQL（資料表見 sqlite_store.py）
+    """
+    from sqlite_store import get_store
+    return get_store().sql(query)
+
+
+def iter_lookups(ids: Iterable[str], kind: str = "measure") -> Iterator[Dict[str, Any]]:
+    """
+    批次查詢，逐筆產生 {"id", "result"} 或 {"id", "error"}（Measure 另附 suggestions）
+    """
+    fb = get_catalog()
+    messages = {"measure": "找不到 Measure", "paper": "找不到論文", "factor": "找不到因子類別"}
+    for item, result in fb.iter_many(ids, kind):
+        if result is not None:
+            yield {"id": item, "result": result}
+            continue
+        record = {"id": item, "error": f"{messages[kind]}: {item}"}
+        if kind == "measure":
+            suggestions = [s["measure_id"] for s in fb.suggest_measures(item)]
+            if suggestions:
+                record["suggestions"] = suggestions
+        yield record
+
+
+def read_ids(stream: TextIO) -> Iterator[str]:
+    """逐行讀取 ID（忽略空行與 # 註解，一行可用逗號分隔多個 ID）"""
+    for line in stream:
+        line = line.split("#", 1)[0]
+        for item in line.split(","):
+            item = item.strip()
+            if item:
+                yield item
+
+
+def iter_requests(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    """
+    逐行執行 NDJSON 請求（格式同查詢服務，例如 {"op": "measure", "id": "BM"}）
+    """
+    from server import OPERATIONS, QueryError
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield {"line": number, "error": f"JSON 解析錯誤: {e}"}
+            continue
+        if not isinstance(request, dict):
+            yield {"line": number, "error": "請求需為 JSON object"}
+            continue
+        op = request.get("op")
+        params = {k: v for k, v in request.items() if k != "op"}
+        handler = OPERATIONS.get(op)
+        if handler is None:
+            yield {"line": number, "op": op, **params, "error": f"未知的 op: {op}"}
+            continue
+        try:
+            yield {"op": op, **params, "result": handler(get_catalog(), params)}
+        except (QueryError, TypeError, ValueError) as e:
+            yield {"op": op, **params, "error": str(e)}
+
+
+def print_ndjson(records: Iterable[Any], stream: Optional[TextIO] = None) -> int:
+    """
+    逐筆輸出 NDJSON（每筆立即 flush），回傳筆數
+
+    stream 預設為呼叫當下的 sys.stdout（可被 redirect_stdout 導向）。
+    下游提早關閉管線時（例如 | head）停止輸出，不視為錯誤。
+    """
+    stream = stream or sys.stdout
+    count = 0
+    try:
+        for record in records:
+            stream.write(json.dumps(record, ensure_ascii=False, default=json_default) + "\n")
+            stream.flush()
+            count += 1
+    except BrokenPipeError:
+        # 將 stdout 導向 devnull，避免直譯器結束時 flush 再次出錯
+        if stream is sys.stdout:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    return count
 
 
 def print_json(data: Any, indent: int = 2) -> None:
     """格式化輸出 JSON"""
-    print(json.dumps(data, ensure_ascii=False, indent=indent))
+    print(json.dumps(data, ensure_ascii=False, indent=indent, default=json_default))
 
 
 def main():
@@ -194,9 +245,25 @@ def main():
     python query_factorbase.py --paper paper_001
     python query_factorbase.py --factor Value
     python query_factorbase.py --paper-measures paper_001
+    python query_factorbase.py --measure-papers BM
+    python query_factorbase.py --factor-papers Value --role primary_sorting_variable --significance positive
+    python query_factorbase.py --co-used MOM_12M
     python query_factorbase.py --list-papers
     python query_factorbase.py --list-measures
     python query_factorbase.py --list-factors
+    python query_factorbase.py --list-papers --ndjson | jq -r .title   # 逐筆串流輸出
+    python query_factorbase.py --search "accruals"
+    python query_factorbase.py --search "低波動" --type paper
+    python query_factorbase.py --query "measures where factor=Value and formula.type=ratio select measure_id,display_name"
+    python query_factorbase.py --query "links where role=primary_sorting_variable" --explain
+    python query_factorbase.py --backend sqlite --search "低波動"
+    python query_factorbase.py --sql "SELECT measure_id, formula_type FROM measures WHERE factor = 'Value'"
+    python query_factorbase.py --measures BM,EP_TTM,MOM_12M   # 批次查詢，NDJSON 輸出
+    python query_factorbase.py --papers paper_001,paper_002
+    python query_factorbase.py --from-file ids.txt --kind measure
+    echo '{"op": "measure", "id": "BM"}' | python query_factorbase.py --batch
+    python query_factorbase.py --serve                      # 常駐查詢服務，見 server.py
+    python query_factorbase.py --serve --socket /tmp/factorbase.sock
         """
     )
     
@@ -206,18 +273,103 @@ def main():
     parser.add_argument("--factor", "-f", type=str, help="查詢指定因子的所有 Measures (e.g., Value)")
     parser.add_argument("--paper-measures", "-pm", type=str, help="查詢論文使用的 Measures (e.g., paper_001)")
     
+    # 關係查詢
+    parser.add_argument("--measure-papers", "-mp", type=str, help="查詢使用指定 Measure 的論文 (e.g., BM)")
+    parser.add_argument("--factor-papers", "-fp", type=str, help="查詢使用指定因子任一 Measure 的論文 (e.g., Value)")
+    parser.add_argument("--co-used", type=str, help="查詢與指定 Measure 同時使用的 Measures (e.g., MOM_12M)")
+    parser.add_argument("--role", type=str, help="依連結 role 篩選 (e.g., primary_sorting_variable)")
+    parser.add_argument("--significance", type=str, help="依連結 significance 篩選 (e.g., positive)")
+    
+    # 批次查詢（NDJSON 輸出）
+    parser.add_argument("--measures", type=str, help="批次查詢多個 Measures，以逗號分隔 (e.g., BM,EP_TTM)")
+    parser.add_argument("--papers", type=str, help="批次查詢多篇論文，以逗號分隔 (e.g., paper_001,paper_002)")
+    parser.add_argument("--from-file", type=str, metavar="FILE",
+                        help="由檔案逐行讀取 ID 批次查詢（- 表示 stdin），類型由 --kind 指定")
+    parser.add_argument("--kind", choices=["measure", "paper", "factor"], default="measure",
+                        help="--from-file 的查詢類型（預設 measure）")
+    parser.add_argument("--batch", action="store_true",
+                        help="由 stdin 讀取 NDJSON 請求（{\"op\": \"measure\", \"id\": \"BM\"}）並逐行輸出結果")
+    
     # 列表
     parser.add_argument("--list-papers", action="store_true", help="列出所有論文")
     parser.add_argument("--list-measures", action="store_true", help="列出所有 Measures")
     parser.add_argument("--list-factors", action="store_true", help="列出所有因子類別")
     
+    # 全文檢索
+    parser.add_argument("--search", "-s", type=str, help="全文檢索論文、Measures 與因子")
+    parser.add_argument("--type", "-t", action="append", choices=["paper", "measure", "factor"],
+                        help="只檢索指定類型（可重複指定）")
+    parser.add_argument("--limit", "-n", type=int, default=10, help="檢索結果筆數上限（預設 10）")
+    
+    # 宣告式查詢
+    parser.add_argument("--query", "-q", type=str,
+                        help="宣告式查詢 (e.g., \"measures where factor=Value select measure_id\")")
+    parser.add_argument("--explain", action="store_true", help="顯示 --query 的查詢計畫而非結果")
+    
+    # SQLite 後端
+    parser.add_argument("--sql", type=str, help="在 SQLite 後端執行唯讀 SQL 查詢")
+    parser.add_argument("--backend", choices=BACKENDS, default="json",
+                        help="資料來源: json（檔案樹 / snapshot）、sqlite（.factorbase/factorbase.sqlite）"
+                             "或 lazy（只常駐標頭，文件於存取時載入）")
+    
+    # 查詢服務
+    parser.add_argument("--serve", action="store_true", help="啟動常駐的本機查詢服務（JSON over HTTP）")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="--serve 監聽位址（預設 127.0.0.1）")
+    parser.add_argument("--port", type=int, default=8765, help="--serve 監聽埠號（預設 8765）")
+    parser.add_argument("--socket", type=str, help="--serve 改以 Unix socket 提供服務")
+    parser.add_argument("--verbose", action="store_true", help="--serve 時記錄每個請求")
+    
     # 輸出格式
     parser.add_argument("--compact", action="store_true", help="緊湊輸出（無縮排）")
+    parser.add_argument("--ndjson", action="store_true",
+                        help="--list-papers / --list-measures / --list-factors 改為逐筆輸出 NDJSON（不含標題）")
     
+    instrumentation.add_arguments(parser)
     args = parser.parse_args()
+    instrumentation.setup(args)
+    
+    listing = ("papers" if args.list_papers else "measures" if args.list_measures
+               else "factors" if args.list_factors else None)
+    if args.ndjson and not listing:
+        parser.error("--ndjson 需搭配 --list-papers、--list-measures 或 --list-factors")
     
     indent = None if args.compact else 2
     
+    get_catalog(backend=args.backend)
+    
+    if args.serve:
+        from server import serve
+        try:
+            serve(args.host, args.port, args.socket, verbose=args.verbose)
+        except FileExistsError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        return
+    
+    # 批次查詢: 以 NDJSON 逐筆輸出
+    if args.measures or args.papers:
+        kind, ids = ("measure", args.measures) if args.measures else ("paper", args.papers)
+        print_ndjson(iter_lookups(read_ids([ids]), kind))
+        return
+    if args.from_file:
+        if args.from_file == "-":
+            print_ndjson(iter_lookups(read_ids(sys.stdin), args.kind))
+        else:
+            try:
+                f = open(args.from_file, 'r', encoding='utf-8')
+            except OSError as e:
+                print(f"❌ 無法讀取 {args.from_file}: {e.strerror or e}")
+                sys.exit(1)
+            with f:
+                print_ndjson(iter_lookups(read_ids(f), args.kind))
+        return
+    if args.batch:
+        print_ndjson(iter_requests(sys.stdin))
+        return
+    if args.ndjson:
+        print_ndjson(iter_listing(listing))
+        return
+    
     # 處理查詢
     if args.measure:
         result = get_measure(args.measure)
@@ -249,6 +401,33 @@ def main():
         else:
             print("沒有找到相關連結")
     
+    elif args.measure_papers:
+        results = get_measure_papers(args.measure_papers, args.role, args.significance)
+        print(f"\n🔗 Papers using {args.measure_papers} ({len(results)} links)")
+        print("=" * 50)
+        if results:
+            print_json(results, indent)
+        else:
+            print("沒有找到相關連結")
+    
+    elif args.factor_papers:
+        results = get_factor_papers(args.factor_papers, args.role, args.significance)
+        print(f"\n📁 Papers using {args.factor_papers} measures ({len(results)} papers)")
+        print("=" * 50)
+        if results:
+            print_json(results, indent)
+        else:
+            print("沒有找到相關論文")
+    
+    elif args.co_used:
+        results = get_co_used_measures(args.co_used)
+        print(f"\n🔗 Measures co-used with {args.co_used} ({len(results)} measures)")
+        print("=" * 50)
+        if results:
+            print_json(results, indent)
+        else:
+            print("沒有找到相關 Measures")
+    
     elif args.list_papers:
         results = list_papers()
         print(f"\n📚 All Papers ({len(results)} papers)")
@@ -267,6 +446,47 @@ def main():
         print("=" * 50)
         print_json(results, indent)
     
+    elif args.query:
+        try:
+            result = explain_query(args.query) if args.explain else run_query(args.query)
+        except QuerySyntaxError as e:
+            print(f"❌ 查詢語法錯誤: {e}")
+            return
+        if args.explain:
+            print(f"\n🧭 Query plan: {args.query}")
+            print("=" * 50)
+            print_json(result, indent)
+        else:
+            print(f"\n🔎 Query: {args.query} ({len(result)} results)")
+            print("=" * 50)
+            if result:
+                print_json(result, indent)
+            else:
+                print("沒有符合條件的資料")
+    
+    elif args.sql:
+        import sqlite3
+        try:
+            results = run_sql(args.sql)
+        except sqlite3.Error as e:
+            print(f"❌ SQL 錯誤: {e}")
+            return
+        print(f"\n🗄️ SQL: {args.sql} ({len(results)} rows)")
+        print("=" * 50)
+        if results:
+            print_json(results, indent)
+        else:
+            print("沒有符合條件的資料")
+    
+    elif args.search:
+        results = search(args.search, args.limit, args.type)
+        print(f"\n🔍 Search: {args.search} ({len(results)} results)")
+        print("=" * 50)
+        if results:
+            print_json(results, indent)
+        else:
+            print("沒有找到相關結果")
+    
     else:
         parser.print_help()
 
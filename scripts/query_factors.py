@@ -14,6 +14,9 @@ import sys
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 
+import instrumentation
+from records import Factor
+
 
 class FactorsQuery:
     """Class to query factors from factors.json."""
@@ -26,10 +29,13 @@ class FactorsQuery:
             factors_file: Path to the factors.json file
         """
         try:
-            with open(factors_file, 'r', encoding='utf-8') as f:
-                self.data = json.load(f)
-            self.factors = self.data['factors']
+            with instrumentation.timer("io.read"), open(factors_file, 'r', encoding='utf-8') as f:
+                text = f.read()
+            with instrumentation.timer("json.decode"):
+                self.data = json.loads(text)
+            self.factors = self.data['factors'] = [Factor.from_dict(f) for f in self.data['factors']]
             self.metadata = self.data.get('metadata', {})
+            self._build_indexes()
         except FileNotFoundError:
             print(f"Error: factors.json not found at {factors_file}")
             print("Please ensure you're running the script from the correct directory.")
@@ -43,6 +49,17 @@ class FactorsQuery:
             print("The JSON file may be corrupted or have an incorrect structure.")
             sys.exit(1)
     
+    @instrumentation.timed("index.factors")
+    def _build_indexes(self):
+        """Build lookup tables so name, ID and style queries avoid linear scans."""
+        self._by_name = {}
+        self._by_id = {}
+        self._by_style = {}
+        for factor in self.factors:
+            self._by_name.setdefault(factor['factor_name'].lower(), factor)
+            self._by_id.setdefault(factor['factor_id'], factor)
+            self._by_style.setdefault(factor['style'].lower(), []).append(factor)
+    
     def list_all(self) -> List[Dict[str, Any]]:
         """
         Get all factors.
@@ -62,10 +79,7 @@ class FactorsQuery:
         Returns:
             Factor dictionary or None if not found
         """
-        for factor in self.factors:
-            if factor['factor_name'].lower() == name.lower():
-                return factor
-        return None
+        return self._by_name.get(name.lower())
     
     def get_by_id(self, factor_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -77,10 +91,7 @@ class FactorsQuery:
         Returns:
             Factor dictionary or None if not found
         """
-        for factor in self.factors:
-            if factor['factor_id'] == factor_id:
-                return factor
-        return None
+        return self._by_id.get(factor_id)
     
     def filter_by_style(self, style: str) -> List[Dict[str, Any]]:
         """
@@ -92,7 +103,7 @@ class FactorsQuery:
         Returns:
             List of factor dictionaries matching the style
         """
-        return [f for f in self.factors if f['style'].lower() == style.lower()]
+        return list(self._by_style.get(style.lower(), []))
     
     def display_factor(self, factor: Dict[str, Any], language: str = 'en'):
         """
@@ -138,6 +149,7 @@ class FactorsQuery:
 
 def main():
     """Main entry point for the query script."""
+    instrumentation.setup_from_argv(sys.argv)
     # Get the project root directory
     script_dir = Path(__file__).parent
     project_root = script_dir.parent
@@ -188,6 +200,7 @@ def print_usage():
     print("  python query_factors.py list [en|zh]          - List all factors")
     print("  python query_factors.py get <name> [en|zh]    - Get factor by name")
     print("  python query_factors.py style <style>         - Filter by style")
+    print("  (add --timings or --profile[=PATH] to any command for a timing breakdown)")
     print("\nExamples:")
     print("  python query_factors.py list")
     print("  python query_factors.py list zh")
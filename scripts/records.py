@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+FactorBase Records
+==================
+Paper、Measure、Formula、PaperMeasureLink、Factor 的精簡紀錄型別（__slots__），
+取代目錄中逐筆保存的 dict，降低每筆資料的記憶體用量。
+
+- 欄位依 docs/schemas/ 的順序宣告為 slot；Schema 以外的欄位保存於 _extra（沒有時為 None）
+- enum 類欄位（role、significance、market、asset_class、conclusion_sign ...）與
+  links 的 paper_id / measure_id 以 sys.intern 共用同一個字串物件
+- 實作唯讀的 Mapping 介面（[]、get、in、keys、items、dict(record)），
+  並可以屬性存取（link.role），可直接取代原本的 dict；與內容相同的 dict 比較時相等
+- json.dumps 需加上 default=json_default（或先 to_dict()）
+- dict(record) 只是淺層複製（Measure 的 formula 仍為 Formula 紀錄，無法直接 json.dumps）；
+  需要可修改、可序列化的 dict 時一律使用 to_dict()（巢狀紀錄亦轉為 dict）
+
+使用方式:
+    from records import Paper, PaperMeasureLink, json_default
+
+    link = PaperMeasureLink.from_dict({"paper_id": "paper_001", "measure_id": "BM",
+                                       "role": "primary_sorting_variable"})
+    link.role, link["measure_id"], link.get("significance")
+    link.to_dict()
+    json.dumps(link, default=json_default)
+"""
+
+import sys
+from collections.abc import Mapping
+from typing import Optional, Dict, Any, FrozenSet, Iterator, Tuple, Type
+
+_intern = sys.intern
+
+
+class Record(Mapping):
+    """
+    __slots__ 紀錄的基底類別
+
+    子類別宣告 _fields（同時作為 __slots__）、_interned（需 intern 的字串欄位）
+    與 _nested（欄位 → 巢狀紀錄型別，例如 Measure.formula → Formula）。
+    未出現在原始資料中的欄位不設定（不同於值為 None），to_dict() 時亦不輸出。
+    """
+
+    __slots__ = ("_extra",)
+
+    _fields: Tuple[str, ...] = ()
+    _interned: FrozenSet[str] = frozenset()
+    _nested: Dict[str, Type["Record"]] = {}
+    _field_set: FrozenSet[str] = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls._fields)
+
+    def __init__(self, **fields: Any):
+        self._extra: Optional[Dict[str, Any]] = None
+        for key, value in fields.items():
+            self._set(key, value)
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Record":
+        """由 JSON 解析後的 dict 建立紀錄（已是同型別的紀錄時直接回傳）"""
+        if type(data) is cls:
+            return data
+        record = cls.__new__(cls)
+        record._extra = None
+        # 載入目錄時的熱路徑（links 可達數十萬筆），內容同 _set()
+        fields, interned, nested = cls._field_set, cls._interned, cls._nested
+        for key, value in data.items():
+            if key in fields:
+                if key in interned:
+                    if type(value) is str:
+                        value = _intern(value)
+                elif key in nested and isinstance(value, Mapping):
+                    value = nested[key].from_dict(value)
+                setattr(record, key, value)
+            else:
+                record._set(key, value)
+        return record
+
+    def _set(self, key: str, value: Any) -> None:
+        if key in self._field_set:
+            if key in self._interned and type(value) is str:
+                value = _intern(value)
+            elif key in self._nested and isinstance(value, Mapping):
+                value = self._nested[key].from_dict(value)
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    # ------------------------------------------------------------------
+    # Mapping 介面
+    # ------------------------------------------------------------------
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._field_set:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._field_set:
+            return getattr(self, key, default)
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._field_set:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._fields:
+            if hasattr(self, key):
+                yield key
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        count = sum(1 for key in self._fields if hasattr(self, key))
+        return count + (len(self._extra) if self._extra is not None else 0)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        轉換為新的 dict（巢狀紀錄亦一併轉換），欄位順序同原始資料的 Schema 順序
+
+        不同於 dict(record)，結果不含任何紀錄，list / dict 欄位亦為複本，可直接 json.dumps 或修改。
+        """
+        return {key: _plain_copy(self[key]) for key in self}
+
+
+def _plain_copy(value: Any) -> Any:
+    """to_dict() 的欄位值: 紀錄轉為 dict，list / dict 逐層複製（不與紀錄共用可變物件）"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_plain_copy(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _plain_copy(item) for key, item in value.items()}
+    return value
+
+
+def json_default(obj: Any) -> Any:
+    """json.dumps 的 default: 將紀錄轉換為 dict"""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# ----------------------------------------------------------------------
+# 紀錄型別（欄位順序同 docs/schemas/）
+# ----------------------------------------------------------------------
+
+class Formula(Record):
+    _fields = ("type", "numerator", "denominator", "window", "components", "lag", "notes")
+    __slots__ = _fields
+    _interned = frozenset({"type"})
+
+
+class Paper(Record):
+    _fields = ("paper_id", "title", "authors", "year", "journal", "volume", "issue", "pages",
+               "doi", "arxiv_id", "ssrn_id", "bibtex", "market", "asset_class", "abstract",
+               "conclusion_sign", "replicable", "notes")
+    __slots__ = _fields
+    _interned = frozenset({"market", "asset_class", "conclusion_sign"})
+
+
+class Measure(Record):
+    _fields = ("measure_id", "measure_name", "display_name", "factor", "description", "formula",
+               "normalization", "original_paper_id", "aliases", "notes")
+    __slots__ = _fields
+    _interned = frozenset({"factor", "normalization"})
+    _nested = {"formula": Formula}
+
+
+class PaperMeasureLink(Record):
+    _fields = ("paper_id", "measure_id", "role", "significance", "usage_detail", "notes")
+    __slots__ = _fields
+    # 同一篇論文 / Measure 的 ID 在 links 中重複出現，一併 intern
+    _interned = frozenset({"paper_id", "measure_id", "role", "significance"})
+
+
+class Factor(Record):
+    _fields = ("factor_id", "factor_name", "style", "description")
+    __slots__ = _fields
+    _interned = frozenset({"style"})
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+FactorBase Artifact Refresher
+=============================
+依來源檔 manifest 增量更新所有衍生產物，只重新處理有變動的檔案。
+
+使用方式:
+    python refresh_artifacts.py               # 更新所有過期的產物
+    python refresh_artifacts.py --full        # 全部完整重建
+    python refresh_artifacts.py snapshot      # 只更新指定產物
+"""
+
+import argparse
+import sys
+from typing import Callable, Dict
+
+import instrumentation
+from generate_papers_index import refresh_papers_index
+from manifest import Changes
+from search import refresh_search_index
+from snapshot import refresh_snapshot
+
+
+# artifact 名稱 → refresh(force=...) 函式
+ARTIFACTS: Dict[str, Callable[..., Changes]] = {
+    "papers_index": refresh_papers_index,
+    "snapshot": refresh_snapshot,
+    "search_index": refresh_search_index,
+}
+
+
+def refresh_all(force: bool = False, names=None) -> Dict[str, Changes]:
+    """增量更新指定（預設為全部）的衍生產物"""
+    return {name: ARTIFACTS[name](force=force) for name in (names or ARTIFACTS)}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="FactorBase 衍生產物增量更新工具",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument("artifacts", nargs="*", metavar="ARTIFACT",
+                        help=f"要更新的產物（預設全部）: {', '.join(ARTIFACTS)}")
+    parser.add_argument("--full", action="store_true", help="忽略 manifest，完整重建")
+
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    unknown = [name for name in args.artifacts if name not in ARTIFACTS]
+    if unknown:
+        parser.error(f"未知的產物: {', '.join(unknown)}")
+
+    for name, changes in refresh_all(args.full, args.artifacts).items():
+        if changes:
+            print(f"  🔄 {name}: {changes.summary()}")
+        else:
+            print(f"  ✅ {name}: 無需更新")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
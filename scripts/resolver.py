@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+FactorBase Measure Resolver
+===========================
+將上游系統送來的各種 Measure 名稱解析為標準 measure_id。
+
+解析順序（先命中者為準）:
+    1. 完全相符      measure_id、aliases、display_name
+    2. 正規化相符    忽略大小寫、空白與標點（"b/m"、"Book to Market" → BM）
+    3. ID 主幹相符   去除期間後綴（"ROE" → ROE_TTM），僅在唯一對應時採用
+
+無法解析時，suggest() 以 trigram 索引挑出候選，再以編輯距離排序，
+提供「您是不是要找」建議；候選數量有上限，目錄再大也只計算少量編輯距離。
+
+使用方式:
+    from resolver import MeasureResolver
+
+    resolver = MeasureResolver(fb.measures)
+    resolver.resolve("book-to-market")     # → "BM"
+    resolver.suggest("MOM_21M")            # → [{"measure_id": "MOM_12M", ...}, ...]
+"""
+
+import re
+import heapq
+import unicodedata
+from collections import Counter
+from typing import Optional, List, Dict, Any, Set
+
+import instrumentation
+
+
+# 送入編輯距離計算的 trigram 候選上限
+MAX_CANDIDATES = 50
+
+# 建議的最低相似度（1 - 編輯距離 / 較長字串長度）
+MIN_SUGGEST_SCORE = 0.5
+
+_NON_ALNUM_RE = re.compile(r"[\W_]+")
+
+
+def normalize_name(name: str) -> str:
+    """正規化名稱: 全形轉半形、小寫、移除空白與標點"""
+    return _NON_ALNUM_RE.sub("", unicodedata.normalize("NFKC", name or "").casefold())
+
+
+def trigrams(key: str) -> Set[str]:
+    """正規化名稱的 trigram 集合（前後補空白，短名稱也有 trigram）"""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: Optional[int] = None) -> int:
+    """
+    Levenshtein 距離
+
+    limit: 距離已確定超過 limit 時提前結束，回傳 limit + 1
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _id_stems(measure_id: str) -> List[str]:
+    """measure_id 依序去除 "_" 後綴的主幹（ROE_TTM → ROE；CAPEX_TA → CAPEX）"""
+    parts = measure_id.split("_")
+    return ["_".join(parts[:i]) for i in range(len(parts) - 1, 0, -1)]
+
+
+class MeasureResolver:
+    """
+    預先計算的 Measure 名稱解析索引
+
+    exact       原始名稱 → measure_id
+    normalized  正規化名稱 → measure_id（對應多個 Measure 的名稱不收錄）
+    names       正規化名稱 → 候選 measure_id 集合（供建議使用）
+    """
+
+    def __init__(self, measures: Dict[str, Dict[str, Any]]):
+        self.exact: Dict[str, str] = {}
+        self.normalized: Dict[str, str] = {}
+        self.names: Dict[str, Set[str]] = {}
+        self._labels: Dict[str, str] = {}
+        self._trigrams: Dict[str, List[str]] = {}
+        self._build(measures)
+
+    @instrumentation.timed("index.resolver")
+    def _build(self, measures: Dict[str, Dict[str, Any]]) -> None:
+        # measure_id 優先，alias / display_name 不可覆蓋既有的 measure_id
+        for measure_id in measures:
+            self.exact[measure_id] = measure_id
+        for measure_id, measure in measures.items():
+            labels = [measure_id, *measure.get("aliases", []), measure.get("display_name")]
+            for label in filter(None, labels):
+                self.exact.setdefault(label, measure_id)
+                key = normalize_name(label)
+                if key:
+                    self.names.setdefault(key, set()).add(measure_id)
+                    self._labels.setdefault(key, label)
+
+        for key, measure_ids in self.names.items():
+            if len(measure_ids) == 1:
+                self.normalized[key] = next(iter(measure_ids))
+
+        # ID 主幹只在唯一對應且未與既有名稱衝突時收錄
+        stems: Dict[str, Set[str]] = {}
+        for measure_id in measures:
+            for stem in _id_stems(measure_id):
+                stems.setdefault(normalize_name(stem), set()).add(measure_id)
+        for key, measure_ids in stems.items():
+            if key not in self.names:
+                self.names[key] = measure_ids
+                if len(measure_ids) == 1:
+                    self.normalized[key] = next(iter(measure_ids))
+
+        for key in self.names:
+            for gram in trigrams(key):
+                self._trigrams.setdefault(gram, []).append(key)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """將名稱解析為 measure_id；無法唯一解析時回傳 None"""
+        if name in self.exact:
+            return self.exact[name]
+        return self.normalized.get(normalize_name(name))
+
+    def suggest(self, name: str, limit: int = 5,
+                min_score: float = MIN_SUGGEST_SCORE) -> List[Dict[str, Any]]:
+        """
+        「您是不是要找」建議
+
+        Returns:
+            [{"measure_id", "match", "score"}, ...]，依相似度排序，
+            match 為命中的名稱（measure_id、alias 或 display_name）
+        """
+        key = normalize_name(name)
+        if not key:
+            return []
+
+        # trigram 重疊數最高的候選才計算編輯距離
+        overlap: Counter = Counter()
+        for gram in trigrams(key):
+            for candidate in self._trigrams.get(gram, ()):
+                overlap[candidate] += 1
+        candidates = heapq.nlargest(MAX_CANDIDATES, overlap, key=overlap.__getitem__)
+        if key in self.names and key not in candidates:
+            candidates.append(key)
+
+        best: Dict[str, Dict[str, Any]] = {}
+        for candidate in candidates:
+            longest = max(len(key), len(candidate))
+            max_distance = int(longest * (1 - min_score))
+            distance = edit_distance(key, candidate, max_distance)
+            if distance > max_distance:
+                continue
+            score = round(1 - distance / longest, 4)
+            for measure_id in self.names[candidate]:
+                if measure_id not in best or score > best[measure_id]["score"]:
+                    best[measure_id] = {
+                        "measure_id": measure_id,
+                        "match": self._labels.get(candidate, measure_id),
+                        "score": score,
+                    }
+
+        return sorted(best.values(), key=lambda s: (-s["score"], s["measure_id"]))[:limit]
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+FactorBase Rolling Engine
+=========================
+滾動視窗統計的串流引擎，每新增一期資料的成本為 O(1)（對每個資產），
+與視窗長度無關；長歷史序列的總成本隨序列長度線性成長。
+
+    RollingMoments      滾動平均 / 樣本變異數 / 標準差（Welford 增減更新）
+    RollingCovariance   滾動共變異數與迴歸 beta
+    RollingMax          滾動最大值（每個資產一個單調 deque）
+
+每個引擎一次處理一整列（所有資產），內部以環狀緩衝保存視窗資料；
+每繞行一圈即由緩衝重新計算一次累計量，避免浮點誤差長期累積（攤銷後仍為 O(1)）。
+
+視窗未滿時一律輸出 NaN。視窗內含 NaN 時 moments / covariance 輸出 NaN；
+RollingMax 則略過 NaN（例如停牌日），視窗內沒有有效值時才輸出 NaN。
+
+使用方式:
+    from rolling import RollingMoments, measure_window
+
+    window, lag = measure_window(fb.get_measure("VOL_36M"))    # (36, 0)
+    vol = RollingMoments(window, n_assets)
+    for row in monthly_returns:
+        current = vol.update(row)     # 目前視窗的標準差（視窗未滿時為 NaN）
+
+    rolling_std(returns, 36)          # 整段歷史的批次版本
+"""
+
+import re
+from collections import deque
+from typing import Optional, Dict, Any, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+# panel 預設頻率: 月資料
+DEFAULT_PERIODS_PER_YEAR = 12
+
+_WINDOW_RE = re.compile(r"^\s*(\d+)\s*([DWMQY])\s*$", re.IGNORECASE)
+
+_UNIT_PER_YEAR = {"D": 252, "W": 52, "M": 12, "Q": 4, "Y": 1}
+
+
+def _require_numpy() -> None:
+    if not HAS_NUMPY:
+        raise ImportError("rolling 需要 numpy（pip install numpy）")
+
+
+def parse_window(window: Optional[str], periods_per_year: int = DEFAULT_PERIODS_PER_YEAR) -> Optional[int]:
+    """
+    將 window / lag 字串換算為 panel 期數
+
+    "12M" → 12、"1Y" → 12、"52W" → 12、"0" → 0（月資料）；
+    TTM、MRQ、current 等非期間標籤回傳 None。
+    """
+    if window is None:
+        return None
+    text = str(window).strip()
+    if text.isdigit():
+        return int(text)
+    match = _WINDOW_RE.match(text)
+    if not match:
+        return None
+    count, unit = int(match.group(1)), match.group(2).upper()
+    return max(1, round(count * periods_per_year / _UNIT_PER_YEAR[unit])) if count else 0
+
+
+def measure_window(measure: Dict[str, Any],
+                   periods_per_year: int = DEFAULT_PERIODS_PER_YEAR) -> Tuple[Optional[int], int]:
+    """
+    由 Measure 的 formula.window / formula.lag 取得 (視窗期數, 落後期數)
+
+    window 為 TTM、MRQ 等非期間標籤時視窗期數為 None。
+    """
+    formula = measure.get("formula") or {}
+    window = parse_window(formula.get("window"), periods_per_year)
+    lag = parse_window(formula.get("lag"), periods_per_year) or 0
+    return window, lag
+
+
+class _RingBuffer:
+    """保存最近 window 列資料的環狀緩衝"""
+
+    def __init__(self, window: int, n_assets: int):
+        if window < 1:
+            raise ValueError(f"window 必須為正整數: {window}")
+        self.window = window
+        self.data = np.full((window, n_assets), np.nan)
+        self.count = 0
+        self.position = 0
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.window
+
+    def push(self, row: "np.ndarray") -> Optional["np.ndarray"]:
+        """放入新的一列，視窗已滿時回傳被移出的舊列（副本）"""
+        evicted = self.data[self.position].copy() if self.full else None
+        self.data[self.position] = row
+        self.position = (self.position + 1) % self.window
+        self.count += 1
+        return evicted
+
+    @property
+    def wrapped(self) -> bool:
+        """剛好繞行完一圈（可由緩衝重新計算累計量）"""
+        return self.full and self.position == 0
+
+
+class RollingCovariance:
+    """
+    滾動共變異數（Welford 增減更新）
+
+    維護視窗內 x、y 的平均與共同動差 C = Σ(x - x̄)(y - ȳ)，
+    每期加入新值、移出舊值各只需常數次向量運算。
+    """
+
+    def __init__(self, window: int, n_assets: int):
+        _require_numpy()
+        self.window = window
+        self._x = _RingBuffer(window, n_assets)
+        self._y = _RingBuffer(window, n_assets)
+        self._nan = _RingBuffer(window, n_assets)
+        self._n = 0
+        self._nan_count = np.zeros(n_assets)
+        self.mean_x = np.zeros(n_assets)
+        self.mean_y = np.zeros(n_assets)
+        self.comoment = np.zeros(n_assets)
+        self.moment_x = np.zeros(n_assets)
+
+    def _add(self, x, y) -> None:
+        self._n += 1
+        dx = x - self.mean_x
+        self.mean_x += dx / self._n
+        self.mean_y += (y - self.mean_y) / self._n
+        self.comoment += dx * (y - self.mean_y)
+        self.moment_x += dx * (x - self.mean_x)
+
+    def _remove(self, x, y) -> None:
+        self._n -= 1
+        dx = x - self.mean_x
+        self.mean_x -= dx / self._n
+        self.mean_y -= (y - self.mean_y) / self._n
+        self.comoment -= dx * (y - self.mean_y)
+        self.moment_x -= dx * (x - self.mean_x)
+
+    def _resync(self) -> None:
+        x, y = self._x.data, self._y.data
+        self.mean_x = x.mean(axis=0)
+        self.mean_y = y.mean(axis=0)
+        xc = x - self.mean_x
+        self.comoment = (xc * (y - self.mean_y)).sum(axis=0)
+        self.moment_x = (xc * xc).sum(axis=0)
+
+    def push(self, x, y) -> None:
+        """加入一期資料（NaN 以 0 暫代，並記錄於視窗 NaN 計數）"""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        missing = np.isnan(x) | np.isnan(y)
+        x = np.where(missing, 0.0, x)
+        y = np.where(missing, 0.0, y)
+
+        old_x = self._x.push(x)
+        old_y = self._y.push(y)
+        old_nan = self._nan.push(missing)
+        self._nan_count += missing
+        if old_x is not None:
+            self._nan_count -= old_nan
+        self._add(x, y)
+        if old_x is not None:
+            self._remove(old_x, old_y)
+        if self._x.wrapped:
+            self._resync()
+
+    def _masked(self, values: "np.ndarray") -> "np.ndarray":
+        if not self._x.full:
+            return np.full_like(values, np.nan)
+        return np.where(self._nan_count > 0, np.nan, values)
+
+    def covariance(self) -> "np.ndarray":
+        """樣本共變異數（ddof=1）"""
+        return self._masked(self.comoment / max(self.window - 1, 1))
+
+    def beta(self) -> "np.ndarray":
+        """y 對 x 的迴歸 beta = cov(x, y) / var(x)"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            beta = np.where(self.moment_x > 0, self.comoment / self.moment_x, np.nan)
+        return self._masked(beta)
+
+    def update(self, x, y) -> "np.ndarray":
+        """加入一期資料並回傳目前視窗的 beta"""
+        self.push(x, y)
+        return self.beta()
+
+
+class RollingMoments(RollingCovariance):
+    """滾動平均、樣本變異數與標準差（x 與 y 為同一序列的共變異數）"""
+
+    def push(self, x, y=None) -> None:
+        super().push(x, x)
+
+    def mean(self) -> "np.ndarray":
+        return self._masked(self.mean_x.copy())
+
+    def variance(self) -> "np.ndarray":
+        return self._masked(np.maximum(self.moment_x, 0.0) / max(self.window - 1, 1))
+
+    def std(self) -> "np.ndarray":
+        return np.sqrt(self.variance())
+
+    def update(self, x, y=None) -> "np.ndarray":
+        """加入一期資料並回傳目前視窗的標準差"""
+        self.push(x)
+        return self.std()
+
+
+class RollingMax:
+    """
+    滾動最大值（單調遞減 deque）
+
+    每個資產一個 deque，保存 (期數, 值) 且值由大到小；
+    新值加入時彈出較小者，過期者由左端移除，每個值最多進出各一次。
+    """
+
+    def __init__(self, window: int, n_assets: int):
+        _require_numpy()
+        if window < 1:
+            raise ValueError(f"window 必須為正整數: {window}")
+        self.window = window
+        self._t = 0
+        self._deques = [deque() for _ in range(n_assets)]
+
+    def update(self, row) -> "np.ndarray":
+        """加入一期資料並回傳目前視窗的最大值（視窗未滿或無有效值時為 NaN）"""
+        row = np.asarray(row, dtype=np.float64)
+        out = np.full(len(self._deques), np.nan)
+        oldest = self._t - self.window + 1
+        for i, (value, dq) in enumerate(zip(row.tolist(), self._deques)):
+            if value == value:  # 略過 NaN
+                while dq and dq[-1][1] <= value:
+                    dq.pop()
+                dq.append((self._t, value))
+            while dq and dq[0][0] < oldest:
+                dq.popleft()
+            if dq:
+                out[i] = dq[0][1]
+        self._t += 1
+        if self._t < self.window:
+            out[:] = np.nan
+        return out
+
+
+# ----------------------------------------------------------------------
+# 批次版本（整段歷史）
+# ----------------------------------------------------------------------
+
+def rolling_std(x: "np.ndarray", window: int) -> "np.ndarray":
+    """滾動樣本標準差（ddof=1）；前 window - 1 期與視窗內有 NaN 時為 NaN"""
+    _require_numpy()
+    x = np.asarray(x, dtype=np.float64)
+    x2 = x.reshape(len(x), int(np.prod(x.shape[1:])))
+    out = np.full(x2.shape, np.nan)
+    if window < 2:
+        return out.reshape(x.shape)
+    engine = RollingMoments(window, x2.shape[1])
+    for t, row in enumerate(x2):
+        engine.push(row)
+        if t >= window - 1:
+            out[t] = engine.std()
+    return out.reshape(x.shape)
+
+
+def rolling_beta(y: "np.ndarray", x: "np.ndarray", window: int) -> "np.ndarray":
+    """滾動迴歸 beta = cov(y, x) / var(x)；x 可為 (dates,) 或 (dates × assets)"""
+    _require_numpy()
+    y = np.asarray(y, dtype=np.float64)
+    x = np.asarray(x, dtype=np.float64)
+    x = np.broadcast_to(x.reshape(-1, 1) if x.ndim == 1 else x, y.shape)
+    out = np.full(y.shape, np.nan)
+    if window < 2:
+        return out
+    engine = RollingCovariance(window, y.shape[1])
+    for t in range(len(y)):
+        engine.push(x[t], y[t])
+        if t >= window - 1:
+            out[t] = engine.beta()
+    return out
+
+
+def rolling_max(x: "np.ndarray", window: int) -> "np.ndarray":
+    """
+    滾動最大值（略過 NaN；前 window - 1 期為 NaN）
+
+    批次計算使用 van Herk / Gil-Werman 演算法: 以 window 為區塊計算
+    區塊內前綴最大值與後綴最大值，每個點只需一次比較，並對所有資產向量化。
+    """
+    _require_numpy()
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    if window < 1:
+        raise ValueError(f"window 必須為正整數: {window}")
+    if window == 1 or n == 0:
+        return x.copy()
+    out = np.full(x.shape, np.nan)
+    if n < window:
+        # 歷史短於視窗: 沒有任何完整視窗
+        return out
+
+    pad = (-n) % window
+    padded = np.concatenate([x, np.full((pad,) + x.shape[1:], np.nan)]) if pad else x
+    blocks = padded.reshape((-1, window) + x.shape[1:])
+    prefix = np.fmax.accumulate(blocks, axis=1).reshape(padded.shape)
+    suffix = np.fmax.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(padded.shape)
+
+    # 視窗 [t - window + 1, t] = suffix[t - window + 1] 與 prefix[t] 的最大值
+    with np.errstate(invalid="ignore"):
+        out[window - 1:] = np.fmax(suffix[:n - window + 1], prefix[window - 1:n])
+    return out
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+FactorBase Full-Text Search
+===========================
+論文、Measure 與因子的全文檢索（倒排索引 + BM25 排序）。
+
+索引內容:
+    paper      title、abstract、notes、authors、journal、market
+    measure    measure_id、display_name、aliases、description、notes
+    factor     factor_name、description.en、description.zh
+
+斷詞同時處理英文與中文: 英文以單字為單位（小寫、去除簡單複數字尾），
+中文以 unigram + bigram 切分，因此「低波動」「波動度」等查詢不需字典即可命中。
+
+使用方式:
+    from search import search
+
+    search("accruals")
+    search("low volatility Taiwan", types=["paper"])
+    search("動能", limit=5)
+"""
+
+import math
+import heapq
+import pickle
+import re
+import threading
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Optional, List, Dict, Any, Tuple
+
+import instrumentation
+from factorbase import PROJECT_ROOT, FactorBase, get_catalog, load_json
+
+
+SEARCH_INDEX_VERSION = 1
+
+# 預設索引位置（已列入 .gitignore）
+DEFAULT_SEARCH_INDEX_PATH = PROJECT_ROOT / ".factorbase" / "search_index.pkl"
+
+# BM25 參數
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# 欄位權重（以詞頻倍數計）
+FIELD_WEIGHTS = {
+    "id": 3,
+    "title": 3,
+    "aliases": 3,
+    "text": 1,
+}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "that", "the", "this", "to", "with", "we", "our",
+    "their", "than", "these", "those", "which", "about",
+}
+
+# market enum 的同義詞，讓「Taiwan」「台灣」可以命中 market = TW
+MARKET_NAMES = {
+    "US": "united states america 美國",
+    "TW": "taiwan 台灣",
+    "JP": "japan 日本",
+    "CN": "china 中國",
+    "EU": "europe european 歐洲",
+    "UK": "united kingdom britain 英國",
+    "Global": "global international 全球",
+    "Asia": "asia asian 亞洲",
+    "Emerging": "emerging markets 新興市場",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+|[㐀-䶿一-鿿豈-﫿]+")
+
+
+def _is_cjk(token: str) -> bool:
+    return token[0] >= "㐀"
+
+
+def _stem(word: str) -> str:
+    """去除常見的英文複數字尾（accruals → accrual、anomalies → anomaly）"""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    將文字切分為索引詞
+
+    英文: 小寫單字（去除 stopwords 與簡單複數字尾）
+    中文: 每個連續漢字片段產生 unigram 與 bigram
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    tokens = []
+    for chunk in _WORD_RE.findall(text):
+        if _is_cjk(chunk):
+            tokens.extend(chunk)
+            tokens.extend(chunk[i:i + 2] for i in range(len(chunk) - 1))
+        elif chunk not in STOPWORDS:
+            tokens.append(_stem(chunk))
+    return tokens
+
+
+# ----------------------------------------------------------------------
+# 索引文件
+# ----------------------------------------------------------------------
+
+def paper_document(paper: Dict[str, Any]) -> Dict[str, Any]:
+    """論文 → 索引文件"""
+    market = paper.get("market") or ""
+    return {
+        "key": f"paper:{paper.get('paper_id')}",
+        "type": "paper",
+        "id": paper.get("paper_id"),
+        "title": paper.get("title"),
+        "fields": {
+            "id": paper.get("paper_id"),
+            "title": paper.get("title"),
+            "text": " ".join(filter(None, [
+                paper.get("abstract"), paper.get("notes"), paper.get("authors"),
+                paper.get("journal"), market, MARKET_NAMES.get(market),
+                paper.get("asset_class"),
+            ])),
+        },
+    }
+
+
+def measure_document(measure: Dict[str, Any]) -> Dict[str, Any]:
+    """Measure → 索引文件"""
+    return {
+        "key": f"measure:{measure.get('measure_id')}",
+        "type": "measure",
+        "id": measure.get("measure_id"),
+        "title": measure.get("display_name"),
+        "fields": {
+            "id": measure.get("measure_id"),
+            "title": measure.get("display_name"),
+            "aliases": " ".join(measure.get("aliases", [])),
+            "text": " ".join(filter(None, [
+                measure.get("factor"), measure.get("description"), measure.get("notes"),
+            ])),
+        },
+    }
+
+
+def factor_documents(factors_data: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """factors.json → 索引文件"""
+    documents = []
+    for factor in (factors_data or {}).get("factors", []):
+        description = factor.get("description") or {}
+        documents.append({
+            "key": f"factor:{factor.get('factor_name')}",
+            "type": "factor",
+            "id": factor.get("factor_name"),
+            "title": factor.get("factor_name"),
+            "fields": {
+                "title": factor.get("factor_name"),
+                "text": " ".join(filter(None, [
+                    factor.get("style"), description.get("en"), description.get("zh"),
+                ])),
+            },
+        })
+    return documents
+
+
+def documents_for_source(rel: str, data: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """依來源檔路徑產生索引文件（measures/index.json 與 relations 不產生文件）"""
+    if not data:
+        return []
+    if rel.startswith("papers/metadata/"):
+        return [paper_document(data)]
+    if rel == "factors/factors.json":
+        return factor_documents(data)
+    if rel.startswith("measures/") and rel != "measures/index.json":
+        return [measure_document(data)]
+    return []
+
+
+# ----------------------------------------------------------------------
+# 倒排索引
+# ----------------------------------------------------------------------
+
+class SearchIndex:
+    """
+    BM25 倒排索引
+
+    postings        詞 → {文件 key: 加權詞頻}
+    doc_lengths     文件 key → 加權文件長度
+    sources         來源檔相對路徑 → 該檔產生的文件 key（供增量更新）
+    """
+
+    def __init__(self):
+        self.version = SEARCH_INDEX_VERSION
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.doc_terms: Dict[str, Dict[str, int]] = {}
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.sources: Dict[str, List[str]] = {}
+        self._total_length = 0
+
+    @classmethod
+    @instrumentation.timed("index.search")
+    def from_catalog(cls, fb: FactorBase) -> "SearchIndex":
+        """由已載入的 FactorBase 目錄建立索引"""
+        index = cls()
+        for paper in fb.papers.values():
+            index.add_document(paper_document(paper))
+        for measure in fb.measures.values():
+            index.add_document(measure_document(measure))
+        for factor in fb.factors.values():
+            for document in factor_documents({"factors": [factor]}):
+                index.add_document(document)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add_document(self, document: Dict[str, Any], source: Optional[str] = None) -> None:
+        """加入（或取代）一份文件"""
+        key = document["key"]
+        if key in self.docs:
+            self.remove_document(key)
+
+        terms: Counter = Counter()
+        for field, text in document["fields"].items():
+            weight = FIELD_WEIGHTS.get(field, 1)
+            for token in tokenize(text):
+                terms[token] += weight
+        # measure_id 等識別碼另以完整小寫形式索引（MOM_12M → mom_12m）
+        if document["fields"].get("id"):
+            terms[str(document["fields"]["id"]).lower()] += FIELD_WEIGHTS["id"]
+
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[key] = tf
+        length = sum(terms.values())
+        self.doc_terms[key] = dict(terms)
+        self.doc_lengths[key] = length
+        self._total_length += length
+        self.docs[key] = {k: document[k] for k in ("type", "id", "title")}
+        if source is not None:
+            self.sources.setdefault(source, []).append(key)
+
+    def remove_document(self, key: str) -> None:
+        """移除一份文件"""
+        for term in self.doc_terms.pop(key, {}):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(key, None)
+                if not posting:
+                    del self.postings[term]
+        self._total_length -= self.doc_lengths.pop(key, 0)
+        self.docs.pop(key, None)
+
+    def remove_source(self, source: str) -> None:
+        """移除某個來源檔產生的所有文件"""
+        for key in self.sources.pop(source, []):
+            self.remove_document(key)
+
+    def search(self, query: str, limit: int = 10,
+               types: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        以 BM25 排序查詢
+
+        Args:
+            query: 查詢字串（中英文皆可）
+            limit: 最多回傳筆數
+            types: 只回傳指定類型（paper / measure / factor）
+        """
+        n_docs = len(self.docs)
+        if not n_docs:
+            return []
+        avgdl = self._total_length / n_docs
+        type_filter = set(types) if types else None
+
+        scores: Dict[str, float] = {}
+        terms = set(tokenize(query))
+        terms.update(t.lower() for t in query.split() if t.lower() in self.postings)
+        for term in terms:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            df = len(posting)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for key, tf in posting.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[key] / avgdl)
+                scores[key] = scores.get(key, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        if type_filter:
+            scores = {k: s for k, s in scores.items() if self.docs[k]["type"] in type_filter}
+
+        top: List[Tuple[float, str]] = heapq.nlargest(limit, ((s, k) for k, s in scores.items()))
+        return [dict(self.docs[key], score=round(score, 4)) for score, key in top]
+
+
+# ----------------------------------------------------------------------
+# 持久化與增量更新
+# ----------------------------------------------------------------------
+
+def refresh_search_index(root: Path = PROJECT_ROOT, output: Optional[Path] = None,
+                         force: bool = False):
+    """
+    增量更新持久化的搜尋索引
+
+    只重新斷詞 manifest 判定為新增、修改或刪除的來源檔所產生的文件。
+    """
+    from manifest import Changes, refresh_artifact
+    from snapshot import source_files
+
+    root = Path(root)
+    output = Path(output) if output else DEFAULT_SEARCH_INDEX_PATH
+
+    def update(changes: Changes, current: Dict[str, Any]) -> None:
+        index = None if changes.full else load_search_index(output)
+        if index is None:
+            index, reindex = SearchIndex(), list(current)
+        else:
+            reindex = changes.changed
+            for rel in changes.removed + changes.changed:
+                index.remove_source(rel)
+            if not changes:
+                return
+
+        for rel in reindex:
+            for document in documents_for_source(rel, load_json(root / rel)):
+                index.add_document(document, source=rel)
+
+        output.parent.mkdir(parents=True, exist_ok=True)
+        tmp = output.with_suffix(output.suffix + ".tmp")
+        with open(tmp, 'wb') as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(output)
+
+    return refresh_artifact("search_index", source_files(root), update, output, root=root, force=force)
+
+
+def load_search_index(path: Optional[Path] = None) -> Optional[SearchIndex]:
+    """讀取持久化的搜尋索引（不存在或版本不符時回傳 None）"""
+    path = Path(path) if path else DEFAULT_SEARCH_INDEX_PATH
+    try:
+        with open(path, 'rb') as f:
+            index = pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError, AttributeError):
+        return None
+    if not isinstance(index, SearchIndex) or index.version != SEARCH_INDEX_VERSION:
+        return None
+    return index
+
+
+_search_index: Optional[SearchIndex] = None
+_search_catalog: Optional[FactorBase] = None
+_search_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """
+    取得 process 共用的搜尋索引
+
+    若已建置持久化索引（refresh_artifacts.py）則增量更新後讀取，
+    否則由目前的 FactorBase 目錄在記憶體中建立；目錄重新載入時一併重建。
+    """
+    global _search_index, _search_catalog
+    with _search_lock:
+        fb = get_catalog()
+        if _search_index is None or _search_catalog is not fb:
+            index = None
+            if DEFAULT_SEARCH_INDEX_PATH.exists():
+                try:
+                    refresh_search_index()
+                    index = load_search_index()
+                except (OSError, ValueError):
+                    index = None
+            _search_index = index or SearchIndex.from_catalog(fb)
+            _search_catalog = fb
+        return _search_index
+
+
+def search(query: str, limit: int = 10, types: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+    """全文檢索論文、Measure 與因子，回傳依 BM25 分數排序的結果"""
+    return get_search_index().search(query, limit, types)
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+FactorBase Query Server
+=======================
+常駐的本機查詢服務: catalog 只載入一次並保持在記憶體中，
+以 JSON 回答與 query_factorbase.py 相同的查詢，省去每次啟動直譯器、
+import 與解析 JSON 的成本。
+
+端點:
+    GET  /health                              狀態（載入時間、重新載入次數）
+    GET  /<op>?id=<值>&<參數>=...              單一查詢，例如 /measure?id=BM
+    POST /batch                               批次查詢，一次往返回答多個請求
+
+op 對應 CLI 選項:
+    measure  paper  factor  paper_measures  measure_papers  factor_papers  co_used
+    list_papers  list_measures  list_factors  search  query  explain  sql  suggest
+
+批次請求格式（兩種可混用）:
+    {"requests": [{"op": "measure", "id": "BM"}, {"op": "search", "q": "低波動", "limit": 3}]}
+    {"op": "measure", "ids": ["BM", "PB", "MOM_12M"]}
+
+失敗的項目回傳 {"error": ..., "status": ...}（status 與單一查詢的 HTTP 狀態碼相同）。
+
+來源檔變動時自動重新載入: 每次請求前若距上次檢查超過 check_interval 秒，
+即 stat 所有來源檔，mtime 或大小有變動時重新載入 catalog（搜尋索引等隨之重建）。
+
+使用方式:
+    python query_factorbase.py --serve                        # http://127.0.0.1:8765
+    python query_factorbase.py --serve --port 9000
+    python query_factorbase.py --serve --socket /tmp/factorbase.sock
+
+    curl 'http://127.0.0.1:8765/measure?id=BM'
+    curl -X POST http://127.0.0.1:8765/batch -d '{"op": "paper", "ids": ["paper_001", "paper_002"]}'
+"""
+
+import json
+import socketserver
+import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import instrumentation
+from factorbase import PROJECT_ROOT, FactorBase, get_catalog, get_catalog_backend
+from catalog_query import QuerySyntaxError, query as run_query, explain as explain_query
+from records import json_default
+from snapshot import source_files
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# 來源檔變動檢查的最短間隔（秒）
+DEFAULT_CHECK_INTERVAL = 1.0
+
+# 單一批次請求的上限
+MAX_BATCH = 1000
+
+
+class QueryError(Exception):
+    """查詢失敗（status 為回應的 HTTP 狀態碼）"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _required(params: Dict[str, Any], name: str) -> Any:
+    value = params.get(name)
+    if value in (None, ""):
+        raise QueryError(f"缺少參數: {name}")
+    return value
+
+
+def _found(value: Any, message: str) -> Any:
+    if not value:
+        raise QueryError(message, status=404)
+    return value
+
+
+def _measure(fb: FactorBase, params: Dict[str, Any]) -> Any:
+    measure_id = _required(params, "id")
+    measure = fb.get_measure(measure_id)
+    if not measure:
+        suggestions = [s["measure_id"] for s in fb.suggest_measures(measure_id)]
+        hint = f"（您是不是要找: {', '.join(suggestions)}）" if suggestions else ""
+        raise QueryError(f"找不到 Measure: {measure_id}{hint}", status=404)
+    return measure
+
+
+def _search(fb: FactorBase, params: Dict[str, Any]) -> Any:
+    from query_factorbase import search
+    types = params.get("type")
+    if isinstance(types, str):
+        types = [types]
+    return search(_required(params, "q"), int(params.get("limit", 10)), types)
+
+
+def _query(fb: FactorBase, params: Dict[str, Any], explain: bool = False) -> Any:
+    try:
+        return (explain_query if explain else run_query)(_required(params, "q"))
+    except QuerySyntaxError as e:
+        raise QueryError(f"查詢語法錯誤: {e}")
+
+
+def _sql(fb: FactorBase, params: Dict[str, Any]) -> Any:
+    import sqlite3
+    from query_factorbase import run_sql
+    try:
+        return run_sql(_required(params, "q"))
+    except sqlite3.Error as e:
+        raise QueryError(f"SQL 錯誤: {e}")
+
+
+# op → handler(fb, params)
+OPERATIONS: Dict[str, Callable[[FactorBase, Dict[str, Any]], Any]] = {
+    "measure": _measure,
+    "paper": lambda fb, p: _found(fb.get_paper(_required(p, "id")), f"找不到論文: {p.get('id')}"),
+    "factor": lambda fb, p: _found(fb.get_measures_by_factor(_required(p, "id")), f"找不到因子類別: {p.get('id')}"),
+    "paper_measures": lambda fb, p: fb.get_paper_measures(_required(p, "id")),
+    "measure_papers": lambda fb, p: fb.graph.papers_using_measure(_required(p, "id"), p.get("role"), p.get("significance")),
+    "factor_papers": lambda fb, p: fb.graph.papers_using_factor(_required(p, "id"), p.get("role"), p.get("significance")),
+    "co_used": lambda fb, p: fb.graph.co_used_measures(_required(p, "id")),
+    "suggest": lambda fb, p: fb.suggest_measures(_required(p, "id"), int(p.get("limit", 5))),
+    "list_papers": lambda fb, p: fb.list_papers(),
+    "list_measures": lambda fb, p: fb.list_measures(),
+    "list_factors": lambda fb, p: fb.list_factors(),
+    "search": _search,
+    "query": _query,
+    "explain": lambda fb, p: _query(fb, p, explain=True),
+    "sql": _sql,
+}
+
+
+class CatalogService:
+    """
+    保持 catalog 常駐並在來源檔變動時重新載入
+
+    stats   請求數、重新載入次數與最後載入時間（以 _lock 保護，ThreadingHTTPServer 的多個執行緒共用）
+    """
+
+    def __init__(self, root: Path = PROJECT_ROOT, check_interval: float = DEFAULT_CHECK_INTERVAL):
+        self.root = Path(root)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._signature = self._source_signature()
+        self.stats = {"requests": 0, "reloads": 0, "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        get_catalog()
+
+    def _source_signature(self) -> Tuple[Tuple[str, int, int], ...]:
+        signature = []
+        for path in source_files(self.root):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            signature.append((path.as_posix(), st.st_mtime_ns, st.st_size))
+        return tuple(signature)
+
+    def catalog(self) -> FactorBase:
+        """取得目前的 catalog；距上次檢查超過 check_interval 時先檢查來源檔是否變動"""
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            with self._lock:
+                if now - self._last_check >= self.check_interval:
+                    self._last_check = now
+                    signature = self._source_signature()
+                    if signature != self._signature:
+                        get_catalog(reload=True)
+                        self._signature = signature
+                        self.stats["reloads"] += 1
+                        self.stats["loaded_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        return get_catalog()
+
+    def execute(self, op: str, params: Dict[str, Any]) -> Any:
+        """執行單一查詢；失敗時拋出 QueryError"""
+        handler = OPERATIONS.get(op)
+        if handler is None:
+            raise QueryError(f"未知的 op: {op}（可用: {', '.join(OPERATIONS)}）", status=404)
+        with self._lock:
+            self.stats["requests"] += 1
+        try:
+            return handler(self.catalog(), params)
+        except (TypeError, ValueError) as e:
+            raise QueryError(str(e))
+
+    def batch(self, body: Any) -> List[Dict[str, Any]]:
+        """執行批次查詢，每個請求各自回傳 result 或 error"""
+        if isinstance(body, dict) and "ids" in body:
+            params = {k: v for k, v in body.items() if k != "ids"}
+            requests = [dict(params, id=item) for item in body["ids"]]
+        elif isinstance(body, dict) and "requests" in body:
+            requests = body["requests"]
+        elif isinstance(body, list):
+            requests = body
+        else:
+            raise QueryError('批次請求需為 {"requests": [...]}、{"op": ..., "ids": [...]} 或請求列表')
+        if len(requests) > MAX_BATCH:
+            raise QueryError(f"單一批次最多 {MAX_BATCH} 個請求（收到 {len(requests)} 個）")
+
+        results = []
+        for request in requests:
+            if not isinstance(request, dict):
+                results.append({"error": "請求需為 JSON object", "status": 400})
+                continue
+            params = {k: v for k, v in request.items() if k != "op"}
+            try:
+                results.append({"op": request.get("op"), **params,
+                                "result": self.execute(request.get("op"), params)})
+            except QueryError as e:
+                results.append({"op": request.get("op"), **params, "error": str(e), "status": e.status})
+        return results
+
+    def health(self) -> Dict[str, Any]:
+        fb = self.catalog()
+        with self._lock:
+            stats = dict(self.stats)
+        health = dict(stats, status="ok", backend=get_catalog_backend(),
+                      papers=len(fb.papers), measures=len(fb.measures), links=len(fb.links))
+        if hasattr(fb, "cache_stats"):
+            # lazy 後端: 文件快取的命中統計
+            health["cache"] = fb.cache_stats()
+        if instrumentation.is_enabled():
+            # 以 --timings / --profile 啟動時附上各階段累計耗時
+            health["timings"] = instrumentation.report()
+        return health
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """HTTP 請求處理（service 由 server 提供）"""
+
+    server_version = "FactorBase/1"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if getattr(self.server, "verbose", False):
+            super().log_message(format, *args)
+
+    def _send(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload, ensure_ascii=False, default=json_default).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        op = url.path.strip("/")
+        service: CatalogService = self.server.service
+        if op in ("", "health"):
+            self._send(200, service.health())
+            return
+        params: Dict[str, Any] = {
+            key: values if key == "type" else values[-1]
+            for key, values in parse_qs(url.query).items()
+        }
+        try:
+            self._send(200, {"op": op, **params, "result": service.execute(op, params)})
+        except QueryError as e:
+            self._send(e.status, {"op": op, **params, "error": str(e)})
+
+    def do_POST(self) -> None:
+        op = urlparse(self.path).path.strip("/")
+        service: CatalogService = self.server.service
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"null")
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send(400, {"error": f"JSON 解析錯誤: {e}"})
+            return
+        try:
+            if op == "batch":
+                self._send(200, {"results": service.batch(body)})
+            else:
+                params = body if isinstance(body, dict) else {}
+                self._send(200, {"op": op, **params, "result": service.execute(op, params)})
+        except QueryError as e:
+            self._send(e.status, {"op": op, "error": str(e)})
+
+
+class UnixQueryServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """以 Unix socket 提供相同的 HTTP 介面"""
+
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler 以 client_address[0] 記錄來源
+        return request, ("unix", 0)
+
+
+def make_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, socket_path: Optional[Path] = None,
+                check_interval: float = DEFAULT_CHECK_INTERVAL, verbose: bool = False) -> socketserver.BaseServer:
+    """
+    建立（尚未啟動的）查詢伺服器；port=0 時由系統指定
+
+    socket_path 已存在時只移除先前遺留的 Unix socket；其他檔案拋出 FileExistsError，不會被刪除。
+    """
+    if socket_path:
+        socket_path = Path(socket_path)
+        try:
+            mode = socket_path.lstat().st_mode
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(mode):
+                raise FileExistsError(f"{socket_path} 已存在且不是 Unix socket，請指定其他路徑")
+            socket_path.unlink()
+    service = CatalogService(check_interval=check_interval)
+    if socket_path:
+        server = UnixQueryServer(str(socket_path), QueryHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), QueryHandler)
+        server.daemon_threads = True
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, socket_path: Optional[Path] = None,
+          check_interval: float = DEFAULT_CHECK_INTERVAL, verbose: bool = False) -> None:
+    """啟動查詢伺服器（Ctrl+C 結束）"""
+    server = make_server(host, port, socket_path, check_interval, verbose)
+    address = socket_path or f"http://{server.server_address[0]}:{server.server_address[1]}"
+    fb = get_catalog()
+    print(f"🚀 FactorBase server: {address}")
+    print(f"   papers: {len(fb.papers)}  measures: {len(fb.measures)}  links: {len(fb.links)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 已停止")
+    finally:
+        server.server_close()
+        if socket_path and Path(socket_path).exists():
+            Path(socket_path).unlink()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+FactorBase Snapshot
+===================
+將 papers、factors、measures 與 relations 編譯為單一版本化的 pickle 檔，
+讓短命的 worker 冷啟動時只需讀取一個檔案，而非逐一開啟、解析數十個 JSON。
+
+檔案格式（依序寫入兩個 pickle 物件）:
+    1. header   {"format_version", "content_hash", "built_at", "sources"}
+    2. payload  {"documents": {來源檔相對路徑: JSON 內容}}
+
+header 記錄每個來源檔的 (mtime_ns, size)，載入時只需 stat 來源檔即可判斷是否過期；
+過期時 load_snapshot() 回傳 None，由呼叫端退回 JSON 檔案樹或以
+refresh_snapshot() 增量更新（只重新解析 manifest 判定有變動的檔案）。
+"""
+
+import json
+import pickle
+import time
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+import instrumentation
+from factorbase import PROJECT_ROOT
+from manifest import Changes, combined_hash, refresh_artifact
+
+
+SNAPSHOT_FORMAT_VERSION = 2
+
+# 預設 snapshot 位置（已列入 .gitignore）
+DEFAULT_SNAPSHOT_PATH = PROJECT_ROOT / ".factorbase" / "snapshot.pkl"
+
+
+def source_files(root: Path = PROJECT_ROOT) -> List[Path]:
+    """
+    列出 snapshot 的所有來源檔（依固定順序）
+
+    measures 只包含 measures/index.json 實際參照的檔案。
+    """
+    root = Path(root)
+    with instrumentation.timer("fs.glob"):
+        files = sorted((root / "papers" / "metadata").glob("paper_*.json"))
+    files.append(root / "factors" / "factors.json")
+
+    index_path = root / "measures" / "index.json"
+    files.append(index_path)
+    if index_path.exists():
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        for factor_group in index.get("factors", []):
+            for entry in factor_group.get("measures", []):
+                files.append(root / "measures" / entry.get("file"))
+
+    files.append(root / "relations" / "paper_measures.json")
+    return [f for f in files if f.exists()]
+
+
+def _stat_key(filepath: Path) -> List[int]:
+    st = filepath.stat()
+    return [st.st_mtime_ns, st.st_size]
+
+
+def documents_to_sources(documents: Dict[str, Any]) -> Dict[str, Any]:
+    """將 {相對路徑: JSON 內容} 轉換為 factorbase.read_sources() 格式"""
+    return {
+        "papers": [doc for rel, doc in documents.items() if rel.startswith("papers/metadata/")],
+        "factors": documents.get("factors/factors.json"),
+        "measure_index": documents.get("measures/index.json", {}),
+        "measures": {
+            rel[len("measures/"):]: doc
+            for rel, doc in documents.items()
+            if rel.startswith("measures/") and rel != "measures/index.json"
+        },
+        "relations": documents.get("relations/paper_measures.json"),
+    }
+
+
+def _read_documents(path: Path) -> Optional[Dict[str, Any]]:
+    """讀取 snapshot 中的原始文件（不檢查是否過期）"""
+    try:
+        with open(path, 'rb') as f:
+            header = pickle.load(f)
+            if not isinstance(header, dict) or header.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+                return None
+            return pickle.load(f)["documents"]
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError, KeyError):
+        return None
+
+
+def refresh_snapshot(root: Path = PROJECT_ROOT, output: Optional[Path] = None,
+                     force: bool = False) -> Changes:
+    """
+    增量更新 snapshot
+
+    只重新解析 manifest 判定為新增或修改的來源檔，其餘沿用既有 snapshot 的內容。
+
+    Returns:
+        本次處理的變動集合
+    """
+    root = Path(root)
+    output = Path(output) if output else DEFAULT_SNAPSHOT_PATH
+
+    def update(changes: Changes, current: Dict[str, Dict[str, Any]]) -> None:
+        documents = None if changes.full else _read_documents(output)
+        if documents is None:
+            documents, reparse = {}, list(current)
+        else:
+            reparse = changes.changed
+            for rel in changes.removed:
+                documents.pop(rel, None)
+
+        for rel in reparse:
+            with open(root / rel, 'r', encoding='utf-8') as f:
+                documents[rel] = json.load(f)
+
+        header = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "content_hash": combined_hash(current),
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "sources": {rel: [e["mtime_ns"], e["size"]] for rel, e in current.items()},
+        }
+        # 依來源檔順序輸出，確保 papers 等列表順序穩定
+        payload = {"documents": {rel: documents[rel] for rel in current}}
+
+        output.parent.mkdir(parents=True, exist_ok=True)
+        tmp = output.with_suffix(output.suffix + ".tmp")
+        with open(tmp, 'wb') as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(output)
+
+    # 非預設位置的 snapshot 各自記錄於 manifest，避免互相影響增量判斷
+    name = "snapshot" if output == DEFAULT_SNAPSHOT_PATH else f"snapshot:{output.resolve()}"
+    return refresh_artifact(name, source_files(root), update, output, root=root, force=force)
+
+
+def build_snapshot(root: Path = PROJECT_ROOT, output: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    完整編譯 snapshot 並寫入 output
+
+    Returns:
+        snapshot header
+    """
+    refresh_snapshot(root, output, force=True)
+    return read_header(output)
+
+
+def read_header(path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """只讀取 snapshot header（不反序列化 payload）"""
+    path = Path(path) if path else DEFAULT_SNAPSHOT_PATH
+    try:
+        with open(path, 'rb') as f:
+            header = pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+    if not isinstance(header, dict) or header.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        return None
+    return header
+
+
+def is_stale(header: Dict[str, Any], root: Path = PROJECT_ROOT) -> bool:
+    """以來源檔的 mtime / size 判斷 snapshot 是否過期"""
+    root = Path(root)
+    recorded = header.get("sources", {})
+
+    # 新增或刪除的來源檔（含建置後才出現的 factors.json、relations 與新 Measure）
+    current = {p.relative_to(root).as_posix() for p in source_files(root)}
+    if current != set(recorded):
+        return True
+
+    for rel, key in recorded.items():
+        filepath = root / rel
+        if not filepath.exists() or _stat_key(filepath) != key:
+            return True
+    return False
+
+
+@instrumentation.timed("snapshot.load")
+def load_snapshot(path: Optional[Path] = None, root: Path = PROJECT_ROOT) -> Optional[Dict[str, Any]]:
+    """
+    讀取 snapshot，回傳 factorbase.read_sources() 格式的原始文件
+
+    snapshot 不存在、版本不符或已過期時回傳 None。
+    """
+    path = Path(path) if path else DEFAULT_SNAPSHOT_PATH
+    try:
+        with open(path, 'rb') as f:
+            header = pickle.load(f)
+            if not isinstance(header, dict) or header.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+                return None
+            if is_stale(header, root):
+                return None
+            return documents_to_sources(pickle.load(f)["documents"])
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError, KeyError):
+        return None
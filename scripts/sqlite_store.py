@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+FactorBase SQLite Store
+=======================
+選用的 SQLite 後端: 將 JSON 檔案樹鏡像為單一資料庫檔，
+聚合查詢以索引欄位完成，不需走訪整個目錄。
+
+資料表（欄位對應 docs/schemas/*）:
+    documents        來源檔相對路徑 → 原始 JSON（雙向同步的依據）
+    papers           paper_schema 欄位；market、asset_class、year、conclusion_sign 建有索引
+    factors          factors.json 的每個因子；style 建有索引
+    measures         measure_schema 欄位，formula.* 攤平為 formula_type、formula_window ...
+    measure_aliases  alias → measure_id
+    links            paper_measure_links；paper_id、measure_id、role、significance 建有索引
+    search_fts       FTS5 全文索引（與 search.py 相同的斷詞與欄位權重，BM25 排序）
+
+除 documents 外的資料表皆由 documents 導出，每列以 source 欄位記錄來源檔，
+因此來源檔變動時只需重建該檔產生的資料列。
+
+同步方向:
+    JSON → SQLite   sync_from_json(): 依 manifest 只重新匯入變動的檔案
+    SQLite → JSON   sync_to_json(): 只寫出內容與檔案不同的文件
+    以 put_paper() / put_measure() / put_link() 修改資料庫後，需先 sync_to_json()
+    再由 JSON 端繼續編輯；JSON 檔案樹仍為 source of truth。
+    put_*() 可直接傳入目錄中的紀錄（fb.get_measure("BM")），寫入前以 to_dict() 轉換。
+
+使用方式:
+    from sqlite_store import open_store
+
+    store = open_store()                          # 開啟 .factorbase/factorbase.sqlite 並同步 JSON 變動
+    store.sql("SELECT market, COUNT(*) AS n FROM papers GROUP BY market")
+    store.search("低波動", types=["paper"])
+    fb = FactorBase(sources=store.read_sources())
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable
+
+import instrumentation
+from factorbase import PROJECT_ROOT
+from manifest import Changes, refresh_artifact
+from records import Record, json_default
+from search import FIELD_WEIGHTS, documents_for_source, tokenize
+from snapshot import documents_to_sources, source_files
+
+
+SCHEMA_VERSION = 2
+
+# get_store() 檢查 JSON 變動的最短間隔（秒）
+SYNC_CHECK_INTERVAL = 1.0
+
+# 預設資料庫位置（已列入 .gitignore）
+DEFAULT_SQLITE_PATH = PROJECT_ROOT / ".factorbase" / "factorbase.sqlite"
+
+FACTORS_SOURCE = "factors/factors.json"
+MEASURE_INDEX_SOURCE = "measures/index.json"
+RELATIONS_SOURCE = "relations/paper_measures.json"
+
+PAPER_COLUMNS = (
+    "paper_id", "title", "authors", "year", "journal", "volume", "issue", "pages",
+    "doi", "arxiv_id", "ssrn_id", "bibtex", "market", "asset_class", "abstract",
+    "conclusion_sign", "replicable", "notes",
+)
+
+MEASURE_COLUMNS = (
+    "measure_id", "measure_name", "display_name", "factor", "description",
+    "normalization", "original_paper_id", "notes",
+)
+
+# 攤平為 formula_<key> 欄位的 formula 子欄位（其餘保留於 documents）
+FORMULA_COLUMNS = ("type", "numerator", "denominator", "window", "lag", "calculation", "metric", "base")
+
+LINK_COLUMNS = ("paper_id", "measure_id", "role", "significance", "usage_detail", "notes")
+
+# FTS 欄位順序（bm25() 的權重依此順序傳入）
+FTS_COLUMNS = ("id", "title", "aliases", "text")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS documents (source TEXT PRIMARY KEY, body TEXT NOT NULL);
+
+CREATE TABLE IF NOT EXISTS papers (
+    {", ".join(f"{c} INTEGER" if c == "year" else f"{c} TEXT" for c in PAPER_COLUMNS)},
+    source TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS papers_id ON papers(paper_id);
+CREATE INDEX IF NOT EXISTS papers_market ON papers(market);
+CREATE INDEX IF NOT EXISTS papers_asset_class ON papers(asset_class);
+CREATE INDEX IF NOT EXISTS papers_year ON papers(year);
+CREATE INDEX IF NOT EXISTS papers_conclusion_sign ON papers(conclusion_sign);
+CREATE INDEX IF NOT EXISTS papers_source ON papers(source);
+
+CREATE TABLE IF NOT EXISTS factors (
+    factor_id INTEGER, factor_name TEXT, style TEXT, description_en TEXT, description_zh TEXT,
+    source TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS factors_name ON factors(factor_name);
+CREATE INDEX IF NOT EXISTS factors_style ON factors(style);
+
+CREATE TABLE IF NOT EXISTS measures (
+    {", ".join(f"{c} TEXT" for c in MEASURE_COLUMNS)},
+    {", ".join(f"formula_{c} TEXT" for c in FORMULA_COLUMNS)},
+    source TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS measures_id ON measures(measure_id);
+CREATE INDEX IF NOT EXISTS measures_factor ON measures(factor);
+CREATE INDEX IF NOT EXISTS measures_formula_type ON measures(formula_type);
+CREATE INDEX IF NOT EXISTS measures_normalization ON measures(normalization);
+CREATE INDEX IF NOT EXISTS measures_original_paper ON measures(original_paper_id);
+CREATE INDEX IF NOT EXISTS measures_source ON measures(source);
+
+CREATE TABLE IF NOT EXISTS measure_aliases (alias TEXT, measure_id TEXT, source TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS measure_aliases_alias ON measure_aliases(alias);
+CREATE INDEX IF NOT EXISTS measure_aliases_source ON measure_aliases(source);
+
+CREATE TABLE IF NOT EXISTS links (
+    {", ".join(f"{c} TEXT" for c in LINK_COLUMNS)},
+    source TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS links_paper ON links(paper_id);
+CREATE INDEX IF NOT EXISTS links_measure ON links(measure_id);
+CREATE INDEX IF NOT EXISTS links_role ON links(role);
+CREATE INDEX IF NOT EXISTS links_significance ON links(significance);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+    key UNINDEXED, type UNINDEXED, doc_id UNINDEXED, display_title UNINDEXED, source UNINDEXED,
+    {", ".join(FTS_COLUMNS)},
+    tokenize = "unicode61 remove_diacritics 0 tokenchars '_'"
+);
+"""
+
+_DERIVED_TABLES = ("papers", "factors", "measures", "measure_aliases", "links", "search_fts")
+
+
+def _dumps(source: str, data: Any) -> str:
+    """序列化文件；measures/index.json 的 Measure 項目維持一行一筆的排版"""
+    if source != MEASURE_INDEX_SOURCE:
+        return json.dumps(data, ensure_ascii=False, indent=2) + "\n"
+    entries = []
+    data = dict(data, factors=[
+        dict(group, measures=[entries.append(e) or f"@@entry{len(entries) - 1}@@" for e in group.get("measures", [])])
+        for group in data.get("factors", [])
+    ])
+    text = json.dumps(data, ensure_ascii=False, indent=2)
+    for i, entry in enumerate(entries):
+        text = text.replace(f'"@@entry{i}@@"', json.dumps(entry, ensure_ascii=False), 1)
+    return text + "\n"
+
+
+def _plain(data: Any) -> Any:
+    """目錄紀錄（records.py）轉換為 dict，其他資料原樣回傳"""
+    return data.to_dict() if isinstance(data, Record) else data
+
+
+class SQLiteStore:
+    """
+    SQLite 鏡像資料庫
+
+    documents 保存每個來源檔的完整 JSON（含 schema 以外的欄位），
+    其他資料表為其索引化的投影。
+
+    同一個實例可由多個執行緒共用（例如查詢伺服器），所有存取皆以 lock 序列化。
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else DEFAULT_SQLITE_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.lock = threading.RLock()
+        self.conn.row_factory = sqlite3.Row
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise ValueError(f"資料庫 schema 版本不符: {version}（預期 {SCHEMA_VERSION}），請刪除後重建: {self.path}")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ------------------------------------------------------------------
+    # 文件與導出資料列
+    # ------------------------------------------------------------------
+
+    def get_document(self, source: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute("SELECT body FROM documents WHERE source = ?", (source,)).fetchone()
+        return json.loads(row["body"]) if row else None
+
+    def documents(self) -> Dict[str, Any]:
+        """所有文件（依來源路徑排序，papers 即為檔名順序）"""
+        with self.lock:
+            rows = self.conn.execute("SELECT source, body FROM documents ORDER BY source").fetchall()
+        return {row["source"]: json.loads(row["body"]) for row in rows}
+
+    @instrumentation.timed("sqlite.read")
+    def read_sources(self) -> Dict[str, Any]:
+        """factorbase.read_sources() 格式的原始文件，可直接傳入 FactorBase(sources=...)"""
+        return documents_to_sources(self.documents())
+
+    def _remove_rows(self, source: str) -> None:
+        for table in _DERIVED_TABLES:
+            self.conn.execute(f"DELETE FROM {table} WHERE source = ?", (source,))
+
+    def _insert(self, table: str, row: Dict[str, Any]) -> None:
+        columns = ", ".join(row)
+        placeholders = ", ".join("?" for _ in row)
+        self.conn.execute(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", list(row.values()))
+
+    def _index_document(self, source: str, data: Dict[str, Any]) -> None:
+        """由單一來源檔產生導出資料列"""
+        if source.startswith("papers/metadata/"):
+            row = {c: data.get(c) for c in PAPER_COLUMNS}
+            self._insert("papers", dict(row, source=source))
+        elif source == FACTORS_SOURCE:
+            for factor in data.get("factors", []):
+                description = factor.get("description") or {}
+                self._insert("factors", {
+                    "factor_id": factor.get("factor_id"),
+                    "factor_name": factor.get("factor_name"),
+                    "style": factor.get("style"),
+                    "description_en": description.get("en"),
+                    "description_zh": description.get("zh"),
+                    "source": source,
+                })
+        elif source == RELATIONS_SOURCE:
+            for link in data.get("paper_measure_links", []):
+                self._insert("links", dict({c: link.get(c) for c in LINK_COLUMNS}, source=source))
+        elif source.startswith("measures/") and source != MEASURE_INDEX_SOURCE:
+            formula = data.get("formula") or {}
+            row = {c: data.get(c) for c in MEASURE_COLUMNS}
+            row.update({f"formula_{c}": formula.get(c) for c in FORMULA_COLUMNS})
+            self._insert("measures", dict(row, source=source))
+            for alias in data.get("aliases", []):
+                self._insert("measure_aliases", {"alias": alias, "measure_id": data.get("measure_id"), "source": source})
+
+        for document in documents_for_source(source, data):
+            fields = document["fields"]
+            terms = {field: tokenize(fields.get(field, "")) for field in FTS_COLUMNS}
+            if fields.get("id"):
+                terms["id"].append(str(fields["id"]).lower())
+            row = {
+                "key": document["key"],
+                "type": document["type"],
+                "doc_id": document["id"],
+                "display_title": document["title"],
+                "source": source,
+            }
+            row.update({field: " ".join(tokens) for field, tokens in terms.items()})
+            self._insert("search_fts", row)
+
+    def _put(self, source: str, data: Dict[str, Any]) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO documents (source, body) VALUES (?, ?)",
+            (source, json.dumps(data, ensure_ascii=False, default=json_default)),
+        )
+        self._remove_rows(source)
+        self._index_document(source, data)
+
+    def _delete(self, source: str) -> None:
+        self.conn.execute("DELETE FROM documents WHERE source = ?", (source,))
+        self._remove_rows(source)
+
+    # ------------------------------------------------------------------
+    # 資料庫端修改（之後以 sync_to_json() 寫回檔案樹）
+    # ------------------------------------------------------------------
+
+    def put_document(self, source: str, data: Dict[str, Any]) -> None:
+        """新增或取代來源檔的內容"""
+        with self.lock, self.conn:
+            self._put(source, _plain(data))
+
+    def put_paper(self, paper: Dict[str, Any]) -> str:
+        """新增或取代論文（papers/metadata/<paper_id>.json）"""
+        source = f"papers/metadata/{paper['paper_id']}.json"
+        self.put_document(source, paper)
+        return source
+
+    def put_measure(self, measure: Dict[str, Any], file: str) -> str:
+        """
+        新增或取代 Measure，並同步更新 measures/index.json 的項目
+
+        Args:
+            file: measures/ 下的相對路徑（例如 value/BM.json）
+        """
+        measure = _plain(measure)
+        with self.lock:
+            source = f"measures/{file}"
+            index = self.get_document(MEASURE_INDEX_SOURCE) or {"factors": []}
+            groups = index.setdefault("factors", [])
+            entry = {
+                "measure_id": measure["measure_id"],
+                "display_name": measure.get("display_name"),
+                "file": file,
+                "original_paper_id": measure.get("original_paper_id"),
+            }
+            group = next((g for g in groups if g.get("factor") == measure.get("factor")), None)
+            if group is None:
+                group = {"factor": measure.get("factor"), "count": 0, "measures": []}
+                groups.append(group)
+            # 既有項目就地取代（保留順序），因子改變時移至新的分組
+            position = next((i for i, e in enumerate(group.get("measures", []))
+                             if e.get("measure_id") == entry["measure_id"]), None)
+            for g in groups:
+                g["measures"] = [e for e in g.get("measures", []) if e.get("measure_id") != entry["measure_id"]]
+            group["measures"].insert(len(group["measures"]) if position is None else position, entry)
+            for g in groups:
+                g["count"] = len(g["measures"])
+            if "total_measures" in index:
+                index["total_measures"] = sum(g["count"] for g in groups)
+
+            with self.conn:
+                self._put(source, measure)
+                self._put(MEASURE_INDEX_SOURCE, index)
+        return source
+
+    def put_link(self, link: Dict[str, Any]) -> None:
+        """新增或取代 paper_measure_link（以 paper_id + measure_id 比對）"""
+        link = _plain(link)
+        with self.lock:
+            relations = self.get_document(RELATIONS_SOURCE) or {"paper_measure_links": []}
+            links = relations.setdefault("paper_measure_links", [])
+            key = (link["paper_id"], link["measure_id"])
+            for i, existing in enumerate(links):
+                if (existing.get("paper_id"), existing.get("measure_id")) == key:
+                    links[i] = link
+                    break
+            else:
+                links.append(link)
+            self.put_document(RELATIONS_SOURCE, relations)
+
+    # ------------------------------------------------------------------
+    # 查詢
+    # ------------------------------------------------------------------
+
+    def sql(self, query: str, params: Iterable[Any] = ()) -> List[Dict[str, Any]]:
+        """執行唯讀 SQL 查詢，回傳 dict 列表"""
+        with self.lock:
+            self.conn.execute("PRAGMA query_only = ON")
+            try:
+                return [dict(row) for row in self.conn.execute(query, tuple(params))]
+            finally:
+                self.conn.execute("PRAGMA query_only = OFF")
+
+    def search(self, query: str, limit: int = 10, types: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        FTS5 全文檢索（斷詞與欄位權重同 search.py，回傳格式亦相同）
+        """
+        terms = set(tokenize(query)) | {t.lower() for t in query.split()}
+        if not terms:
+            return []
+        match = " OR ".join('"' + term.replace('"', '""') + '"' for term in sorted(terms))
+        weights = ", ".join(str(FIELD_WEIGHTS.get(field, 1)) for field in FTS_COLUMNS)
+        sql = (
+            f"SELECT type, doc_id, display_title, -bm25(search_fts, 0, 0, 0, 0, 0, {weights}) AS score "
+            f"FROM search_fts WHERE search_fts MATCH ?"
+        )
+        params: List[Any] = [match]
+        types = list(types or [])
+        if types:
+            sql += f" AND type IN ({', '.join('?' for _ in types)})"
+            params.extend(types)
+        sql += " ORDER BY score DESC LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [
+            {"type": row["type"], "id": row["doc_id"], "title": row["display_title"], "score": round(row["score"], 4)}
+            for row in rows
+        ]
+
+    # ------------------------------------------------------------------
+    # 同步
+    # ------------------------------------------------------------------
+
+    @instrumentation.timed("sqlite.sync")
+    def sync_from_json(self, root: Path = PROJECT_ROOT, force: bool = False) -> Changes:
+        """
+        JSON → SQLite: 依 manifest 只重新匯入新增、修改或刪除的來源檔
+
+        Returns:
+            本次處理的變動集合
+        """
+        root = Path(root)
+
+        def update(changes: Changes, current: Dict[str, Dict[str, Any]]) -> None:
+            with self.lock, self.conn:
+                if changes.full:
+                    for source in [r["source"] for r in self.conn.execute("SELECT source FROM documents")]:
+                        if source not in current:
+                            self._delete(source)
+                for source in changes.removed:
+                    self._delete(source)
+                for source in (list(current) if changes.full else changes.changed):
+                    with open(root / source, 'r', encoding='utf-8') as f:
+                        self._put(source, json.load(f))
+
+        name = "sqlite" if self.path == DEFAULT_SQLITE_PATH else f"sqlite:{self.path.resolve()}"
+        return refresh_artifact(name, source_files(root), update, self.path, root=root, force=force)
+
+    def sync_to_json(self, root: Path = PROJECT_ROOT) -> List[str]:
+        """
+        SQLite → JSON: 寫出內容與檔案不同（或檔案不存在）的文件
+
+        內容相同的檔案不會被改寫，保留原本的排版。
+
+        Returns:
+            寫出的來源檔相對路徑
+        """
+        root = Path(root)
+        written = []
+        for source, data in self.documents().items():
+            path = root / source
+            if path.exists():
+                with open(path, 'r', encoding='utf-8') as f:
+                    try:
+                        if json.load(f) == data:
+                            continue
+                    except json.JSONDecodeError:
+                        pass
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            tmp.write_text(_dumps(source, data), encoding='utf-8')
+            tmp.replace(path)
+            written.append(source)
+        return written
+
+
+def open_store(path: Optional[Path] = None, root: Path = PROJECT_ROOT, sync: bool = True) -> SQLiteStore:
+    """
+    開啟 SQLite 資料庫；sync=True 且存在 JSON 檔案樹時先匯入變動的檔案
+    """
+    store = SQLiteStore(path)
+    if sync and (Path(root) / MEASURE_INDEX_SOURCE).exists():
+        store.sync_from_json(root)
+    return store
+
+
+_store: Optional[SQLiteStore] = None
+_store_lock = threading.Lock()
+_last_sync = 0.0
+
+
+def get_store(sync: bool = True, check_interval: float = SYNC_CHECK_INTERVAL) -> SQLiteStore:
+    """
+    取得 process 共用的預設資料庫（.factorbase/factorbase.sqlite）
+
+    sync=True 時若距上次檢查超過 check_interval 秒，先依 manifest 同步 JSON 變動
+    （與查詢服務的 check_interval 相同，避免每次查詢都 stat 所有來源檔）；
+    check_interval=0 時每次呼叫都檢查。
+    """
+    global _store, _last_sync
+    with _store_lock:
+        if _store is None:
+            _store = open_store(sync=False)
+        now = time.monotonic()
+        if sync and now - _last_sync >= check_interval and (PROJECT_ROOT / MEASURE_INDEX_SOURCE).exists():
+            _store.sync_from_json()
+            _last_sync = now
+        return _store
+
+
+def load_sources() -> Dict[str, Any]:
+    """由預設資料庫讀取 read_sources() 格式的原始文件（載入目錄前一律先同步 JSON 變動）"""
+    return get_store(check_interval=0).read_sources()
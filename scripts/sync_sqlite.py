@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+FactorBase SQLite Sync
+======================
+在 JSON 檔案樹與 SQLite 資料庫之間同步。
+
+使用方式:
+    python sync_sqlite.py                     # JSON → SQLite（只匯入變動的檔案）
+    python sync_sqlite.py --full              # 完整重新匯入
+    python sync_sqlite.py --export            # SQLite → JSON（只寫出內容不同的檔案）
+    python sync_sqlite.py --db x.sqlite       # 指定資料庫位置
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import instrumentation
+from factorbase import PROJECT_ROOT
+from sqlite_store import DEFAULT_SQLITE_PATH, SQLiteStore
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="FactorBase SQLite 同步工具",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument("--db", type=Path, default=DEFAULT_SQLITE_PATH,
+                        help=f"資料庫位置（預設: {DEFAULT_SQLITE_PATH.relative_to(PROJECT_ROOT)}）")
+    parser.add_argument("--full", action="store_true", help="忽略 manifest，完整重新匯入")
+    parser.add_argument("--export", action="store_true", help="將資料庫內容寫回 JSON 檔案樹")
+
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+
+    store = SQLiteStore(args.db)
+    try:
+        if args.export:
+            written = store.sync_to_json()
+            if written:
+                print(f"✅ 已寫出 {len(written)} 個檔案:")
+                for source in written:
+                    print(f"   {source}")
+            else:
+                print("✅ JSON 檔案樹與資料庫一致，無需寫出")
+            return 0
+
+        changes = store.sync_from_json(force=args.full)
+        if changes:
+            print(f"✅ 資料庫已更新 ({changes.summary()}): {args.db}")
+        else:
+            print(f"✅ 資料庫無需更新: {args.db}")
+        counts = store.sql(
+            "SELECT (SELECT COUNT(*) FROM papers) AS papers, (SELECT COUNT(*) FROM measures) AS measures, "
+            "(SELECT COUNT(*) FROM links) AS links"
+        )[0]
+        print(f"   papers: {counts['papers']}  measures: {counts['measures']}  links: {counts['links']}")
+        return 0
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,126 +7,57 @@ This script checks:
 2. Required fields are present for each factor
 3. Style values are valid
 4. Descriptions contain both English and Chinese
+
+The checks are shared with validate_json.py (see validation.py).
 """
 
-import json
 import sys
 from pathlib import Path
-from typing import Dict, List, Any
+
+import instrumentation
+from validation import ValidationContext, validate_document
 
 
 def validate_factors_json(file_path: str) -> bool:
     """
     Validate the factors.json file.
     
+    Runs the shared factors checks from validation.py.
+    
     Args:
         file_path: Path to the factors.json file
         
     Returns:
         bool: True if validation passes, False otherwise
     """
-    try:
-        # Load JSON file
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
+    result = validate_document("factors", Path(file_path), ValidationContext())
+    
+    if result.data is not None:
         print(f"✓ Successfully loaded JSON from {file_path}")
-        
-        # Check top-level structure
-        if 'factors' not in data:
-            print("✗ Missing 'factors' key in JSON")
-            return False
-        
-        if 'metadata' not in data:
-            print("✗ Missing 'metadata' key in JSON")
-            return False
-        
-        print("✓ Top-level structure is valid")
-        
-        # Validate each factor
-        factors = data['factors']
-        if not isinstance(factors, list):
-            print("✗ 'factors' should be a list")
-            return False
-        
-        if len(factors) == 0:
-            print("✗ 'factors' list is empty")
-            return False
-        
-        print(f"✓ Found {len(factors)} factors")
-        
-        # Valid style values
-        valid_styles = {'Style', 'Quality', 'Risk', 'Sentiment'}
-        
-        # Required fields for each factor
-        required_fields = {'factor_id', 'factor_name', 'style', 'description'}
-        
-        for idx, factor in enumerate(factors, 1):
-            # Check required fields
-            missing_fields = required_fields - set(factor.keys())
-            if missing_fields:
-                print(f"✗ Factor {idx}: Missing required fields: {missing_fields}")
-                return False
-            
-            # Validate factor_id
-            if not isinstance(factor['factor_id'], int):
-                print(f"✗ Factor {idx}: factor_id should be an integer")
-                return False
-            
-            # Validate factor_name
-            if not isinstance(factor['factor_name'], str) or not factor['factor_name']:
-                print(f"✗ Factor {idx}: factor_name should be a non-empty string")
-                return False
-            
-            # Validate style
-            if factor['style'] not in valid_styles:
-                print(f"✗ Factor {idx} ({factor['factor_name']}): Invalid style '{factor['style']}'. "
-                      f"Must be one of {valid_styles}")
-                return False
-            
-            # Validate description structure
-            description = factor['description']
-            if not isinstance(description, dict):
-                print(f"✗ Factor {idx} ({factor['factor_name']}): description should be a dict")
-                return False
-            
-            if 'en' not in description or 'zh' not in description:
-                print(f"✗ Factor {idx} ({factor['factor_name']}): description must contain 'en' and 'zh' keys")
-                return False
-            
-            if not description['en'] or not description['zh']:
-                print(f"✗ Factor {idx} ({factor['factor_name']}): Both English and Chinese descriptions are required")
-                return False
-            
-            print(f"✓ Factor {idx}: {factor['factor_name']} ({factor['style']}) - Valid")
-        
-        # Validate metadata
-        metadata = data['metadata']
-        recommended_metadata_fields = {'version', 'last_updated', 'description'}
-        missing_metadata = recommended_metadata_fields - set(metadata.keys())
-        if missing_metadata:
-            print(f"⚠ Metadata missing recommended fields: {missing_metadata}")
-        
-        print("✓ Metadata structure is valid")
-        
-        print("\n" + "="*50)
-        print("✓ All validations passed!")
-        print("="*50)
-        return True
-        
-    except json.JSONDecodeError as e:
-        print(f"✗ JSON parsing error: {e}")
-        return False
-    except FileNotFoundError:
-        print(f"✗ File not found: {file_path}")
-        return False
-    except Exception as e:
-        print(f"✗ Unexpected error: {e}")
+    
+    for error in result.errors:
+        if error.startswith("⚠️"):
+            print(f"⚠ {error[2:].strip()}")
+        else:
+            print(f"✗ {error}")
+    
+    if not result.valid:
         return False
+    
+    factors = result.data['factors']
+    print(f"✓ Found {len(factors)} factors")
+    for idx, factor in enumerate(factors, 1):
+        print(f"✓ Factor {idx}: {factor['factor_name']} ({factor['style']}) - Valid")
+    
+    print("\n" + "="*50)
+    print("✓ All validations passed!")
+    print("="*50)
+    return True
 
 
 def main():
     """Main entry point for the validation script."""
+    instrumentation.setup_from_argv(sys.argv)
     # Get the project root directory
     script_dir = Path(__file__).parent
     project_root = script_dir.parent
@@ -4,69 +4,31 @@ Validate and display summary of paper metadata files.
 
 This script validates that all paper metadata JSON files conform to the
 FactorBase schema and displays a summary of the papers collection.
+Validation rules are shared with validate_json.py (see validation.py).
 """
 
-import json
-import os
+import sys
 from pathlib import Path
 from typing import Dict, List, Any
 
-
-def load_paper_metadata(filepath: Path) -> Dict[str, Any]:
-    """Load a paper metadata JSON file."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
+import instrumentation
+from validation import ValidationContext, discover_files, load_schemas, run_checks, validate_files
 
 
 def validate_paper_schema(paper: Dict[str, Any], filepath: str) -> List[str]:
     """
     Validate a paper metadata dict against the required schema.
-    
+
+    Runs the shared paper checks from validation.py.
     Returns a list of validation errors (empty if valid).
     """
-    errors = []
-    
-    # Required fields
-    required_fields = [
-        'paper_id', 'title', 'authors', 'year', 'journal',
-        'market', 'asset_class', 'abstract', 'conclusion_sign',
-        'replicable', 'notes'
-    ]
-    
-    for field in required_fields:
-        if field not in paper:
-            errors.append(f"{filepath}: Missing required field '{field}'")
-        elif paper[field] is None or paper[field] == "":
-            if field != 'notes':  # notes can be empty
-                errors.append(f"{filepath}: Field '{field}' is empty")
-    
-    # Type validation
-    if 'paper_id' in paper and not isinstance(paper['paper_id'], int):
-        errors.append(f"{filepath}: 'paper_id' must be an integer")
-    
-    if 'year' in paper and not isinstance(paper['year'], int):
-        errors.append(f"{filepath}: 'year' must be an integer")
-    
-    # Value validation
-    if 'conclusion_sign' in paper:
-        valid_conclusions = ['positive', 'negative', 'mixed', 'none']
-        if paper['conclusion_sign'] not in valid_conclusions:
-            errors.append(
-                f"{filepath}: 'conclusion_sign' must be one of {valid_conclusions}"
-            )
-    
-    if 'replicable' in paper:
-        valid_replicable = ['yes', 'no', 'unknown']
-        if paper['replicable'] not in valid_replicable:
-            errors.append(
-                f"{filepath}: 'replicable' must be one of {valid_replicable}"
-            )
-    
-    return errors
+    ctx = ValidationContext(load_schemas())
+    return [f"{filepath}: {error}" for error in run_checks("paper", paper, Path(filepath), ctx)]
 
 
 def main():
     """Main function to validate and summarize paper metadata."""
+    instrumentation.setup_from_argv(sys.argv)
     # Find metadata directory
     script_dir = Path(__file__).parent
     metadata_dir = script_dir.parent / 'papers' / 'metadata'
@@ -75,23 +37,16 @@ def main():
         print(f"Error: Metadata directory not found at {metadata_dir}")
         return 1
     
-    # Load all paper metadata files
+    # Validate all paper metadata files (each file is parsed once)
     papers = []
     all_errors = []
     
-    for filepath in sorted(metadata_dir.glob('paper_*.json')):
-        try:
-            paper = load_paper_metadata(filepath)
-            papers.append((filepath.name, paper))
-            
-            # Validate schema
-            errors = validate_paper_schema(paper, filepath.name)
-            all_errors.extend(errors)
-            
-        except json.JSONDecodeError as e:
-            all_errors.append(f"{filepath.name}: Invalid JSON - {e}")
-        except Exception as e:
-            all_errors.append(f"{filepath.name}: Error loading file - {e}")
+    results = validate_files("paper", discover_files("paper"), load_schemas())
+    for result in results:
+        if result.data is not None:
+            papers.append((result.filepath.name, result.data))
+        if not result.valid:
+            all_errors.extend(f"{result.filepath.name}: {error}" for error in result.errors)
     
     # Print validation results
     print("=" * 80)
@@ -0,0 +1,653 @@
+#!/usr/bin/env python3
+"""
+FactorBase Validation Engine
+============================
+FactorBase 的單一驗證流程。
+
+每個檔案只讀取、解析一次，所有規則（Schema、必要欄位、概念層禁止欄位、
+enum、跨檔參照）皆以可插拔的 check 對同一份解析結果執行。
+validate_json.py、validate_papers.py、validate_factors.py 皆為此流程的前端。
+
+新增規則:
+    @register_check("measure")
+    def check_measure_something(data, filepath, ctx) -> List[str]:
+        return ["錯誤訊息", ...]
+
+check 依註冊順序執行；fatal=True 的 check 回報錯誤時，該檔案的後續 check 不再執行。
+"""
+
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Tuple, Optional, Set
+
+try:
+    import jsonschema
+    from jsonschema.exceptions import best_match
+    HAS_JSONSCHEMA = True
+except ImportError:
+    HAS_JSONSCHEMA = False
+
+import instrumentation
+from manifest import file_sha256
+
+
+# 專案根目錄
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# 增量驗證快取位置（已列入 .gitignore）
+DEFAULT_CACHE_PATH = PROJECT_ROOT / ".factorbase" / "validation_cache.json"
+CACHE_VERSION = 2
+
+# 文件類型 → docs/schemas 中的 Schema 名稱
+SCHEMA_NAMES = {
+    "paper": "paper_schema",
+    "measure": "measure_schema",
+    "relations": "paper_measure_schema",
+    "factors": "factors_schema",
+}
+
+KINDS = ["paper", "measure", "relations", "factors"]
+
+
+class ValidationResult:
+    """驗證結果封裝"""
+    def __init__(self, filepath: Path, valid: bool, errors: List[str] = None,
+                 data: Optional[Dict[str, Any]] = None):
+        self.filepath = filepath
+        self.valid = valid
+        self.errors = errors or []
+        # 驗證時解析的文件內容（語法錯誤或取自快取時為 None）
+        self.data = data
+
+
+def load_json(filepath: Path) -> Optional[Dict[str, Any]]:
+    """載入 JSON 檔案"""
+    try:
+        with instrumentation.timer("io.read"), open(filepath, 'r', encoding='utf-8') as f:
+            text = f.read()
+        instrumentation.count("io.files")
+        instrumentation.count("io.bytes", len(text))
+        with instrumentation.timer("json.decode"):
+            return json.loads(text)
+    except FileNotFoundError:
+        return None
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON 解析錯誤: {e}")
+
+
+def load_for_validation(filepath: Path) -> Tuple[Optional[Dict[str, Any]], Optional[ValidationResult]]:
+    """載入待驗證的 JSON（只解析一次），語法錯誤時回傳失敗的驗證結果"""
+    try:
+        return load_json(filepath), None
+    except ValueError as e:
+        return None, ValidationResult(filepath, False, [str(e)])
+
+
+def load_schemas() -> Dict[str, Optional[Dict]]:
+    """載入所有 Schema"""
+    schemas_dir = PROJECT_ROOT / "docs" / "schemas"
+
+    schemas = {}
+    for schema_name in SCHEMA_NAMES.values():
+        schema_path = schemas_dir / f"{schema_name}.json"
+        if schema_path.exists():
+            schemas[schema_name] = load_json(schema_path)
+        else:
+            schemas[schema_name] = None
+
+    return schemas
+
+
+# ----------------------------------------------------------------------
+# Schema 編譯
+# ----------------------------------------------------------------------
+
+# id(schema) → (schema, 已編譯的 validator)；保留 schema 參照以免 id 被重複使用
+_compiled_schemas: Dict[int, Tuple[Dict, Any]] = {}
+
+
+def compile_schema(schema: Dict) -> Any:
+    """將 Schema 編譯為 validator（同一個 schema 物件只編譯一次）"""
+    cached = _compiled_schemas.get(id(schema))
+    if cached is not None and cached[0] is schema:
+        return cached[1]
+
+    with instrumentation.timer("schema.compile"):
+        validator_cls = jsonschema.validators.validator_for(schema)
+        validator_cls.check_schema(schema)
+        validator = validator_cls(schema)
+    _compiled_schemas[id(schema)] = (schema, validator)
+    return validator
+
+
+def validate_against_schema(data: Dict, schema: Dict, filepath: Path) -> ValidationResult:
+    """根據 Schema 驗證 JSON"""
+    if not HAS_JSONSCHEMA:
+        return ValidationResult(filepath, True, ["⚠️ jsonschema 未安裝，跳過 schema 驗證"])
+
+    # 與 jsonschema.validate() 相同，回報最相關的錯誤
+    validator = compile_schema(schema)
+    with instrumentation.timer("schema.validate"):
+        error = best_match(validator.iter_errors(data))
+    if error is None:
+        return ValidationResult(filepath, True)
+    return ValidationResult(filepath, False, [f"Schema 驗證失敗: {error.message}"])
+
+
+# ----------------------------------------------------------------------
+# 驗證上下文
+# ----------------------------------------------------------------------
+
+class ValidationContext:
+    """
+    驗證期間共用的狀態
+
+    - schemas: load_schemas() 格式的 Schema（validator 每個 process 只編譯一次）
+    - 跨檔參照查詢（論文是否存在、measures/index.json 中的 Measure），
+      查詢時自動記錄所依賴的檔案，供增量驗證判斷何時需要重新驗證
+    """
+    def __init__(self, schemas: Optional[Dict[str, Optional[Dict]]] = None, root: Path = PROJECT_ROOT):
+        self.schemas = schemas or {}
+        self.root = Path(root)
+        self.deps: Set[Path] = set()
+        self._paper_exists: Dict[str, bool] = {}
+        self._measure_files: Optional[Dict[str, Optional[str]]] = None
+
+    def schema(self, kind: str) -> Optional[Dict]:
+        """取得文件類型對應的 Schema"""
+        return self.schemas.get(SCHEMA_NAMES[kind])
+
+    def paper_exists(self, paper_id: str) -> bool:
+        """論文檔是否存在（記錄依賴）"""
+        paper_file = self.root / "papers" / "metadata" / f"{paper_id}.json"
+        self.deps.add(paper_file)
+        if paper_id not in self._paper_exists:
+            self._paper_exists[paper_id] = paper_file.exists()
+        return self._paper_exists[paper_id]
+
+    def measure_exists(self, measure_id: str) -> bool:
+        """measure_id 是否列於 measures/index.json（記錄依賴）"""
+        index_path = self.root / "measures" / "index.json"
+        self.deps.add(index_path)
+        if self._measure_files is None:
+            try:
+                index = load_json(index_path) or {}
+            except ValueError:
+                index = {}
+            self._measure_files = {
+                m.get("measure_id"): m.get("file")
+                for factor_group in index.get("factors", [])
+                for m in factor_group.get("measures", [])
+            }
+        if measure_id not in self._measure_files:
+            return False
+        if self._measure_files[measure_id]:
+            self.deps.add(self.root / "measures" / self._measure_files[measure_id])
+        return True
+
+    def take_deps(self) -> List[Path]:
+        """取出並清空目前記錄的依賴檔案"""
+        deps = sorted(self.deps)
+        self.deps = set()
+        return deps
+
+
+# ----------------------------------------------------------------------
+# Check 註冊
+# ----------------------------------------------------------------------
+
+CheckFn = Callable[[Dict[str, Any], Path, ValidationContext], List[str]]
+
+# 文件類型 → [(check, fatal)]
+CHECKS: Dict[str, List[Tuple[CheckFn, bool]]] = {kind: [] for kind in KINDS}
+
+
+def register_check(*kinds: str, fatal: bool = False) -> Callable[[CheckFn], CheckFn]:
+    """註冊 check；fatal=True 時回報錯誤即停止該檔案的後續 check"""
+    def decorator(fn: CheckFn) -> CheckFn:
+        for kind in kinds:
+            CHECKS[kind].append((fn, fatal))
+        return fn
+    return decorator
+
+
+def _missing_fields(data: Dict[str, Any], required: List[str]) -> List[str]:
+    return [f"缺少必要欄位: {field}" for field in required if field not in data]
+
+
+def _enum_errors(data: Dict[str, Any], schema: Optional[Dict], prefix: str = "") -> List[str]:
+    """依 Schema 中的 enum 定義檢查欄位值（jsonschema 未安裝時的後備檢查）"""
+    if not schema or HAS_JSONSCHEMA:
+        return []
+    errors = []
+    for field, spec in schema.get("properties", {}).items():
+        if "enum" in spec and field in data and data[field] not in spec["enum"]:
+            errors.append(f"{prefix}{field} 必須為 {spec['enum']} 之一")
+    return errors
+
+
+def _schema_errors(data: Dict[str, Any], filepath: Path, schema: Optional[Dict]) -> List[str]:
+    if not (schema and HAS_JSONSCHEMA):
+        return []
+    return validate_against_schema(data, schema, filepath).errors
+
+
+# --- Paper ------------------------------------------------------------
+
+PAPER_REQUIRED_FIELDS = [
+    "paper_id", "title", "authors", "year", "journal",
+    "market", "asset_class", "abstract", "conclusion_sign", "replicable"
+]
+
+
+@register_check("paper")
+def check_paper_required(data, filepath, ctx):
+    errors = _missing_fields(data, PAPER_REQUIRED_FIELDS)
+    for field in PAPER_REQUIRED_FIELDS:
+        if field in data and (data[field] is None or data[field] == ""):
+            errors.append(f"欄位不可為空: {field}")
+    return errors
+
+
+@register_check("paper")
+def check_paper_types(data, filepath, ctx):
+    errors = []
+    if "year" in data and not isinstance(data["year"], int):
+        errors.append("year 必須為整數")
+
+    # paper_id 格式與檔名一致（get_paper 依檔名查詢）
+    if "paper_id" in data:
+        if not str(data["paper_id"]).startswith("paper_"):
+            errors.append("paper_id 應以 'paper_' 開頭")
+        elif data["paper_id"] != filepath.stem:
+            errors.append(f"paper_id 與檔名不一致: {data['paper_id']} ≠ {filepath.stem}")
+    return errors
+
+
+@register_check("paper")
+def check_paper_enums(data, filepath, ctx):
+    return _enum_errors(data, ctx.schema("paper"))
+
+
+@register_check("paper")
+def check_paper_schema(data, filepath, ctx):
+    return _schema_errors(data, filepath, ctx.schema("paper"))
+
+
+# --- Measure ----------------------------------------------------------
+
+MEASURE_REQUIRED_FIELDS = ["measure_id", "measure_name", "display_name", "factor", "description"]
+
+# 概念層禁止欄位（應在 MeasureRetriever）
+FORBIDDEN_MEASURE_FIELDS = ["data_source", "frequency"]
+
+
+@register_check("measure")
+def check_measure_required(data, filepath, ctx):
+    return _missing_fields(data, MEASURE_REQUIRED_FIELDS)
+
+
+@register_check("measure")
+def check_measure_forbidden(data, filepath, ctx):
+    return [
+        f"❌ 概念層不應包含: {field}（屬 MeasureRetriever）"
+        for field in FORBIDDEN_MEASURE_FIELDS if field in data
+    ]
+
+
+@register_check("measure")
+def check_measure_formula(data, filepath, ctx):
+    if "formula" in data and "type" not in data["formula"]:
+        return ["formula 缺少 type 欄位"]
+    return []
+
+
+@register_check("measure")
+def check_measure_references(data, filepath, ctx):
+    paper_id = data.get("original_paper_id")
+    if paper_id and not ctx.paper_exists(paper_id):
+        return [f"參照的論文不存在: {paper_id}"]
+    return []
+
+
+@register_check("measure")
+def check_measure_enums(data, filepath, ctx):
+    errors = _enum_errors(data, ctx.schema("measure"))
+    schema = ctx.schema("measure")
+    if schema and isinstance(data.get("formula"), dict):
+        errors.extend(_enum_errors(data["formula"], schema["properties"].get("formula"), "formula."))
+    return errors
+
+
+@register_check("measure")
+def check_measure_schema(data, filepath, ctx):
+    return _schema_errors(data, filepath, ctx.schema("measure"))
+
+
+# --- Relations --------------------------------------------------------
+
+@register_check("relations", fatal=True)
+def check_relations_structure(data, filepath, ctx):
+    if "paper_measure_links" not in data:
+        return ["缺少 paper_measure_links 陣列"]
+    return []
+
+
+@register_check("relations")
+def check_relations_fields(data, filepath, ctx):
+    errors = []
+    for i, link in enumerate(data["paper_measure_links"]):
+        if "paper_id" not in link:
+            errors.append(f"link[{i}] 缺少 paper_id")
+        if "measure_id" not in link:
+            errors.append(f"link[{i}] 缺少 measure_id")
+    return errors
+
+
+@register_check("relations")
+def check_relations_references(data, filepath, ctx):
+    links = data["paper_measure_links"]
+    paper_ids = {link["paper_id"] for link in links if "paper_id" in link}
+    measure_ids = {link["measure_id"] for link in links if "measure_id" in link}
+
+    errors = [f"參照的論文不存在: {p}" for p in sorted(paper_ids) if not ctx.paper_exists(p)]
+    errors.extend(f"參照的 Measure 不存在: {m}" for m in sorted(measure_ids) if not ctx.measure_exists(m))
+    return errors
+
+
+@register_check("relations")
+def check_relations_enums(data, filepath, ctx):
+    schema = ctx.schema("relations")
+    if not schema:
+        return []
+    item_schema = schema["properties"]["paper_measure_links"].get("items")
+    errors = []
+    for i, link in enumerate(data["paper_measure_links"]):
+        errors.extend(_enum_errors(link, item_schema, f"link[{i}]."))
+    return errors
+
+
+@register_check("relations")
+def check_relations_schema(data, filepath, ctx):
+    return _schema_errors(data, filepath, ctx.schema("relations"))
+
+
+# --- Factors ----------------------------------------------------------
+
+FACTOR_REQUIRED_FIELDS = ["factor_id", "factor_name", "style", "description"]
+VALID_FACTOR_STYLES = ["Style", "Quality", "Risk", "Sentiment"]
+RECOMMENDED_FACTOR_METADATA = ["version", "last_updated", "description"]
+
+
+@register_check("factors", fatal=True)
+def check_factors_structure(data, filepath, ctx):
+    errors = [f"缺少 {key} 欄位" for key in ("factors", "metadata") if key not in data]
+    if "factors" in data:
+        if not isinstance(data["factors"], list):
+            errors.append("factors 必須為陣列")
+        elif not data["factors"]:
+            errors.append("factors 陣列為空")
+    return errors
+
+
+@register_check("factors")
+def check_factors_entries(data, filepath, ctx):
+    errors = []
+    seen_ids, seen_names = set(), set()
+    for idx, factor in enumerate(data["factors"], 1):
+        label = f"factor[{idx}]"
+        missing = [field for field in FACTOR_REQUIRED_FIELDS if field not in factor]
+        if missing:
+            errors.append(f"{label} 缺少必要欄位: {', '.join(missing)}")
+            continue
+
+        if not isinstance(factor["factor_id"], int):
+            errors.append(f"{label} factor_id 必須為整數")
+        elif factor["factor_id"] in seen_ids:
+            errors.append(f"{label} factor_id 重複: {factor['factor_id']}")
+        seen_ids.add(factor["factor_id"])
+
+        name = factor["factor_name"]
+        if not isinstance(name, str) or not name:
+            errors.append(f"{label} factor_name 必須為非空字串")
+        elif name.lower() in seen_names:
+            errors.append(f"{label} factor_name 重複: {name}")
+        else:
+            seen_names.add(name.lower())
+
+        if factor["style"] not in VALID_FACTOR_STYLES:
+            errors.append(f"{label} style 必須為 {VALID_FACTOR_STYLES} 之一")
+
+        description = factor["description"]
+        if not isinstance(description, dict):
+            errors.append(f"{label} description 必須為物件")
+        elif not description.get("en") or not description.get("zh"):
+            errors.append(f"{label} description 必須同時包含 en 與 zh")
+    return errors
+
+
+def factors_metadata_warnings(data: Dict[str, Any]) -> List[str]:
+    """factors.json metadata 缺少建議欄位的警告（不影響驗證結果）"""
+    metadata = data.get("metadata")
+    if not isinstance(metadata, dict):
+        return []
+    missing = [field for field in RECOMMENDED_FACTOR_METADATA if field not in metadata]
+    if missing:
+        return [f"⚠️ metadata 缺少建議欄位: {', '.join(missing)}"]
+    return []
+
+
+# ----------------------------------------------------------------------
+# 驗證流程
+# ----------------------------------------------------------------------
+
+def discover_files(kind: str, root: Path = PROJECT_ROOT) -> List[Path]:
+    """列出指定文件類型的所有檔案（固定順序）"""
+    with instrumentation.timer("fs.glob"):
+        return _discover_files(kind, Path(root))
+
+
+def _discover_files(kind: str, root: Path) -> List[Path]:
+    if kind == "paper":
+        return sorted((root / "papers" / "metadata").glob("paper_*.json"))
+    if kind == "measure":
+        files = []
+        for factor_dir in sorted((root / "measures").iterdir()):
+            if factor_dir.is_dir() and factor_dir.name != "__pycache__":
+                files.extend(sorted(factor_dir.glob("*.json")))
+        return files
+    if kind == "relations":
+        path = root / "relations" / "paper_measures.json"
+        return [path] if path.exists() else []
+    if kind == "factors":
+        path = root / "factors" / "factors.json"
+        return [path] if path.exists() else []
+    raise ValueError(f"未知的文件類型: {kind}")
+
+
+def run_checks(kind: str, data: Dict[str, Any], filepath: Path, ctx: ValidationContext) -> List[str]:
+    """對已解析的文件依序執行該類型的所有 check，回傳錯誤訊息"""
+    errors = []
+    for check, fatal in CHECKS[kind]:
+        with instrumentation.timer(f"check.{check.__name__}"):
+            check_errors = check(data, filepath, ctx)
+        errors.extend(check_errors)
+        if fatal and check_errors:
+            break
+    return errors
+
+
+def validate_document(kind: str, filepath: Path, ctx: ValidationContext) -> ValidationResult:
+    """解析一次並依序執行該類型的所有 check"""
+    with instrumentation.timer(f"validate.{kind}"):
+        return _validate_document(kind, filepath, ctx)
+
+
+def _validate_document(kind: str, filepath: Path, ctx: ValidationContext) -> ValidationResult:
+    data, syntax_result = load_for_validation(filepath)
+    if syntax_result:
+        return syntax_result
+    if data is None:
+        return ValidationResult(filepath, False, ["檔案不存在"])
+    if not isinstance(data, dict):
+        return ValidationResult(filepath, False, ["頂層必須為 JSON 物件"])
+
+    errors = run_checks(kind, data, filepath, ctx)
+    valid = len(errors) == 0
+    if kind == "factors":
+        errors.extend(factors_metadata_warnings(data))
+    return ValidationResult(filepath, valid, errors, data)
+
+
+# process pool worker 端的驗證上下文（由 _init_worker 建立，每個 worker 只編譯一次 Schema）
+_worker_ctx: Optional[ValidationContext] = None
+
+
+def _init_worker(schemas: Dict[str, Optional[Dict]]) -> None:
+    global _worker_ctx
+    _worker_ctx = ValidationContext(schemas)
+    if HAS_JSONSCHEMA:
+        for schema in schemas.values():
+            if schema:
+                compile_schema(schema)
+
+
+def _validate_in_worker(kind: str, filepath: Path) -> Tuple[ValidationResult, List[Path]]:
+    result = validate_document(kind, filepath, _worker_ctx)
+    return result, _worker_ctx.take_deps()
+
+
+def validate_files(kind: str,
+                   files: List[Path],
+                   schemas: Optional[Dict[str, Optional[Dict]]] = None,
+                   jobs: int = 1,
+                   cache: Optional["ValidationCache"] = None) -> List[ValidationResult]:
+    """
+    驗證多個同類型檔案，回傳順序與 files 相同
+
+    jobs > 1 時以 process pool 平行驗證快取未命中的檔案；
+    結果依原始順序合併，與逐一驗證的輸出完全一致。
+    """
+    schemas = schemas or {}
+    results: List[Optional[ValidationResult]] = [
+        cache.lookup(f) if cache else None for f in files
+    ]
+    pending = [i for i, r in enumerate(results) if r is None]
+
+    if jobs > 1 and len(pending) > 1:
+        workers = min(jobs, len(pending))
+        chunksize = max(1, len(pending) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(schemas,)) as pool:
+            computed = list(pool.map(_validate_in_worker,
+                                     [kind] * len(pending),
+                                     [files[i] for i in pending],
+                                     chunksize=chunksize))
+    else:
+        ctx = ValidationContext(schemas)
+        computed = []
+        for i in pending:
+            result = validate_document(kind, files[i], ctx)
+            computed.append((result, ctx.take_deps()))
+
+    for i, (result, deps) in zip(pending, computed):
+        results[i] = result
+        if cache:
+            cache.store(files[i], result, deps)
+
+    return results
+
+
+# ----------------------------------------------------------------------
+# 增量驗證快取
+# ----------------------------------------------------------------------
+
+class ValidationCache:
+    """
+    增量驗證快取
+
+    以檔案內容 sha256 為 key 保存驗證結果，並記錄驗證時查詢過的跨檔參照
+    （論文檔、measures/index.json、Measure 檔）的 sha256；任一依賴變動
+    （含刪除）時重新驗證。Schema 或驗證規則變動時整個快取失效。
+    """
+    def __init__(self, key: str, path: Path = DEFAULT_CACHE_PATH):
+        self.path = path
+        self.key = key
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # 相對路徑 → [mtime_ns, size, sha256]，mtime 與大小未變時不重新計算雜湊
+        self.stats: Dict[str, List[Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        if data.get("version") == CACHE_VERSION:
+            self.stats = data.get("stats", {})
+            if data.get("key") == key:
+                self.entries = data.get("entries", {})
+
+    @staticmethod
+    def _rel(filepath: Path) -> str:
+        try:
+            return Path(filepath).relative_to(PROJECT_ROOT).as_posix()
+        except ValueError:
+            return str(filepath)
+
+    def sha256(self, filepath: Path) -> Optional[str]:
+        """取得檔案內容雜湊，檔案不存在時回傳 None"""
+        rel = self._rel(filepath)
+        try:
+            st = Path(filepath).stat()
+        except FileNotFoundError:
+            return None
+        cached = self.stats.get(rel)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+        sha = file_sha256(filepath)
+        self.stats[rel] = [st.st_mtime_ns, st.st_size, sha]
+        return sha
+
+    def lookup(self, filepath: Path) -> Optional[ValidationResult]:
+        """取得快取的驗證結果；內容或依賴變動時回傳 None"""
+        entry = self.entries.get(self._rel(filepath))
+        if entry is None or entry["sha256"] != self.sha256(filepath):
+            self.misses += 1
+            return None
+        for dep, dep_sha in entry.get("deps", {}).items():
+            if self.sha256(PROJECT_ROOT / dep) != dep_sha:
+                self.misses += 1
+                return None
+        self.hits += 1
+        return ValidationResult(filepath, entry["valid"], list(entry["errors"]))
+
+    def store(self, filepath: Path, result: ValidationResult, deps: List[Path] = ()) -> None:
+        """保存驗證結果與其依賴檔案的雜湊"""
+        self.entries[self._rel(filepath)] = {
+            "sha256": self.sha256(filepath),
+            "valid": result.valid,
+            "errors": result.errors,
+            "deps": {self._rel(d): self.sha256(d) for d in deps},
+        }
+
+    def save(self) -> None:
+        # 移除已刪除檔案的紀錄
+        entries = {rel: e for rel, e in self.entries.items() if (PROJECT_ROOT / rel).exists()}
+        stats = {rel: s for rel, s in self.stats.items() if (PROJECT_ROOT / rel).exists()}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({"version": CACHE_VERSION, "key": self.key, "entries": entries, "stats": stats},
+                      f, ensure_ascii=False)
+
+
+def cache_key(schemas: Dict[str, Optional[Dict]]) -> str:
+    """驗證規則的版本 key：Schema 內容、jsonschema 是否可用與驗證規則的程式內容"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(schemas, sort_keys=True).encode('utf-8'))
+    digest.update(f"{CACHE_VERSION}:{HAS_JSONSCHEMA}:".encode('utf-8'))
+    digest.update(file_sha256(Path(__file__)).encode('utf-8'))
+    return digest.hexdigest()
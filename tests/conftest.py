@@ -0,0 +1,37 @@
+"""
+pytest 共用設定與 fixtures
+
+scripts/ 下的模組以同層 import 互相引用，測試時將 scripts/ 加入 sys.path。
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+
+@pytest.fixture
+def project_root() -> Path:
+    """專案根目錄（唯讀使用）"""
+    return PROJECT_ROOT
+
+
+@pytest.fixture
+def catalog_root(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """
+    複製一份知識庫（papers、factors、measures、relations）到暫存目錄，可任意修改
+
+    預設 manifest 亦改至暫存目錄，避免測試寫入專案的 .factorbase/manifest.json。
+    """
+    import manifest
+    for name in ("papers", "factors", "measures", "relations"):
+        shutil.copytree(PROJECT_ROOT / name, tmp_path / name)
+    monkeypatch.setattr(manifest, "DEFAULT_MANIFEST_PATH", tmp_path / ".factorbase" / "manifest.json")
+    return tmp_path
@@ -0,0 +1,119 @@
+"""async_api.py 測試（request coalescing、取消與批次去重）"""
+
+import asyncio
+import threading
+
+import pytest
+
+import server
+from async_api import AsyncQueryError, AsyncServerClient, _AsyncBase
+from factorbase import FactorBase
+
+
+class FakeClient(_AsyncBase):
+    """_execute 等待 release 後才回傳，用來製造同時進行中的查詢"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+        self.executed = []
+
+    async def _execute(self, op, params):
+        self.executed.append((op, params))
+        await self.release.wait()
+        if params.get("q") == "fail":
+            raise AsyncQueryError("查詢失敗")
+        return {"op": op, **params}
+
+
+def test_concurrent_identical_calls_execute_once():
+    async def run():
+        client = FakeClient()
+        calls = [asyncio.ensure_future(client.search("momentum")) for _ in range(3)]
+        await asyncio.sleep(0)
+        client.release.set()
+        results = await asyncio.gather(*calls)
+        return client, results
+
+    client, results = asyncio.run(run())
+    assert len(client.executed) == 1
+    assert results[0] == results[1] == results[2] == {"op": "search", "q": "momentum", "limit": 10}
+    assert client.stats == {"calls": 3, "executed": 1, "coalesced": 2}
+    assert client._inflight == {}
+
+
+def test_cancelling_first_caller_does_not_cancel_coalesced_callers():
+    async def run():
+        client = FakeClient()
+        first = asyncio.ensure_future(client.search("momentum"))
+        second = asyncio.ensure_future(client.search("momentum"))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        client.release.set()
+        result = await second
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return client, result
+
+    client, result = asyncio.run(run())
+    assert result == {"op": "search", "q": "momentum", "limit": 10}
+    assert len(client.executed) == 1
+    assert client._inflight == {}
+
+
+def test_errors_propagate_to_every_caller():
+    async def run():
+        client = FakeClient()
+        calls = [asyncio.ensure_future(client.search("fail")) for _ in range(2)]
+        await asyncio.sleep(0)
+        client.release.set()
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, AsyncQueryError) for r in results)
+
+
+def test_unknown_op_raises():
+    with pytest.raises(AsyncQueryError):
+        asyncio.run(FakeClient().call("no_such_op"))
+
+
+def test_batch_deduplicates_ids():
+    async def run():
+        client = FakeClient()
+        client.release.set()
+        return client, await client.get_measures(["BM", "PB", "BM"])
+
+    client, results = asyncio.run(run())
+    assert list(results) == ["BM", "PB"]
+    assert [params["id"] for _, params in client.executed] == ["BM", "PB"]
+
+
+@pytest.fixture
+def http_server(catalog_root, monkeypatch):
+    fb = FactorBase(catalog_root)
+    monkeypatch.setattr(server, "get_catalog", lambda reload=False: fb)
+    httpd = server.make_server(port=0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_server_client_single_and_batch(http_server):
+    host, port = http_server.server_address[:2]
+
+    async def run():
+        async with AsyncServerClient(host, port) as client:
+            measure = await client.get_measure("BM")
+            missing = await client.get_measure("NO_SUCH_MEASURE")
+            batch = await client.get_measures(["BM", "NO_SUCH_MEASURE", "BM"])
+            return measure, missing, batch
+
+    measure, missing, batch = asyncio.run(run())
+    assert measure["measure_id"] == "BM"
+    assert missing is None
+    assert list(batch) == ["BM", "NO_SUCH_MEASURE"]
+    assert batch["BM"] == measure and batch["NO_SUCH_MEASURE"] is None
@@ -0,0 +1,62 @@
+"""benchmark.py 測試（合成知識庫與結果比較）"""
+
+import json
+
+import pytest
+
+from benchmark import compare_results, generate_corpus, summarize
+from factorbase import FactorBase
+from validation import KINDS, ValidationContext, discover_files, load_schemas, validate_document
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    root = tmp_path_factory.mktemp("corpus")
+    info = generate_corpus(root, n_papers=20, n_measures=30, n_links=50, seed=1)
+    return root, info
+
+
+def test_corpus_sizes(corpus):
+    root, info = corpus
+    assert (info["papers"], info["measures"], info["links"]) == (20, 30, 50)
+    fb = FactorBase(root)
+    assert len(fb.papers) == 20
+    assert len(fb.measures) == 30
+    links = json.loads((root / "relations" / "paper_measures.json").read_text(encoding="utf-8"))
+    pairs = {(l["paper_id"], l["measure_id"]) for l in links["paper_measure_links"]}
+    assert len(pairs) == 50
+
+
+def test_corpus_passes_validation(corpus):
+    root, _ = corpus
+    ctx = ValidationContext(load_schemas(), root=root)
+    for kind in KINDS:
+        for path in discover_files(kind, root):
+            result = validate_document(kind, path, ctx)
+            assert result.valid, (path, result.errors)
+
+
+def test_corpus_is_deterministic(corpus, tmp_path):
+    root, _ = corpus
+    generate_corpus(tmp_path, n_papers=20, n_measures=30, n_links=50, seed=1)
+    for rel in ("relations/paper_measures.json", "measures/index.json", "papers/metadata/paper_007.json"):
+        assert (tmp_path / rel).read_bytes() == (root / rel).read_bytes()
+
+
+def test_links_capped_at_all_pairs(tmp_path):
+    info = generate_corpus(tmp_path, n_papers=2, n_measures=3, n_links=100)
+    assert info["links"] == 6
+
+
+def test_summarize():
+    assert summarize([3.0, 1.0, 2.0]) == {"min": 1.0, "median": 2.0, "max": 3.0, "runs": 3}
+    assert summarize([2.0, 4.0], calls=10)["per_call"] == pytest.approx(0.3)
+
+
+def test_compare_results_flags_regressions(capsys):
+    base = {"corpus": {}, "timings": {"load": {"min": 1.0}, "lookup": {"min": 1.0}, "new": {"min": 0}}}
+    current = {"corpus": {}, "timings": {"load": {"min": 1.5}, "lookup": {"min": 0.5}, "new": {"min": 1.0},
+                                         "added": {"min": 1.0}}}
+    assert compare_results(base, current, threshold=0.2) == ["load"]
+    out = capsys.readouterr().out
+    assert "變慢" in out and "變快" in out
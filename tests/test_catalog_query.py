@@ -0,0 +1,71 @@
+"""catalog_query.py 測試"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from catalog_query import QueryEngine, QuerySyntaxError, parse
+
+
+def _engine():
+    papers = {
+        "paper_001": {"paper_id": "paper_001", "title": "nan", "year": 1992, "volume": 47},
+        "paper_002": {"paper_id": "paper_002", "title": "Momentum", "year": 1993, "volume": "Q1"},
+        "paper_003": {"paper_id": "paper_003", "title": "Size", "year": 1981, "volume": 9},
+        "paper_004": {"paper_id": "paper_004", "title": "inf", "year": 2010},
+    }
+    catalog = SimpleNamespace(papers=papers, measures={}, links=[], factors={})
+    return QueryEngine(catalog)
+
+
+def _ids(results):
+    return [r["paper_id"] for r in results]
+
+
+def test_order_by_mixed_types_groups_numbers_before_strings():
+    engine = _engine()
+    results = engine.execute(parse("papers order by volume"))
+    assert _ids(results) == ["paper_003", "paper_001", "paper_002", "paper_004"]
+
+    results = engine.execute(parse("papers order by volume desc"))
+    assert _ids(results) == ["paper_002", "paper_001", "paper_003", "paper_004"]
+
+
+def test_order_by_numbers():
+    results = _engine().execute(parse("papers where year >= 1990 order by year desc"))
+    assert _ids(results) == ["paper_004", "paper_002", "paper_001"]
+
+
+def test_literal_nan_and_inf_stay_strings():
+    engine = _engine()
+    assert _ids(engine.execute(parse("papers where title = nan"))) == ["paper_001"]
+    assert _ids(engine.execute(parse("papers where title in (inf, Size)"))) == ["paper_003", "paper_004"]
+
+
+def test_literal_numbers_still_cast():
+    assert _ids(_engine().execute(parse("papers where year = 1993"))) == ["paper_002"]
+    assert _ids(_engine().execute(parse("papers where volume = 47"))) == ["paper_001"]
+
+
+def test_in_list_parses_words_numbers_and_strings():
+    condition = parse('papers where year in (1992, 1993, "x y", Momentum)').conditions[0]
+    assert condition.op == "in"
+    assert condition.value == [1992, 1993, "x y", "Momentum"]
+    assert _ids(_engine().execute(parse("papers where year in (1992, 1981)"))) == ["paper_001", "paper_003"]
+
+
+@pytest.mark.parametrize("text", [
+    "measures where factor in ()",
+    "measures where factor in (,)",
+    "measures where factor in (Value,)",
+    "measures where factor in (Value,,Size)",
+    "measures where factor in (Value, ())",
+])
+def test_in_list_rejects_empty_and_punctuation_values(text):
+    with pytest.raises(QuerySyntaxError, match="in 之後需要至少一個值"):
+        parse(text)
+
+
+def test_in_list_unclosed_is_incomplete():
+    with pytest.raises(QuerySyntaxError, match="查詢不完整"):
+        parse("measures where factor in (Value")
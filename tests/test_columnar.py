@@ -0,0 +1,60 @@
+"""columnar.py 測試"""
+
+import pytest
+
+from columnar import FACTOR_COLUMNS, catalog_schema, catalog_tables
+from factorbase import FactorBase
+
+
+@pytest.fixture(scope="module")
+def fb():
+    return FactorBase()
+
+
+def test_catalog_tables_row_counts(fb):
+    tables = catalog_tables(fb)
+    assert len(tables["papers"]["paper_id"]) == len(fb.papers)
+    assert len(tables["measures"]["measure_id"]) == len(fb.measures)
+    assert len(tables["links"]["paper_id"]) == len(fb.links)
+    assert tables["factors"]["factor_id"] == [f["factor_id"] for f in fb.factors.values()]
+
+
+def test_catalog_tables_flatten_formula_and_description(fb):
+    tables = catalog_tables(fb)
+    measures = tables["measures"]
+    row = measures["measure_id"].index("BM")
+    assert measures["formula_type"][row] == fb.get_measure("BM")["formula"]["type"]
+    factors = tables["factors"]
+    assert all(isinstance(text, str) for text in factors["description_en"])
+
+
+def test_factor_id_declared_int32():
+    assert dict(FACTOR_COLUMNS)["factor_id"] == "int32"
+
+
+def test_to_arrow_real_catalog_round_trip(fb, tmp_path):
+    """真實目錄可轉換為 Arrow（factor_id 為 int）並經 IPC / Parquet 往返"""
+    pa = pytest.importorskip("pyarrow")
+    from columnar import export_catalog, load_arrow, load_parquet, to_arrow
+
+    tables = to_arrow(fb)
+    assert tables["factors"].schema.field("factor_id").type == pa.int32()
+    assert tables["links"].schema.field("role").type == pa.dictionary(pa.int16(), pa.string())
+    for name, columns in catalog_schema(fb).items():
+        assert tables[name].column_names == [column for column, _ in columns]
+
+    written = export_catalog(tmp_path, fb=fb)
+    assert len(written) == 8
+    loaded = load_arrow(tmp_path)
+    for name, table in tables.items():
+        assert loaded[name].equals(table), name
+    parquet = load_parquet(tmp_path)
+    for name, table in tables.items():
+        assert parquet[name].to_pylist() == table.to_pylist(), name
+
+
+def test_export_catalog_rejects_unknown_format(fb, tmp_path):
+    pytest.importorskip("pyarrow")
+    from columnar import export_catalog
+    with pytest.raises(ValueError):
+        export_catalog(tmp_path, formats=["csv"], fb=fb)
@@ -0,0 +1,55 @@
+"""factorbase.py 測試（共用目錄的索引與查詢）"""
+
+import copy
+
+import pytest
+
+from factorbase import PROJECT_ROOT, FactorBase, read_sources
+
+
+@pytest.fixture(scope="module")
+def sources():
+    return read_sources(PROJECT_ROOT)
+
+
+@pytest.fixture(scope="module")
+def fb(sources):
+    return FactorBase(sources=sources)
+
+
+def test_lookups_by_id_alias_and_display_name(fb):
+    bm = fb.get_measure("BM")
+    assert bm["measure_id"] == "BM"
+    assert fb.get_measure("B/M") is bm
+    assert fb.get_measure("Book to Market Ratio") is bm
+    assert fb.get_measure("NO_SUCH_MEASURE") is None
+
+
+def test_paper_and_factor_lookups(fb, sources):
+    paper = sources["papers"][0]
+    assert fb.get_paper(paper["paper_id"]) == paper
+    assert fb.get_factor("VALUE") is fb.get_factor("value")
+    assert [m["measure_id"] for m in fb.get_measures_by_factor("value")] == \
+        [m["measure_id"] for m in fb.get_measures_by_factor("Value")]
+    assert "BM" in [m["measure_id"] for m in fb.get_measures_by_factor("Value")]
+
+
+def test_get_many_keeps_order_and_deduplicates(fb):
+    results = fb.get_many(["PB", "NO_SUCH_MEASURE", "BM", "PB"])
+    assert list(results) == ["PB", "NO_SUCH_MEASURE", "BM"]
+    assert results["NO_SUCH_MEASURE"] is None
+    with pytest.raises(ValueError):
+        fb.get_many(["BM"], kind="unknown")
+
+
+def test_measure_id_wins_over_conflicting_alias(sources):
+    sources = copy.deepcopy(sources)
+    pb = next(m for m in sources["measures"].values() if m["measure_id"] == "PB")
+    pb["aliases"].append("BM")
+    fb = FactorBase(sources=sources)
+    assert fb.get_measure("BM")["measure_id"] == "BM"
+    assert fb.get_measure("P/B")["measure_id"] == "PB"
+
+
+def test_measure_papers_accepts_alias(fb):
+    assert fb.get_measure_papers("B/M") == fb.get_measure_papers("BM")
@@ -0,0 +1,220 @@
+"""formula_engine.py 測試（各 compiler 與逐元素 naive 迴圈比較）"""
+
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from formula_engine import FormulaError, compile_all, compile_measure, evaluate_all
+from measure_dag import evaluate_shared
+
+N_ASSETS = 4
+
+
+def _measure(measure_id, **formula):
+    return {"measure_id": measure_id, "formula": formula}
+
+
+def _elementwise(shape, fn):
+    """逐元素呼叫 fn(t, j)，fn 回傳 None 時為 NaN"""
+    out = np.full(shape, np.nan)
+    for t in range(shape[0]):
+        for j in range(shape[1]):
+            value = fn(t, j)
+            out[t, j] = np.nan if value is None else value
+    return out
+
+
+def _div(a, b):
+    if math.isnan(a) or math.isnan(b) or b == 0:
+        return None
+    return a / b
+
+
+def _ln(x):
+    return math.log(x) if x > 0 else None
+
+
+def _panel(n, seed=0, nan=True):
+    rng = np.random.default_rng(seed)
+    panel = {
+        "a": rng.normal(size=(n, N_ASSETS)),
+        "b": rng.normal(size=(n, N_ASSETS)),
+        "price": rng.uniform(1, 100, size=(n, N_ASSETS)),
+        "shares": rng.uniform(1e3, 1e4, size=(n, N_ASSETS)),
+        "monthly_returns": rng.normal(0, 0.05, size=(n, N_ASSETS)),
+        "market_returns": rng.normal(0, 0.04, size=n),
+    }
+    if n:
+        panel["b"][0, 0] = 0.0                   # 分母為 0
+        panel["shares"][n // 2, 1] = -1.0        # log 的定義域外
+        if nan:
+            for name in ("a", "price", "shares"):
+                panel[name][n // 3, 2] = np.nan
+    return panel
+
+
+# 長歷史、短於視窗的歷史與空 panel
+LENGTHS = [30, 6, 0]
+
+
+@pytest.mark.parametrize("n", LENGTHS)
+@pytest.mark.parametrize("formula_type", ["ratio", "growth_rate"])
+def test_ratio_matches_naive(n, formula_type):
+    p = _panel(n)
+    compiled = compile_measure(_measure("R", type=formula_type, numerator="a", denominator="b"))
+    assert compiled.inputs == ("a", "b")
+    expected = _elementwise(p["a"].shape, lambda t, j: _div(p["a"][t, j], p["b"][t, j]))
+    np.testing.assert_allclose(compiled(p), expected)
+
+
+@pytest.mark.parametrize("n", LENGTHS)
+def test_return_matches_naive(n):
+    p = _panel(n)
+    compiled = compile_measure(_measure("MOM", type="return", window="12M", lag="1M",
+                                        calculation="(price_t_minus_1 / price_t_minus_12) - 1"))
+    price = p["price"]
+
+    def naive(t, j):
+        if t < 12:
+            return None
+        ratio = _div(price[t - 1, j], price[t - 12, j])
+        return None if ratio is None else ratio - 1
+    np.testing.assert_allclose(compiled(p), _elementwise(price.shape, naive))
+
+
+@pytest.mark.parametrize("n", LENGTHS)
+def test_log_matches_naive(n):
+    p = _panel(n)
+    compiled = compile_measure(_measure("LN", type="log", calculation="ln(shares)"))
+    shares = p["shares"]
+    expected = _elementwise(shares.shape, lambda t, j: None if math.isnan(shares[t, j]) else _ln(shares[t, j]))
+    np.testing.assert_allclose(compiled(p), expected)
+
+
+@pytest.mark.parametrize("n", LENGTHS)
+def test_log_change_matches_naive(n):
+    p = _panel(n)
+    compiled = compile_measure(_measure("NSI", type="log_change", window="1Y",
+                                        calculation="log(shares_t) - log(shares_t_minus_1)"))
+    shares = p["shares"]
+
+    def naive(t, j):
+        if t < 12 or math.isnan(shares[t, j]) or math.isnan(shares[t - 12, j]):
+            return None
+        now, before = _ln(shares[t, j]), _ln(shares[t - 12, j])
+        return None if now is None or before is None else now - before
+    np.testing.assert_allclose(compiled(p), _elementwise(shares.shape, naive))
+
+
+@pytest.mark.parametrize("n", LENGTHS)
+def test_product_matches_naive(n):
+    p = _panel(n)
+    compiled = compile_measure(_measure("ME", type="product", calculation="price * shares"))
+    expected = _elementwise(p["price"].shape, lambda t, j: p["price"][t, j] * p["shares"][t, j])
+    np.testing.assert_allclose(compiled(p), expected)
+
+
+@pytest.mark.parametrize("n", LENGTHS)
+def test_rolling_std_matches_naive(n):
+    p = _panel(n)
+    p["monthly_returns"][n // 2:n // 2 + 1, 0] = np.nan
+    compiled = compile_measure(_measure("VOL", type="rolling", window="6M", metric="standard_deviation",
+                                        base="monthly_returns"))
+    r = p["monthly_returns"]
+
+    def naive(t, j):
+        if t < 5:
+            return None
+        block = r[t - 5:t + 1, j]
+        return None if np.isnan(block).any() else float(np.std(block, ddof=1))
+    np.testing.assert_allclose(compiled(p), _elementwise(r.shape, naive), rtol=1e-9)
+
+
+@pytest.mark.parametrize("n", LENGTHS)
+def test_rolling_beta_matches_naive(n):
+    p = _panel(n)
+    compiled = compile_measure(_measure("BETA", type="rolling", window="6M", metric="regression_beta",
+                                        base="monthly_returns_vs_market"))
+    assert compiled.inputs == ("monthly_returns", "market_returns")
+    y, x = p["monthly_returns"], p["market_returns"]
+
+    def naive(t, j):
+        if t < 5:
+            return None
+        xs, ys = x[t - 5:t + 1], y[t - 5:t + 1, j]
+        return float(np.cov(xs, ys, ddof=1)[0, 1] / np.var(xs, ddof=1))
+    np.testing.assert_allclose(compiled(p), _elementwise(y.shape, naive), rtol=1e-9)
+
+
+@pytest.mark.parametrize("n", LENGTHS)
+def test_high_52w_matches_naive(n):
+    """52_week_high_price 由 price 的 12 期滾動最大值計算（NaN 略過）"""
+    p = _panel(n)
+    compiled = compile_measure(_measure("HIGH_52W", type="ratio", numerator="current_price",
+                                        denominator="52_week_high_price", window="52W"))
+    assert compiled.inputs == ("price",)
+    price = p["price"]
+
+    def naive(t, j):
+        if t < 11:
+            return None
+        block = price[t - 11:t + 1, j]
+        block = block[~np.isnan(block)]
+        return _div(price[t, j], float(block.max())) if len(block) else None
+    np.testing.assert_allclose(compiled(p), _elementwise(price.shape, naive))
+
+
+def test_compile_errors():
+    with pytest.raises(FormulaError):
+        compile_measure(_measure("X", type="unknown"))
+    with pytest.raises(FormulaError):
+        compile_measure(_measure("X", type="ratio", numerator="a"))
+    with pytest.raises(FormulaError):
+        compile_measure(_measure("X", type="return", window="TTM"))
+    with pytest.raises(FormulaError):
+        compile_measure(_measure("X", type="return", window="1M", lag="1M"))
+    with pytest.raises(FormulaError):
+        compile_measure(_measure("X", type="rolling", window="6M", metric="skewness", base="a"))
+
+
+def test_missing_input_raises_key_error():
+    compiled = compile_measure(_measure("R", type="ratio", numerator="a", denominator="zzz"))
+    assert compiled.missing_inputs(_panel(3)) == ["zzz"]
+    with pytest.raises(KeyError):
+        compiled(_panel(3))
+
+
+@pytest.fixture(scope="module")
+def catalog_measures():
+    from factorbase import FactorBase
+    return list(FactorBase().measures.values())
+
+
+def _catalog_panel(n):
+    rng = np.random.default_rng(1)
+    names = ["book_value_equity", "market_value_equity", "net_income_ttm", "operating_cash_flow_ttm",
+             "revenue_ttm", "price", "gross_profit_ttm", "total_assets", "operating_profit_ttm",
+             "avg_shareholders_equity", "avg_total_assets", "total_assets_change", "delta_total_assets",
+             "total_assets_lag", "capex_ttm", "shares", "shares_outstanding", "market_cap", "monthly_returns"]
+    panel = {name: rng.uniform(0.5, 2.0, size=(n, N_ASSETS)) for name in names}
+    panel["market_returns"] = rng.normal(0, 0.04, size=n)
+    return panel
+
+
+@pytest.mark.parametrize("n", [72, 6])
+def test_catalog_measures_evaluate_all_and_shared_agree(catalog_measures, n):
+    """目錄中所有 Measures 皆可編譯；短歷史（6 個月）亦不可拋出例外"""
+    compiled, errors = compile_all(catalog_measures)
+    assert errors == {}
+    panel = _catalog_panel(n)
+    direct = evaluate_all(catalog_measures, panel)
+    shared = evaluate_shared(catalog_measures, panel)
+    assert set(direct) == set(compiled) == set(shared)
+    for measure_id, values in direct.items():
+        assert values.shape == (n, N_ASSETS)
+        np.testing.assert_allclose(shared[measure_id], values, rtol=1e-9, err_msg=measure_id)
+    # 6 個月的 panel 不足以計算 52 週高點
+    if n < 12:
+        assert np.isnan(direct["HIGH_52W"]).all()
@@ -0,0 +1,43 @@
+"""generate_papers_index.py 測試（增量更新需與完整重建相同）"""
+
+import json
+
+from generate_papers_index import load_index, refresh_papers_index
+
+
+def _index(root):
+    return load_index(root / "papers" / "papers_index.json")
+
+
+def _paper_files(root):
+    return sorted((root / "papers" / "metadata").glob("paper_*.json"))
+
+
+def test_incremental_update_matches_full_rebuild(catalog_root):
+    refresh_papers_index(catalog_root)
+    local_pdfs = {p["paper_id"]: p["local_pdf"] for p in _index(catalog_root)["papers"]}
+
+    first, second = _paper_files(catalog_root)[:2]
+    paper = json.loads(first.read_text(encoding="utf-8"))
+    paper["market"] = "Test Market"
+    first.write_text(json.dumps(paper, ensure_ascii=False, indent=2), encoding="utf-8")
+    second.unlink()
+
+    changes = refresh_papers_index(catalog_root)
+    assert changes.modified == [first.relative_to(catalog_root).as_posix()]
+    assert changes.removed == [second.relative_to(catalog_root).as_posix()]
+    incremental = _index(catalog_root)
+    assert incremental["by_market"]["Test Market"] == [paper["paper_id"]]
+    assert second.stem not in incremental["by_id"]
+
+    assert refresh_papers_index(catalog_root, force=True).full
+    assert _index(catalog_root) == incremental
+    # 手動維護的 local_pdf 在重建後保留
+    assert all(p["local_pdf"] == local_pdfs[p["paper_id"]] for p in incremental["papers"])
+
+
+def test_unchanged_tree_is_noop(catalog_root):
+    refresh_papers_index(catalog_root)
+    before = (catalog_root / "papers" / "papers_index.json").read_text(encoding="utf-8")
+    assert not refresh_papers_index(catalog_root)
+    assert (catalog_root / "papers" / "papers_index.json").read_text(encoding="utf-8") == before
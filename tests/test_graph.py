@@ -0,0 +1,44 @@
+"""graph.py 測試"""
+
+from graph import RelationGraph
+
+
+def _graph():
+    links = [
+        {"paper_id": "paper_001", "measure_id": "BM", "role": "primary_sorting_variable"},
+        {"paper_id": "paper_001", "measure_id": "ME", "role": "control_variable"},
+        # 同一篇論文重複使用同一個 Measure
+        {"paper_id": "paper_001", "measure_id": "ME", "role": "risk_factor"},
+        {"paper_id": "paper_002", "measure_id": "BM", "role": "primary_sorting_variable"},
+        {"paper_id": "paper_002", "measure_id": "ME", "role": "control_variable"},
+        {"paper_id": "paper_002", "measure_id": "MOM_12M", "role": "control_variable"},
+        {"paper_id": "paper_003", "measure_id": "MOM_12M", "role": "primary_sorting_variable"},
+    ]
+    factor_measures = {"value": ["BM"], "size": ["ME"], "momentum": ["MOM_12M"]}
+    measure_factor = {"BM": "Value", "ME": "Size", "MOM_12M": "Momentum"}
+    return RelationGraph(links, factor_measures, measure_factor)
+
+
+def test_co_used_measures_deduplicates_papers():
+    result = _graph().co_used_measures("BM")
+    assert result == [
+        {"measure_id": "ME", "count": 2, "papers": ["paper_001", "paper_002"]},
+        {"measure_id": "MOM_12M", "count": 1, "papers": ["paper_002"]},
+    ]
+
+
+def test_related_papers_deduplicates_measures():
+    result = _graph().related_papers("paper_002")
+    assert result == [
+        {"paper_id": "paper_001", "count": 2, "shared_measures": ["BM", "ME"]},
+        {"paper_id": "paper_003", "count": 1, "shared_measures": ["MOM_12M"]},
+    ]
+
+
+def test_factors_studied_by_paper_first_occurrence_order():
+    assert _graph().factors_studied_by_paper("paper_002") == ["Value", "Size", "Momentum"]
+    assert _graph().factors_studied_by_paper("paper_999") == []
+
+
+def test_co_used_measures_unknown_measure():
+    assert _graph().co_used_measures("NOPE") == []
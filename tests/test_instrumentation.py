@@ -0,0 +1,82 @@
+"""instrumentation.py 測試（計時器、計數器、報表與 CLI 選項）"""
+
+import io
+import subprocess
+import sys
+
+import pytest
+
+import instrumentation
+
+
+@pytest.fixture
+def enabled():
+    """啟用計時並於測試後還原為停用、清空的狀態"""
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_disabled_records_nothing():
+    instrumentation.disable()
+    instrumentation.reset()
+    with instrumentation.timer("phase"):
+        pass
+    instrumentation.count("items")
+    assert instrumentation.timer("phase") is instrumentation.timer("other")
+    data = instrumentation.report()
+    assert data["timers"] == {} and data["counters"] == {}
+
+
+def test_timers_and_counters(enabled):
+    for _ in range(3):
+        with instrumentation.timer("inner"):
+            pass
+    instrumentation.add_time("outer", 2.0)
+    instrumentation.count("items", 5)
+    instrumentation.count("items")
+
+    @instrumentation.timed("fn")
+    def double(x):
+        return 2 * x
+
+    assert double(21) == 42
+    data = instrumentation.report()
+    assert list(data["timers"])[0] == "outer"
+    assert data["timers"]["inner"]["calls"] == 3
+    assert data["timers"]["fn"]["calls"] == 1
+    assert data["timers"]["outer"]["mean"] == 2.0
+    assert data["counters"] == {"items": 6}
+
+    stream = io.StringIO()
+    instrumentation.print_report(stream)
+    assert "inner" in stream.getvalue() and "items" in stream.getvalue()
+
+
+def test_profiling_writes_pstats(tmp_path):
+    path = tmp_path / "out.pstats"
+    stream = io.StringIO()
+    with instrumentation.profiling(path, top=5, stream=stream):
+        sum(range(1000))
+    assert path.exists()
+    assert "cProfile" in stream.getvalue()
+
+
+def test_setup_from_argv_strips_flags(monkeypatch):
+    calls = []
+    monkeypatch.setattr(instrumentation, "start", lambda timings, profile: calls.append((timings, profile)))
+    argv = ["script.py", "--timings", "BM", "--profile=out.pstats", "-v"]
+    instrumentation.setup_from_argv(argv)
+    assert argv == ["script.py", "BM", "-v"]
+    assert calls == [(True, "out.pstats")]
+
+
+def test_cli_timings_go_to_stderr(project_root):
+    proc = subprocess.run(
+        [sys.executable, str(project_root / "scripts" / "query_factorbase.py"), "--measure", "BM", "--timings"],
+        capture_output=True, text=True, encoding="utf-8", check=True,
+    )
+    assert "Timings" in proc.stderr and "catalog.load" in proc.stderr
+    assert "Timings" not in proc.stdout
@@ -0,0 +1,89 @@
+"""lazy_catalog.py 測試（LRU 快取與按需載入的目錄）"""
+
+import json
+
+import pytest
+
+from factorbase import FactorBase
+from lazy_catalog import LRUCache, LazyFactorBase
+
+
+def test_lru_eviction_and_counts():
+    cache = LRUCache(maxsize=2)
+    loads = []
+
+    def get(key):
+        return cache.get(key, lambda: loads.append(key) or key.upper())
+
+    assert [get("a"), get("b"), get("a"), get("c")] == ["A", "B", "A", "C"]
+    # a 最近被使用，c 加入時淘汰 b
+    assert "a" in cache and "b" not in cache and "c" in cache
+    assert get("b") == "B"
+    assert loads == ["a", "b", "c", "b"]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (1, 4, 2, 2)
+    assert stats["hit_rate"] == pytest.approx(0.2)
+
+
+def test_lru_zero_size_never_caches():
+    cache = LRUCache(maxsize=0)
+    loads = []
+    for _ in range(3):
+        cache.get("a", lambda: loads.append(1))
+    assert len(loads) == 3 and len(cache) == 0
+
+
+def test_lru_load_error_is_not_cached():
+    cache = LRUCache(maxsize=2)
+
+    def fail():
+        raise KeyError("a")
+
+    with pytest.raises(KeyError):
+        cache.get("a", fail)
+    assert "a" not in cache
+    assert cache.get("a", lambda: 1) == 1
+
+
+def test_lru_negative_size():
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=-1)
+
+
+def test_lazy_catalog_matches_eager(catalog_root):
+    eager = FactorBase(catalog_root)
+    lazy = LazyFactorBase(catalog_root, cache_size=2)
+
+    assert [p["paper_id"] for p in lazy.list_papers()] == [p["paper_id"] for p in eager.list_papers()]
+    assert lazy.cache_stats()["papers"]["misses"] == 0
+
+    for paper_id in eager.papers:
+        assert lazy.get_paper(paper_id) == eager.get_paper(paper_id)
+    assert lazy.get_measure("B/M") == eager.get_measure("BM")
+    assert lazy.resolve_measure_id("ROE") == "ROE_TTM"
+
+    stats = lazy.cache_stats()["papers"]
+    assert stats["size"] == 2
+    assert stats["misses"] == len(eager.papers)
+    assert stats["evictions"] == len(eager.papers) - 2
+
+
+def test_lazy_catalog_cache_hits(catalog_root):
+    lazy = LazyFactorBase(catalog_root, cache_size=4)
+    paper_id = next(iter(lazy.papers))
+    first = lazy.get_paper(paper_id)
+    assert lazy.get_paper(paper_id) is first
+    stats = lazy.cache_stats()["papers"]
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_headers_follow_source_changes(catalog_root):
+    paper_id = next(iter(LazyFactorBase(catalog_root).paper_headers))
+    path = catalog_root / "papers" / "metadata" / f"{paper_id}.json"
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["title"] = "Updated Title"
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    lazy = LazyFactorBase(catalog_root)
+    assert lazy.paper_headers[paper_id]["title"] == "Updated Title"
+    assert lazy.get_paper(paper_id)["title"] == "Updated Title"
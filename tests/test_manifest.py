@@ -0,0 +1,75 @@
+"""manifest.py 測試（來源檔變動偵測與增量更新）"""
+
+import os
+
+from manifest import Manifest, refresh_artifact
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def _files(root):
+    return sorted(root.glob("src/*.json"))
+
+
+def test_diff_detects_added_modified_removed(tmp_path):
+    root = tmp_path
+    _write(root / "src" / "a.json", "1")
+    _write(root / "src" / "b.json", "2")
+    manifest = Manifest(tmp_path / "manifest.json")
+    assert manifest.diff("x", manifest.scan(root, _files(root))).full
+
+    manifest.record("x", manifest.scan(root, _files(root)))
+    _write(root / "src" / "a.json", "changed")
+    (root / "src" / "b.json").unlink()
+    _write(root / "src" / "c.json", "3")
+    changes = manifest.diff("x", manifest.scan(root, _files(root)))
+    assert (changes.added, changes.modified, changes.removed) == (["src/c.json"], ["src/a.json"], ["src/b.json"])
+    assert changes.summary() == "+1 ~1 -1"
+
+
+def test_touch_without_content_change_is_not_modified(tmp_path):
+    path = tmp_path / "src" / "a.json"
+    _write(path, "same")
+    manifest = Manifest(tmp_path / "manifest.json")
+    manifest.record("x", manifest.scan(tmp_path, _files(tmp_path)))
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert not manifest.diff("x", manifest.scan(tmp_path, _files(tmp_path)))
+
+
+def test_refresh_artifact_processes_only_changes(tmp_path):
+    for name in "abc":
+        _write(tmp_path / "src" / f"{name}.json", name)
+    output = tmp_path / "out.txt"
+    calls = []
+
+    def update(changes, current):
+        calls.append(changes)
+        output.write_text("built")
+
+    path = tmp_path / "manifest.json"
+    first = refresh_artifact("x", _files(tmp_path), update, output, root=tmp_path, manifest=Manifest(path))
+    assert first.full and len(calls) == 1
+
+    # 無變動: 不呼叫 update
+    assert not refresh_artifact("x", _files(tmp_path), update, output, root=tmp_path, manifest=Manifest(path))
+    assert len(calls) == 1
+
+    _write(tmp_path / "src" / "b.json", "bb")
+    changes = refresh_artifact("x", _files(tmp_path), update, output, root=tmp_path, manifest=Manifest(path))
+    assert changes.changed == ["src/b.json"] and not changes.full
+
+    # 產物不存在或 force 時完整重建
+    output.unlink()
+    assert refresh_artifact("x", _files(tmp_path), update, output, root=tmp_path, manifest=Manifest(path)).full
+    assert refresh_artifact("x", _files(tmp_path), update, output, root=tmp_path,
+                            force=True, manifest=Manifest(path)).full
+
+
+def test_manifest_ignores_other_versions(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text('{"version": 0, "artifacts": {"x": {}}}', encoding="utf-8")
+    assert Manifest(path).artifacts == {}
@@ -0,0 +1,79 @@
+"""measure_dag.py 測試（共用運算圖的結果需與 formula_engine.evaluate_all() 相同）"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from formula_engine import evaluate_all
+from measure_dag import build_plan, evaluate_shared
+
+N_ASSETS = 3
+INPUTS = ["book_value_equity", "market_value_equity", "net_income_ttm", "operating_cash_flow_ttm",
+          "revenue_ttm", "price", "gross_profit_ttm", "total_assets", "operating_profit_ttm",
+          "avg_shareholders_equity", "avg_total_assets", "total_assets_change", "delta_total_assets",
+          "total_assets_lag", "capex_ttm", "shares", "shares_outstanding", "market_cap", "monthly_returns"]
+
+
+@pytest.fixture(scope="module")
+def measures():
+    from factorbase import FactorBase
+    return list(FactorBase().measures.values())
+
+
+def _panel(n=40, drop=()):
+    rng = np.random.default_rng(7)
+    panel = {name: rng.uniform(0.5, 2.0, size=(n, N_ASSETS)) for name in INPUTS if name not in drop}
+    panel["market_returns"] = rng.normal(0, 0.04, size=n)
+    return panel
+
+
+def _assert_same(direct, shared):
+    assert set(direct) == set(shared)
+    for measure_id, values in direct.items():
+        np.testing.assert_allclose(shared[measure_id], values, rtol=1e-12, err_msg=measure_id)
+
+
+@pytest.mark.parametrize("drop", [
+    (),
+    ("market_cap", "market_value_equity"),
+    ("market_cap", "market_value_equity", "shares_outstanding"),
+    ("price",),
+])
+def test_evaluate_shared_matches_evaluate_all(measures, drop):
+    panel = _panel(drop=drop)
+    _assert_same(evaluate_all(measures, panel), evaluate_shared(measures, panel))
+
+
+def test_market_value_composed_from_price_and_shares(measures):
+    full = _panel()
+    full["market_value_equity"] = full["market_cap"] = full["price"] * full["shares_outstanding"]
+    partial = {k: v for k, v in full.items() if k not in ("market_cap", "market_value_equity")}
+    for engine in (evaluate_all, evaluate_shared):
+        expected, composed = engine(measures, full), engine(measures, partial)
+        for measure_id in ("BM", "PB", "EP_TTM", "LN_ME"):
+            np.testing.assert_allclose(composed[measure_id], expected[measure_id], rtol=1e-12)
+
+
+def test_evaluate_shared_normalize_matches_evaluate_all(measures):
+    panel = _panel()
+    _assert_same(evaluate_all(measures, panel, normalize=True), evaluate_shared(measures, panel, normalize=True))
+
+
+def test_plan_shares_nodes_and_records_skipped(measures):
+    plan = build_plan(measures, _panel(drop=("market_cap", "market_value_equity", "shares_outstanding")).keys())
+    stats = plan.stats()
+    assert stats["measures"] == len(plan.outputs)
+    assert stats["nodes"] < stats["naive_nodes"]
+    assert "缺少輸入變數" in plan.skipped["BM"]
+    # 失敗的 Measure 不殘留節點
+    assert all(op != "input" or params[0] in plan.available for op, _, params in plan.nodes)
+
+
+def test_evaluate_returns_independent_arrays(measures):
+    panel = _panel()
+    plan = build_plan(measures, panel.keys())
+    results = plan.evaluate(panel)
+    before = panel["price"].copy()
+    for values in results.values():
+        values[...] = 0
+    np.testing.assert_array_equal(panel["price"], before)
@@ -0,0 +1,106 @@
+"""normalization.py 測試（與逐日 naive 迴圈比較）"""
+
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from normalization import NormalizationError, Normalizer, normalize
+
+MIN_COUNT = 3
+
+
+def _panel(seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=(12, 7)).round(1)          # round 製造同值
+    values[0, :] = np.nan                               # 全部缺值
+    values[1, 2:] = np.nan                              # 有效樣本不足 min_count
+    values[2, :] = 1.5                                  # 橫斷面全部相同
+    values[3, [1, 4]] = np.nan
+    return values
+
+
+def _row_zscore(row):
+    valid = [x for x in row if not math.isnan(x)]
+    if len(valid) < MIN_COUNT:
+        return [math.nan] * len(row)
+    mean = sum(valid) / len(valid)
+    std = math.sqrt(sum((x - mean) ** 2 for x in valid) / (len(valid) - 1)) or 1.0
+    return [math.nan if math.isnan(x) else (x - mean) / std for x in row]
+
+
+def _row_rank(row, scale=1.0):
+    valid = [x for x in row if not math.isnan(x)]
+    if len(valid) < MIN_COUNT:
+        return [math.nan] * len(row)
+    out = []
+    for x in row:
+        if math.isnan(x):
+            out.append(math.nan)
+            continue
+        below = sum(v < x for v in valid)
+        ties = sum(v == x for v in valid)
+        out.append((below + (ties - 1) / 2) / (len(valid) - 1) * scale)
+    return out
+
+
+def _naive(values, row_fn):
+    return np.array([row_fn(list(row)) for row in values])
+
+
+@pytest.mark.parametrize("method, expected", [
+    ("zscore_cross_sectional", lambda v: _naive(v, _row_zscore)),
+    ("rank", lambda v: _naive(v, _row_rank)),
+    ("percentile", lambda v: _naive(v, lambda r: _row_rank(r, 100.0))),
+    ("zscore_time_series", lambda v: _naive(v.T, _row_zscore).T),
+])
+def test_matches_naive_reference(method, expected):
+    values = _panel()
+    np.testing.assert_allclose(normalize(values, method, min_count=MIN_COUNT), expected(values),
+                               rtol=1e-12, atol=1e-12)
+
+
+def test_winsorize_matches_row_quantiles():
+    values = _panel()
+    out = normalize(values, "winsorize", min_count=MIN_COUNT, limits=(0.1, 0.9))
+    for row, result in zip(values, out):
+        valid = row[~np.isnan(row)]
+        if len(valid) < MIN_COUNT:
+            assert np.isnan(result).all()
+            continue
+        lower, upper = np.quantile(valid, [0.1, 0.9])
+        np.testing.assert_array_equal(result, np.clip(row, lower, upper))
+
+
+def test_log_transform_nonpositive_is_nan():
+    values = np.array([[1.0, math.e, 0.0, -1.0, np.nan]])
+    np.testing.assert_allclose(normalize(values, "log_transform"), [[0.0, 1.0, np.nan, np.nan, np.nan]])
+
+
+@pytest.mark.parametrize("method", ["zscore_cross_sectional", "zscore_time_series", "log_transform",
+                                    "rank", "winsorize", "none"])
+def test_normalizer_in_place_matches_normalize(method):
+    normalizer = Normalizer(min_count=MIN_COUNT)
+    # 重複呼叫（重用暫存）結果不變
+    for seed in range(3):
+        expected = normalize(_panel(seed), method, min_count=MIN_COUNT)
+        values = _panel(seed)
+        assert normalizer.normalize(values, method, out=values) is values
+        np.testing.assert_array_equal(values, expected)
+
+
+def test_normalizer_reuses_mask_buffers():
+    normalizer = Normalizer(min_count=MIN_COUNT)
+    for _ in range(3):
+        normalizer.normalize(_panel(), "zscore_cross_sectional")
+        normalizer.normalize(_panel(), "log_transform")
+    normalizer.normalize(_panel(), "zscore_time_series")
+    assert set(normalizer._masks) == {(12, 7), (7, 12)}
+
+
+def test_unknown_method_and_bad_shape_raise():
+    with pytest.raises(NormalizationError):
+        normalize(_panel(), "minmax")
+    with pytest.raises(NormalizationError):
+        normalize(np.zeros(5), "rank")
@@ -0,0 +1,73 @@
+"""query_factorbase.py 命令列測試"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+import query_factorbase
+
+
+def _run(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["query_factorbase.py", *argv])
+    query_factorbase.main()
+
+
+@pytest.mark.parametrize("name", ["missing.txt", "."])
+def test_from_file_unreadable_path_exits_with_message(monkeypatch, tmp_path, capsys, name):
+    path = tmp_path / name
+    with pytest.raises(SystemExit) as exc:
+        _run(monkeypatch, "--from-file", str(path))
+    assert exc.value.code == 1
+    assert capsys.readouterr().out.startswith(f"❌ 無法讀取 {path}")
+
+
+class ClosedAfter:
+    """寫入 limit 行後 flush 拋出 BrokenPipeError 的輸出串流（模擬 | head）"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.lines = []
+
+    def write(self, text):
+        self.lines.append(text)
+
+    def flush(self):
+        if len(self.lines) > self.limit:
+            raise BrokenPipeError
+
+
+def test_print_ndjson_stops_on_broken_pipe():
+    produced = []
+
+    def records():
+        for i in range(100):
+            produced.append(i)
+            yield {"i": i}
+
+    assert query_factorbase.print_ndjson(records(), ClosedAfter(2)) == 2
+    # 管線關閉後不再繼續產生資料
+    assert produced == [0, 1, 2]
+
+
+def test_list_ndjson_one_record_per_line(monkeypatch, capsys, project_root):
+    from factorbase import FactorBase
+    _run(monkeypatch, "--list-measures", "--ndjson")
+    lines = capsys.readouterr().out.splitlines()
+    records = [json.loads(line) for line in lines]
+    assert len(records) == len(FactorBase(project_root).measures)
+    assert all("measure_id" in r for r in records)
+
+
+def test_ndjson_cli_closed_pipe_exits_cleanly(project_root):
+    proc = subprocess.Popen(
+        [sys.executable, str(project_root / "scripts" / "query_factorbase.py"), "--list-papers", "--ndjson"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    json.loads(proc.stdout.readline())
+    proc.stdout.close()
+    stderr = proc.stderr.read().decode("utf-8")
+    proc.stderr.close()
+    assert proc.wait(timeout=30) == 0
+    assert "Traceback" not in stderr
@@ -0,0 +1,106 @@
+"""records.py 測試（Mapping 介面、深層轉換與序列化）"""
+
+import copy
+import json
+import pickle
+import sqlite3
+
+import pytest
+
+from factorbase import FactorBase
+from records import Factor, Formula, Measure, PaperMeasureLink, json_default
+
+MEASURE = {
+    "measure_id": "BM",
+    "display_name": "Book to Market",
+    "factor": "Value",
+    "formula": {"type": "ratio", "numerator": "book_value_equity", "denominator": "market_value_equity"},
+    "aliases": ["B/M"],
+    "custom": {"source": "test"},
+}
+
+
+@pytest.fixture(scope="module")
+def fb():
+    return FactorBase()
+
+
+def test_mapping_interface_matches_dict():
+    measure = Measure.from_dict(MEASURE)
+    assert measure == MEASURE
+    assert list(measure) == list(MEASURE)
+    assert len(measure) == len(MEASURE)
+    assert measure["custom"] == {"source": "test"}
+    assert measure.display_name == "Book to Market"
+    assert "notes" not in measure and measure.get("notes", "-") == "-"
+    with pytest.raises(KeyError):
+        measure["notes"]
+
+
+def test_nested_formula_is_record():
+    measure = Measure.from_dict(MEASURE)
+    assert isinstance(measure["formula"], Formula)
+    assert measure["formula"]["type"] == "ratio"
+
+
+def test_interned_fields_share_string_objects():
+    a = PaperMeasureLink.from_dict({"paper_id": "".join(["paper_", "001"]), "role": "".join(["primary_", "x"])})
+    b = PaperMeasureLink.from_dict({"paper_id": "".join(["paper_", "001"]), "role": "".join(["primary_", "x"])})
+    assert a.paper_id is b.paper_id and a.role is b.role
+
+
+def test_pickle_round_trip():
+    measure = Measure.from_dict(MEASURE)
+    assert pickle.loads(pickle.dumps(measure)) == measure
+
+
+def test_to_dict_is_deep_and_independent():
+    measure = Measure.from_dict(copy.deepcopy(MEASURE))
+    data = measure.to_dict()
+    assert type(data) is dict and type(data["formula"]) is dict
+    assert data == MEASURE
+    data["aliases"].append("BTM")
+    data["formula"]["type"] = "changed"
+    data["custom"]["source"] = "changed"
+    assert measure == MEASURE
+
+
+def test_factor_description_to_dict_is_copied():
+    factor = Factor.from_dict({"factor_id": 1, "factor_name": "Value", "description": {"en": "Value"}})
+    data = factor.to_dict()
+    data["description"]["en"] = "changed"
+    assert factor.description == {"en": "Value"}
+
+
+def test_json_serialization(fb):
+    measure = fb.get_measure("BM")
+    with pytest.raises(TypeError):
+        # dict(record) 只是淺層複製，formula 仍為 Formula 紀錄
+        json.dumps(dict(measure))
+    expected = json.dumps(measure.to_dict())
+    assert json.dumps(measure, default=json_default) == expected
+    assert json.loads(expected) == measure
+
+
+def test_json_default_rejects_other_objects():
+    with pytest.raises(TypeError):
+        json.dumps(object(), default=json_default)
+
+
+def test_sqlite_store_accepts_records(fb, catalog_root, tmp_path):
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+    except sqlite3.OperationalError:
+        pytest.skip("sqlite3 未編譯 FTS5")
+    from sqlite_store import open_store
+
+    store = open_store(tmp_path / "factorbase.sqlite", root=catalog_root)
+    try:
+        store.put_measure(fb.get_measure("BM"), "value/BM.json")
+        store.put_paper(next(iter(fb.papers.values())))
+        store.put_link(fb.links[0])
+        assert store.get_document("measures/value/BM.json") == fb.get_measure("BM").to_dict()
+        # 紀錄寫入的文件與原始 JSON 相同（index.json 的 total_measures 會由 put_measure 重新計算）
+        assert set(store.sync_to_json(catalog_root)) <= {"measures/index.json"}
+    finally:
+        store.close()
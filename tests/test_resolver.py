@@ -0,0 +1,81 @@
+"""resolver.py 測試（名稱解析與模糊建議）"""
+
+import pytest
+
+from resolver import MeasureResolver, edit_distance, normalize_name
+
+MEASURES = {
+    "BM": {"display_name": "Book to Market Ratio", "aliases": ["B/M", "BE/ME"]},
+    "ROE_TTM": {"display_name": "Return on Equity (TTM)", "aliases": []},
+    "MOM_12M": {"display_name": "12-Month Momentum", "aliases": []},
+    "MOM_6M": {"display_name": "6-Month Momentum", "aliases": []},
+    "CAPEX_TA": {"display_name": "Capex to Assets", "aliases": []},
+}
+
+
+@pytest.fixture
+def resolver():
+    return MeasureResolver(MEASURES)
+
+
+def test_normalize_name():
+    assert normalize_name("Book-to-Market") == "booktomarket"
+    assert normalize_name("ＢＥ／ＭＥ") == "beme"
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    ("", "abc", 3),
+    ("kitten", "sitting", 3),
+    ("MOM_12M", "MOM_21M", 2),
+    ("same", "same", 0),
+])
+def test_edit_distance(a, b, expected):
+    assert edit_distance(a, b) == expected
+    assert edit_distance(b, a) == expected
+
+
+def test_edit_distance_limit_stops_early():
+    assert edit_distance("abcdef", "uvwxyz", limit=2) == 3
+    assert edit_distance("a", "abcdef", limit=2) == 3
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("BM", "BM"),
+    ("B/M", "BM"),
+    ("book-to-market ratio", "BM"),
+    ("be me", "BM"),
+    ("ROE", "ROE_TTM"),
+    ("roe", "ROE_TTM"),
+    ("CAPEX", "CAPEX_TA"),
+])
+def test_resolve(resolver, name, expected):
+    assert resolver.resolve(name) == expected
+
+
+def test_ambiguous_stem_is_not_resolved(resolver):
+    # MOM 同時對應 MOM_12M 與 MOM_6M
+    assert resolver.resolve("MOM") is None
+    assert {s["measure_id"] for s in resolver.suggest("MOM")} >= {"MOM_12M", "MOM_6M"}
+
+
+def test_measure_id_wins_over_alias():
+    resolver = MeasureResolver({
+        "EP": {"display_name": "Earnings Yield", "aliases": ["PE"]},
+        "PE": {"display_name": "Price to Earnings", "aliases": []},
+    })
+    assert resolver.resolve("PE") == "PE"
+
+
+def test_suggest(resolver):
+    suggestions = resolver.suggest("MOM_21M")
+    assert suggestions[0]["measure_id"] == "MOM_12M"
+    assert suggestions[0]["score"] == pytest.approx(1 - 2 / 6, abs=1e-4)     # mom21m vs mom12m
+    assert resolver.suggest("zzzzzz") == []
+    assert resolver.suggest("") == []
+
+
+def test_catalog_resolution(project_root):
+    from factorbase import FactorBase
+    fb = FactorBase(project_root)
+    assert fb.resolve_measure_id("ROE") == "ROE_TTM"
+    assert "MOM_12M" in [s["measure_id"] for s in fb.suggest_measures("MOM_21M")]
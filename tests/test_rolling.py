@@ -0,0 +1,116 @@
+"""rolling.py 測試（與逐期重算的 naive 版本比較）"""
+
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rolling import RollingMax, parse_window, rolling_beta, rolling_max, rolling_std
+
+
+def _naive_max(x, window):
+    out = np.full(x.shape, np.nan)
+    for t in range(window - 1, len(x)):
+        block = x[t - window + 1:t + 1]
+        with np.errstate(invalid="ignore"):
+            valid = ~np.isnan(block)
+            out[t] = np.where(valid.any(axis=0), np.nanmax(np.where(valid, block, -np.inf), axis=0), np.nan)
+    return out
+
+
+def _naive_std(x, window):
+    out = np.full(x.shape, np.nan)
+    for t in range(window - 1, len(x)):
+        out[t] = np.std(x[t - window + 1:t + 1], axis=0, ddof=1)
+    return out
+
+
+def _naive_beta(y, x, window):
+    out = np.full(y.shape, np.nan)
+    for t in range(window - 1, len(y)):
+        xs = x[t - window + 1:t + 1]
+        for j in range(y.shape[1]):
+            ys = y[t - window + 1:t + 1, j]
+            var = np.var(xs, ddof=1)
+            out[t, j] = np.cov(xs, ys, ddof=1)[0, 1] / var if var > 0 else np.nan
+    return out
+
+
+@pytest.fixture
+def panel():
+    rng = np.random.default_rng(7)
+    return rng.normal(size=(40, 5))
+
+
+@pytest.mark.parametrize("window", [1, 3, 12, 40])
+def test_rolling_max_matches_naive(panel, window):
+    np.testing.assert_allclose(rolling_max(panel, window), _naive_max(panel, window) if window > 1 else panel)
+
+
+def test_rolling_max_skips_nan(panel):
+    panel[5:9, 0] = np.nan
+    panel[:, 1] = np.nan
+    np.testing.assert_allclose(rolling_max(panel, 3), _naive_max(panel, 3))
+    assert np.isnan(rolling_max(panel, 3)[:, 1]).all()
+
+
+@pytest.mark.parametrize("n", [0, 1, 6, 11])
+def test_rolling_max_short_history(n):
+    """歷史短於視窗時全部為 NaN（不可拋出 broadcast 錯誤）"""
+    x = np.arange(n * 3, dtype=float).reshape(n, 3)
+    out = rolling_max(x, 12)
+    assert out.shape == x.shape
+    assert np.isnan(out).all()
+
+
+def test_rolling_max_1d():
+    x = np.array([1.0, 3.0, 2.0, 5.0, 4.0])
+    np.testing.assert_allclose(rolling_max(x, 2), [np.nan, 3, 3, 5, 5])
+    assert np.isnan(rolling_max(x[:1], 2)).all()
+
+
+def test_rolling_max_streaming_matches_batch(panel):
+    panel[3, 2] = np.nan
+    engine = RollingMax(4, panel.shape[1])
+    streamed = np.array([engine.update(row) for row in panel])
+    np.testing.assert_allclose(streamed, rolling_max(panel, 4))
+
+
+def test_rolling_max_invalid_window(panel):
+    with pytest.raises(ValueError):
+        rolling_max(panel, 0)
+
+
+@pytest.mark.parametrize("window", [2, 5, 36])
+def test_rolling_std_matches_naive(panel, window):
+    np.testing.assert_allclose(rolling_std(panel, window), _naive_std(panel, window), rtol=1e-9, atol=1e-12)
+
+
+def test_rolling_std_nan_and_short_history(panel):
+    panel[10, 0] = np.nan
+    out = rolling_std(panel, 3)
+    assert np.isnan(out[10:13, 0]).all()
+    assert not np.isnan(out[13, 0])
+    assert np.isnan(rolling_std(panel[:2], 3)).all()
+    assert rolling_std(panel[:0], 3).shape == (0, panel.shape[1])
+    assert rolling_std(panel[:0, 0], 3).shape == (0,)
+
+
+def test_rolling_beta_matches_naive(panel):
+    market = panel[:, 0]
+    y = panel[:, 1:] + 0.5 * market[:, None]
+    np.testing.assert_allclose(rolling_beta(y, market, 12), _naive_beta(y, market, 12), rtol=1e-9)
+    assert np.isnan(rolling_beta(y[:5], market[:5], 12)).all()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("12M", 12), ("1Y", 12), ("52W", 12), ("3Q", 9), ("0", 0), ("TTM", None), (None, None),
+])
+def test_parse_window_monthly(text, expected):
+    assert parse_window(text) == expected
+
+
+def test_parse_window_daily():
+    assert parse_window("1Y", periods_per_year=252) == 252
+    assert math.isclose(parse_window("52W", periods_per_year=252), 252)
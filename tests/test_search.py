@@ -0,0 +1,66 @@
+"""search.py 測試（斷詞、BM25 排序與增量索引）"""
+
+from factorbase import FactorBase
+from search import SearchIndex, load_search_index, refresh_search_index, tokenize
+
+
+def doc(key, title, text, type_="paper"):
+    return {"key": key, "type": type_, "id": key, "title": title,
+            "fields": {"id": key, "title": title, "text": text}}
+
+
+def test_tokenize_english_and_chinese():
+    assert tokenize("The Accruals Anomalies") == ["accrual", "anomaly"]
+    assert tokenize("低波動") == ["低", "波", "動", "低波", "波動"]
+
+
+def test_bm25_ranks_rarer_and_title_matches_higher():
+    index = SearchIndex()
+    index.add_document(doc("a", "Momentum returns", "price momentum in stocks"))
+    index.add_document(doc("b", "Value premium", "book to market and momentum"))
+    index.add_document(doc("c", "Size effect", "small stocks earn more"))
+
+    assert [r["id"] for r in index.search("momentum")] == ["a", "b"]
+    # stock 出現在兩份文件、premium 只出現在一份，且在標題中
+    assert index.search("stocks premium")[0]["id"] == "b"
+    assert index.search("nothing matches") == []
+
+
+def test_type_filter_and_limit():
+    index = SearchIndex()
+    index.add_document(doc("p", "Momentum", "momentum", "paper"))
+    index.add_document(doc("m", "Momentum", "momentum", "measure"))
+    assert [r["type"] for r in index.search("momentum", types=["measure"])] == ["measure"]
+    assert len(index.search("momentum", limit=1)) == 1
+
+
+def test_remove_document():
+    index = SearchIndex()
+    index.add_document(doc("a", "Momentum", "momentum"))
+    index.add_document(doc("b", "Value", "value"))
+    index.remove_document("a")
+    assert index.search("momentum") == []
+    assert len(index) == 1
+    assert "momentum" not in index.postings
+
+
+def test_catalog_measure_lookup_by_id(project_root):
+    index = SearchIndex.from_catalog(FactorBase(project_root))
+    results = index.search("MOM_12M", types=["measure"])
+    assert results[0]["id"] == "MOM_12M"
+
+
+def test_incremental_index_matches_full_rebuild(catalog_root):
+    output = catalog_root / ".factorbase" / "search_index.pkl"
+    refresh_search_index(catalog_root, output)
+
+    paper = next((catalog_root / "papers" / "metadata").glob("paper_*.json"))
+    paper.unlink()
+    refresh_search_index(catalog_root, output)
+    incremental = load_search_index(output)
+
+    full = SearchIndex.from_catalog(FactorBase(catalog_root))
+    assert f"paper:{paper.stem}" not in incremental.docs
+    assert incremental.docs == full.docs
+    assert incremental.postings == full.postings
+    assert incremental.search("momentum", limit=20) == full.search("momentum", limit=20)
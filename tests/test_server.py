@@ -0,0 +1,162 @@
+"""server.py 測試（批次查詢與來源檔變動時的重新載入）"""
+
+import json
+import socket
+import stat
+import threading
+import urllib.request
+
+import pytest
+
+import server
+from factorbase import FactorBase
+from server import CatalogService, QueryError, make_server
+
+
+@pytest.fixture
+def catalog(catalog_root, monkeypatch):
+    """以暫存目錄的知識庫取代共用 catalog；reloads 記錄 get_catalog(reload=True) 的次數"""
+    state = {"fb": FactorBase(catalog_root), "reloads": 0}
+
+    def get_catalog(reload=False):
+        if reload:
+            state["fb"] = FactorBase(catalog_root)
+            state["reloads"] += 1
+        return state["fb"]
+
+    monkeypatch.setattr(server, "get_catalog", get_catalog)
+    monkeypatch.setattr(server, "get_catalog_backend", lambda: "json")
+    return state
+
+
+@pytest.fixture
+def service(catalog, catalog_root):
+    return CatalogService(root=catalog_root, check_interval=0)
+
+
+def test_execute_returns_measure(service):
+    assert service.execute("measure", {"id": "BM"})["measure_id"] == "BM"
+
+
+def test_execute_errors_carry_status(service):
+    with pytest.raises(QueryError) as missing:
+        service.execute("measure", {"id": "NO_SUCH_MEASURE"})
+    assert missing.value.status == 404
+    with pytest.raises(QueryError) as unknown:
+        service.execute("no_such_op", {})
+    assert unknown.value.status == 404
+    with pytest.raises(QueryError) as required:
+        service.execute("paper", {})
+    assert required.value.status == 400
+
+
+def test_batch_ids_expands_to_one_request_per_id(service):
+    results = service.batch({"op": "measure", "ids": ["BM", "NO_SUCH_MEASURE"]})
+    assert [r["id"] for r in results] == ["BM", "NO_SUCH_MEASURE"]
+    assert results[0]["result"]["measure_id"] == "BM"
+    assert results[1]["status"] == 404 and "error" in results[1]
+
+
+def test_batch_requests_keep_order_and_isolate_errors(service, catalog):
+    paper_id = next(iter(catalog["fb"].papers))
+    results = service.batch({"requests": [
+        {"op": "paper", "id": paper_id},
+        "not an object",
+        {"op": "no_such_op"},
+        {"op": "co_used", "id": "BM"},
+    ]})
+    assert results[0]["result"]["paper_id"] == paper_id
+    assert results[1] == {"error": "請求需為 JSON object", "status": 400}
+    assert results[2]["status"] == 404
+    assert results[3]["result"] == catalog["fb"].graph.co_used_measures("BM")
+    # 未知的 op 不計入請求數
+    assert service.stats["requests"] == 2
+
+
+def test_batch_rejects_malformed_and_oversized_bodies(service):
+    with pytest.raises(QueryError):
+        service.batch({"op": "measure"})
+    with pytest.raises(QueryError):
+        service.batch([{"op": "list_factors"}] * (server.MAX_BATCH + 1))
+
+
+def test_catalog_reloads_when_source_file_changes(service, catalog, catalog_root):
+    service.catalog()
+    assert service.stats["reloads"] == 0 and catalog["reloads"] == 0
+
+    path = next((catalog_root / "papers" / "metadata").glob("*.json"))
+    paper = json.loads(path.read_text(encoding="utf-8"))
+    paper["title"] = "Reloaded Title"
+    path.write_text(json.dumps(paper, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    assert service.execute("paper", {"id": paper["paper_id"]})["title"] == "Reloaded Title"
+    assert service.stats["reloads"] == 1 and catalog["reloads"] == 1
+    service.catalog()
+    assert service.stats["reloads"] == 1
+
+
+def test_catalog_skips_check_within_interval(catalog, catalog_root):
+    service = CatalogService(root=catalog_root, check_interval=3600)
+    service.catalog()
+    path = next((catalog_root / "papers" / "metadata").glob("*.json"))
+    path.write_text(path.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+    service.catalog()
+    assert service.stats["reloads"] == 0
+
+
+def test_health_reports_counts(service, catalog):
+    health = service.health()
+    assert health["status"] == "ok"
+    assert health["measures"] == len(catalog["fb"].measures)
+    assert health["links"] == len(catalog["fb"].links)
+
+
+def test_http_batch_round_trip(catalog):
+    httpd = make_server(port=0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = httpd.server_address[:2]
+        request = urllib.request.Request(
+            f"http://{host}:{port}/batch",
+            data=json.dumps({"op": "measure", "ids": ["BM", "NO_SUCH_MEASURE"]}).encode("utf-8"),
+            method="POST",
+        )
+        with urllib.request.urlopen(request) as response:
+            results = json.load(response)["results"]
+        assert results[0]["result"]["measure_id"] == "BM"
+        assert results[1]["status"] == 404
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_make_server_refuses_to_delete_regular_file(catalog, tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("keep me", encoding="utf-8")
+    with pytest.raises(FileExistsError):
+        make_server(socket_path=path)
+    assert path.read_text(encoding="utf-8") == "keep me"
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="需要 Unix socket")
+def test_make_server_replaces_stale_socket(catalog, tmp_path):
+    path = tmp_path / "factorbase.sock"
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(str(path))
+    stale.close()
+    httpd = make_server(socket_path=path)
+    try:
+        assert stat.S_ISSOCK(path.lstat().st_mode)
+    finally:
+        httpd.server_close()
+
+
+def test_request_count_is_exact_under_concurrency(service):
+    threads = [threading.Thread(target=lambda: [service.execute("list_factors", {}) for _ in range(100)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert service.health()["requests"] == 800
@@ -0,0 +1,34 @@
+"""snapshot.py 測試"""
+
+import shutil
+
+from snapshot import is_stale, load_snapshot, read_header, refresh_snapshot
+
+
+def test_is_stale_fresh_snapshot(catalog_root):
+    output = catalog_root / "snapshot.pkl"
+    refresh_snapshot(catalog_root, output, force=True)
+    assert not is_stale(read_header(output), catalog_root)
+    assert load_snapshot(output, catalog_root) is not None
+
+
+def test_is_stale_modified_paper(catalog_root):
+    output = catalog_root / "snapshot.pkl"
+    refresh_snapshot(catalog_root, output, force=True)
+    paper = sorted((catalog_root / "papers" / "metadata").glob("paper_*.json"))[0]
+    paper.write_text(paper.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+    assert is_stale(read_header(output), catalog_root)
+
+
+def test_is_stale_source_added_after_build(catalog_root):
+    """建置時不存在的 relations/paper_measures.json 出現後需視為過期"""
+    relations = catalog_root / "relations"
+    backup = catalog_root / "paper_measures.json"
+    shutil.move(relations / "paper_measures.json", backup)
+    output = catalog_root / "snapshot.pkl"
+    refresh_snapshot(catalog_root, output, force=True)
+    assert not is_stale(read_header(output), catalog_root)
+
+    shutil.move(backup, relations / "paper_measures.json")
+    assert is_stale(read_header(output), catalog_root)
+    assert load_snapshot(output, catalog_root) is None
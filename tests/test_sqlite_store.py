@@ -0,0 +1,120 @@
+"""sqlite_store.py 測試（JSON → SQLite → JSON 的同步往返）"""
+
+import json
+import sqlite3
+
+import pytest
+
+from factorbase import FactorBase, read_sources
+from sqlite_store import open_store
+
+
+def _has_fts5() -> bool:
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+
+pytestmark = pytest.mark.skipif(not _has_fts5(), reason="sqlite3 未編譯 FTS5")
+
+
+@pytest.fixture
+def store(catalog_root, tmp_path):
+    store = open_store(tmp_path / "store" / "factorbase.sqlite", root=catalog_root)
+    yield store
+    store.close()
+
+
+def test_sync_from_json_matches_json_sources(store, catalog_root):
+    assert store.read_sources() == read_sources(catalog_root)
+
+
+def test_sync_from_json_without_changes_is_noop(store, catalog_root):
+    changes = store.sync_from_json(catalog_root)
+    assert not changes.full and not changes.changed and not changes.removed
+
+
+def test_sync_from_json_picks_up_modified_file(store, catalog_root):
+    path = next((catalog_root / "papers" / "metadata").glob("*.json"))
+    paper = json.loads(path.read_text(encoding="utf-8"))
+    paper["title"] = "Modified Title"
+    path.write_text(json.dumps(paper, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    store.sync_from_json(catalog_root)
+    assert store.get_document(f"papers/metadata/{path.name}")["title"] == "Modified Title"
+    assert store.sql("SELECT title FROM papers WHERE paper_id = ?", [paper["paper_id"]]) == [{"title": "Modified Title"}]
+
+
+def test_sync_to_json_unchanged_store_writes_nothing(store, catalog_root):
+    assert store.sync_to_json(catalog_root) == []
+
+
+def test_sync_to_json_round_trip(store, catalog_root):
+    fb = FactorBase(catalog_root)
+    paper = dict(next(iter(fb.papers.values())).to_dict(), paper_id="paper_test_roundtrip", title="Round Trip")
+    store.put_paper(paper)
+    store.put_link({"paper_id": "paper_test_roundtrip", "measure_id": "BM", "role": "primary_sorting_variable"})
+
+    written = store.sync_to_json(catalog_root)
+    assert sorted(written) == ["papers/metadata/paper_test_roundtrip.json", "relations/paper_measures.json"]
+
+    reloaded = FactorBase(catalog_root)
+    assert reloaded.get_paper("paper_test_roundtrip")["title"] == "Round Trip"
+    assert store.read_sources() == read_sources(catalog_root)
+    assert FactorBase(sources=store.read_sources()).papers == reloaded.papers
+    assert FactorBase(sources=store.read_sources()).links == reloaded.links
+
+
+def test_search_matches_measure_id(store):
+    results = store.search("BM")
+    assert results and results[0]["id"] == "BM"
+
+
+def test_factor_id_is_numeric(store, catalog_root):
+    factors = json.loads((catalog_root / "factors" / "factors.json").read_text(encoding="utf-8"))["factors"]
+    ids = sorted(f["factor_id"] for f in factors)
+    assert {r["t"] for r in store.sql("SELECT typeof(factor_id) AS t FROM factors")} == {"integer"}
+    assert [r["factor_id"] for r in store.sql("SELECT factor_id FROM factors ORDER BY factor_id")] == ids
+    assert len(store.sql("SELECT factor_id FROM factors WHERE factor_id < 10")) == sum(i < 10 for i in ids)
+
+
+def test_old_schema_version_is_rejected(tmp_path):
+    path = tmp_path / "old.sqlite"
+    conn = sqlite3.connect(str(path))
+    conn.execute("PRAGMA user_version = 1")
+    conn.close()
+    with pytest.raises(ValueError, match="schema 版本不符"):
+        open_store(path, sync=False)
+
+
+def test_get_store_rate_limits_json_sync(monkeypatch):
+    import sqlite_store
+
+    class CountingStore:
+        syncs = 0
+
+        def sync_from_json(self):
+            self.syncs += 1
+
+        def read_sources(self):
+            return {}
+
+    fake = CountingStore()
+    monkeypatch.setattr(sqlite_store, "_store", fake)
+    monkeypatch.setattr(sqlite_store, "_last_sync", 0.0)
+
+    for _ in range(5):
+        assert sqlite_store.get_store() is fake
+    assert fake.syncs == 1
+    sqlite_store.get_store(sync=False)
+    assert fake.syncs == 1
+    sqlite_store.get_store(check_interval=0)
+    assert fake.syncs == 2
+    # 載入目錄時一律同步
+    sqlite_store.load_sources()
+    assert fake.syncs == 3
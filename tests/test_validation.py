@@ -0,0 +1,160 @@
+"""validation.py 測試（增量驗證快取、平行驗證與統一的 check 流程）"""
+
+import json
+
+import pytest
+
+import validation
+from validation import (
+    CHECKS, HAS_JSONSCHEMA, SCHEMA_NAMES, ValidationCache, ValidationContext, ValidationResult,
+    compile_schema, discover_files, load_schemas, register_check, run_checks, validate_document,
+    validate_files,
+)
+
+
+def write_json(path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+@pytest.fixture
+def measure_file(catalog_root):
+    return catalog_root / "measures" / "value" / "BM.json"
+
+
+def test_cache_hit_after_save(measure_file, tmp_path):
+    cache_path = tmp_path / "cache.json"
+    cache = ValidationCache("key", cache_path)
+    first = validate_files("measure", [measure_file], cache=cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+    cache.save()
+
+    cache = ValidationCache("key", cache_path)
+    second = validate_files("measure", [measure_file], cache=cache)
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert [(r.valid, r.errors) for r in second] == [(r.valid, r.errors) for r in first]
+
+
+def test_cache_invalidated_when_file_changes(measure_file, tmp_path):
+    cache_path = tmp_path / "cache.json"
+    cache = ValidationCache("key", cache_path)
+    assert validate_files("measure", [measure_file], cache=cache)[0].valid
+    cache.save()
+
+    data = json.loads(measure_file.read_text(encoding="utf-8"))
+    data["frequency"] = "monthly"
+    write_json(measure_file, data)
+
+    cache = ValidationCache("key", cache_path)
+    result = validate_files("measure", [measure_file], cache=cache)[0]
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert not result.valid
+    assert any("frequency" in e for e in result.errors)
+
+
+def test_cache_invalidated_when_dependency_changes_or_is_removed(measure_file, tmp_path):
+    dep = tmp_path / "paper.json"
+    write_json(dep, {"paper_id": "p"})
+    cache = ValidationCache("key", tmp_path / "cache.json")
+    cache.store(measure_file, ValidationResult(measure_file, True), [dep])
+    assert cache.lookup(measure_file) is not None
+
+    write_json(dep, {"paper_id": "changed"})
+    assert cache.lookup(measure_file) is None
+
+    cache.store(measure_file, ValidationResult(measure_file, True), [dep])
+    dep.unlink()
+    assert cache.lookup(measure_file) is None
+
+
+def test_cache_discarded_when_key_changes(measure_file, tmp_path):
+    cache_path = tmp_path / "cache.json"
+    cache = ValidationCache("old", cache_path)
+    validate_files("measure", [measure_file], cache=cache)
+    cache.save()
+
+    cache = ValidationCache("new", cache_path)
+    assert cache.lookup(measure_file) is None
+
+
+def test_parallel_validation_matches_serial(catalog_root):
+    files = discover_files("measure", catalog_root)
+    broken = files[0]
+    data = json.loads(broken.read_text(encoding="utf-8"))
+    del data["description"]
+    data["data_source"] = "CRSP"
+    write_json(broken, data)
+    (files[1]).write_text("{not json", encoding="utf-8")
+
+    schemas = {SCHEMA_NAMES["measure"]: load_schemas()[SCHEMA_NAMES["measure"]]}
+    serial = validate_files("measure", files, schemas, jobs=1)
+    parallel = validate_files("measure", files, schemas, jobs=2)
+
+    assert [(r.filepath, r.valid, r.errors) for r in parallel] == \
+        [(r.filepath, r.valid, r.errors) for r in serial]
+    assert not serial[0].valid and not serial[1].valid
+    assert all(r.valid for r in serial[2:])
+
+
+@pytest.mark.skipif(not HAS_JSONSCHEMA, reason="需要 jsonschema")
+def test_compile_schema_compiles_once(monkeypatch):
+    monkeypatch.setattr(validation, "_compiled_schemas", {})
+    schema = load_schemas()[SCHEMA_NAMES["measure"]]
+    assert compile_schema(schema) is compile_schema(schema)
+    assert len(validation._compiled_schemas) == 1
+
+
+def test_measure_reference_check_records_dependency(catalog_root, measure_file):
+    data = json.loads(measure_file.read_text(encoding="utf-8"))
+    data["original_paper_id"] = "paper_missing"
+    write_json(measure_file, data)
+
+    ctx = ValidationContext(root=catalog_root)
+    result = validate_document("measure", measure_file, ctx)
+    assert not result.valid
+    assert "參照的論文不存在: paper_missing" in result.errors
+    assert catalog_root / "papers" / "metadata" / "paper_missing.json" in ctx.take_deps()
+    assert ctx.take_deps() == []
+
+
+def test_relations_unknown_measure(catalog_root):
+    path = catalog_root / "relations" / "paper_measures.json"
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["paper_measure_links"].append(
+        dict(data["paper_measure_links"][0], measure_id="NOT_A_MEASURE"))
+    write_json(path, data)
+
+    result = validate_document("relations", path, ValidationContext(root=catalog_root))
+    assert not result.valid
+    assert "參照的 Measure 不存在: NOT_A_MEASURE" in result.errors
+
+
+def test_fatal_check_stops_later_checks(tmp_path):
+    # 後續 check 直接讀取 paper_measure_links，結構錯誤時不可繼續執行
+    path = tmp_path / "paper_measures.json"
+    write_json(path, {"links": []})
+    result = validate_document("relations", path, ValidationContext(root=tmp_path))
+    assert result.errors == ["缺少 paper_measure_links 陣列"]
+
+
+def test_factors_duplicate_id(catalog_root):
+    path = catalog_root / "factors" / "factors.json"
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["factors"][1]["factor_id"] = data["factors"][0]["factor_id"]
+    write_json(path, data)
+
+    result = validate_document("factors", path, ValidationContext(root=catalog_root))
+    assert not result.valid
+    assert any("factor_id 重複" in e for e in result.errors)
+
+
+def test_register_check(monkeypatch, tmp_path):
+    monkeypatch.setitem(CHECKS, "paper", list(CHECKS["paper"]))
+
+    @register_check("paper")
+    def check_title_case(data, filepath, ctx):
+        return [] if data["title"].istitle() else ["title 需為 Title Case"]
+
+    data = {"title": "lower case"}
+    errors = run_checks("paper", data, tmp_path / "paper_x.json", ValidationContext(root=tmp_path))
+    assert errors[-1] == "title 需為 Title Case"
+    assert CHECKS["paper"][-1] == (check_title_case, False)